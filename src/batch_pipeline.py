@@ -0,0 +1,203 @@
+"""
+Headless scoring of exported profiles.
+
+Reads NDJSON where every line is a `ProfileCodec.to_json_dict` payload, verifies the
+checksum, sanitizes the state against the bank version it was answered on, builds the
+profile and writes one `ReportGenerator.generate_manual` record per accepted line.
+Malformed, tampered or incomplete lines go to a separate reject stream.
+
+    python -m src.batch_pipeline profiles.ndjson --output manuals.ndjson --rejects rejects.ndjson
+
+Lines are processed in batches on a process pool with a bounded number of batches in
+flight, so memory stays flat regardless of the input size.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import dataclass
+from itertools import islice
+import json
+import os
+import sys
+import time
+from typing import Any, Iterable, Iterator, TextIO
+
+from src.question_bank_history import get_question_bank_history
+from src.services.profile_builder import build_user_profile_from_state
+from src.services.profile_codec import ProfileCodec, ProfileCodecError
+from src.services.reporting import ReportGenerator
+from src.services.sanitizer import StateSanitizer
+
+# (line number, raw line) in, (accepted, NDJSON line) out.
+Batch = list[tuple[int, str]]
+BatchResult = list[tuple[bool, str]]
+
+
+@dataclass(frozen=True)
+class PipelineStats:
+    accepted: int
+    rejected: int
+    seconds: float
+
+    @property
+    def records(self) -> int:
+        return self.accepted + self.rejected
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds > 0 else 0.0
+
+
+def _dumps(record: dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def process_line(line_number: int, line: str) -> tuple[bool, str]:
+    """Score one NDJSON payload line; returns `(accepted, output line)`."""
+    try:
+        payload = ProfileCodec.from_json_text(line.strip())
+    except ProfileCodecError as exc:
+        return False, _dumps({"line": line_number, "error": str(exc)})
+
+    registry = get_question_bank_history().resolve(payload.bank_fingerprint)
+    state, removal_log = StateSanitizer.sanitize(
+        payload.state,
+        incoming_bank_fingerprint=payload.bank_fingerprint,
+        registry=registry,
+    )
+    built = build_user_profile_from_state(state, registry)
+    if built.user is None:
+        return False, _dumps(
+            {
+                "line": line_number,
+                "checksum": payload.checksum,
+                "error": "Profile is incomplete.",
+                "missing_inputs": list(built.missing_inputs),
+                "removals": removal_log,
+            }
+        )
+
+    return True, _dumps(
+        {
+            "line": line_number,
+            "checksum": payload.checksum,
+            "bank_fingerprint": payload.bank_fingerprint,
+            "mode": built.mode,
+            "removals": removal_log,
+            "manual": ReportGenerator.generate_manual(built.user),
+        }
+    )
+
+
+def _process_batch(batch: Batch) -> BatchResult:
+    return [process_line(line_number, line) for line_number, line in batch]
+
+
+def _init_worker() -> None:
+    # Load the current and archived banks once per process instead of on the first record.
+    get_question_bank_history()
+
+
+def _batches(lines: Iterable[str], batch_size: int) -> Iterator[Batch]:
+    numbered = ((number, line) for number, line in enumerate(lines, start=1) if line.strip())
+    while batch := list(islice(numbered, batch_size)):
+        yield batch
+
+
+def run_pipeline(
+    lines: Iterable[str],
+    output: TextIO,
+    rejects: TextIO,
+    *,
+    workers: int | None = None,
+    batch_size: int = 256,
+    ordered: bool = True,
+    max_pending: int | None = None,
+) -> PipelineStats:
+    """
+    Score every payload line, writing accepted records to `output` and the rest to `rejects`.
+
+    `workers=1` runs in the calling process. With `ordered=False` batches are written as
+    they finish; records inside a batch always keep input order.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive.")
+    started = time.perf_counter()
+    accepted = rejected = 0
+
+    def write(results: BatchResult) -> None:
+        nonlocal accepted, rejected
+        for is_accepted, record in results:
+            if is_accepted:
+                accepted += 1
+                output.write(record + "\n")
+            else:
+                rejected += 1
+                rejects.write(record + "\n")
+
+    batches = _batches(lines, batch_size)
+    if workers == 1:
+        for batch in batches:
+            write(_process_batch(batch))
+    else:
+        workers = workers or os.cpu_count() or 1
+        max_pending = max_pending or 2 * workers
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            pending: deque[Future[BatchResult]] = deque()
+            for batch in batches:
+                pending.append(executor.submit(_process_batch, batch))
+                if len(pending) < max_pending:
+                    continue
+                if ordered:
+                    write(pending.popleft().result())
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        write(future.result())
+            while pending:
+                write(pending.popleft().result())
+
+    return PipelineStats(accepted=accepted, rejected=rejected, seconds=time.perf_counter() - started)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score exported profile payloads (NDJSON) without the UI.")
+    parser.add_argument("input", help="NDJSON file of exported profile payloads, or '-' for stdin.")
+    parser.add_argument("--output", default="-", help="NDJSON file for generated manuals (default: stdout).")
+    parser.add_argument("--rejects", required=True, help="NDJSON file for invalid or incomplete payloads.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 = in-process).")
+    parser.add_argument("--batch-size", type=int, default=256, help="Lines per worker task.")
+    parser.add_argument("--unordered", action="store_true", help="Write batches as they finish instead of in input order.")
+    args = parser.parse_args(argv)
+
+    with ExitStack() as stack:
+
+        def open_stream(path: str, mode: str, default: TextIO) -> TextIO:
+            if path == "-":
+                return default
+            return stack.enter_context(open(path, mode, encoding="utf-8"))
+
+        stats = run_pipeline(
+            open_stream(args.input, "r", sys.stdin),
+            open_stream(args.output, "w", sys.stdout),
+            open_stream(args.rejects, "w", sys.stderr),
+            workers=args.workers,
+            batch_size=args.batch_size,
+            ordered=not args.unordered,
+        )
+
+    print(
+        f"Processed {stats.records} records ({stats.accepted} accepted, {stats.rejected} rejected) "
+        f"in {stats.seconds:.2f}s, {stats.records_per_second:.0f} records/s.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,244 @@
+"""
+Bulk import of Big Five result PDFs.
+
+    python -m src.bigfive_bulk_import results/ --output fragments.ndjson --errors errors.ndjson
+    python -m src.bigfive_bulk_import results.zip --output fragments.ndjson --errors errors.ndjson --cache-dir .bigfive-cache
+
+Reads every `*.pdf` in a directory (recursively) or in a zip / tar archive, parses them on
+a process pool and writes one NDJSON state fragment per file: the facet scores keyed by
+`FACET_SPECS` session keys plus the OCEAN scores derived from them, ready to merge into a
+questionnaire state. Files that fail to parse go to the error report.
+
+Parsed facets are cached by SHA-256 of the PDF bytes, within a run and, with
+`--cache-dir`, across runs, so identical or re-sent files are never parsed twice.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Any, Iterator, TextIO
+import zipfile
+
+from src.services.bigfive_facets import FACET_SPECS
+from src.services.bigfive_pdf_parser import BigFivePdfParseError, BigFivePdfParser, ParsedBigFiveFacets
+from src.services.bigfive_state import bigfive_state_fragment
+
+CACHE_FORMAT_VERSION = 1
+_FACET_KEYS = frozenset(spec.session_key for spec in FACET_SPECS)
+# (raw scores, pages read, page count) or the parse error message.
+ParseResult = tuple[dict[str, int], int, int] | str
+
+
+@dataclass(frozen=True)
+class BulkImportStats:
+    imported: int
+    failed: int
+    parsed: int
+    cached: int
+    seconds: float
+
+
+def iter_pdf_files(source: Path) -> Iterator[tuple[str, bytes]]:
+    """`(name, bytes)` of every PDF in a directory or archive, in name order."""
+    if source.is_dir():
+        for path in sorted(source.rglob("*")):
+            if path.is_file() and path.suffix.lower() == ".pdf":
+                yield path.relative_to(source).as_posix(), path.read_bytes()
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in sorted(archive.namelist()):
+                if not name.endswith("/") and name.lower().endswith(".pdf"):
+                    yield name, archive.read(name)
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            for member in sorted(archive.getmembers(), key=lambda member: member.name):
+                if member.isfile() and member.name.lower().endswith(".pdf"):
+                    handle = archive.extractfile(member)
+                    if handle is not None:
+                        yield member.name, handle.read()
+    else:
+        raise ValueError(f"'{source}' is neither a directory nor a zip / tar archive.")
+
+
+def parse_pdf(pdf_bytes: bytes) -> ParseResult:
+    try:
+        streamed = BigFivePdfParser.parse_pdf_stream(pdf_bytes)
+    except BigFivePdfParseError as exc:
+        return str(exc)
+    return streamed.facets.raw_scores, streamed.pages_read, streamed.page_count
+
+
+class FacetCache:
+    """Parsed facets by PDF SHA-256; kept in memory and, with a directory, as one JSON file per hash."""
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory
+        self._entries: dict[str, dict[str, int]] = {}
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, digest: str) -> dict[str, int] | None:
+        raw_scores = self._entries.get(digest)
+        if raw_scores is None and self.directory is not None:
+            path = self.directory / f"{digest}.json"
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return None
+            # A truncated or hand-edited file is a miss; the PDF is parsed again and the entry rewritten.
+            if not isinstance(entry, dict) or entry.get("format_version") != CACHE_FORMAT_VERSION:
+                return None
+            raw_scores = entry.get("raw_scores")
+            if not isinstance(raw_scores, dict) or set(raw_scores) != _FACET_KEYS or not all(
+                type(score) is int and 0 <= score <= 20 for score in raw_scores.values()
+            ):
+                return None
+            self._entries[digest] = raw_scores
+        return raw_scores
+
+    def put(self, digest: str, raw_scores: dict[str, int]) -> None:
+        self._entries[digest] = raw_scores
+        if self.directory is not None:
+            # A private temporary file per writer, so runs sharing a cache directory never collide.
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.directory, prefix=f"{digest}.", suffix=".tmp", delete=False
+            ) as handle:
+                handle.write(json.dumps({"format_version": CACHE_FORMAT_VERSION, "raw_scores": raw_scores}, sort_keys=True))
+            os.replace(handle.name, self.directory / f"{digest}.json")
+
+
+def _dumps(record: dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def run_bulk_import(
+    source: Path,
+    output: TextIO,
+    errors: TextIO,
+    *,
+    cache: FacetCache | None = None,
+    workers: int | None = None,
+    max_pending: int | None = None,
+) -> BulkImportStats:
+    """
+    Parse every PDF of `source`, writing fragments to `output` and failures to `errors` in
+    file name order. `workers=1` parses in the calling process.
+    """
+    cache = cache or FacetCache()
+    started = time.perf_counter()
+    imported = failed = parsed = cached = 0
+
+    def write(name: str, digest: str, result: ParseResult, from_cache: bool) -> None:
+        nonlocal imported, failed, parsed, cached
+        if isinstance(result, str):
+            failed += 1
+            errors.write(_dumps({"file": name, "sha256": digest, "error": result}) + "\n")
+            return
+        raw_scores, pages_read, page_count = result
+        imported += 1
+        record: dict[str, Any] = {
+            "file": name,
+            "sha256": digest,
+            "state": bigfive_state_fragment(ParsedBigFiveFacets(raw_scores=raw_scores)),
+        }
+        if from_cache:
+            cached += 1
+            record["cached"] = True
+        else:
+            parsed += 1
+            record["pages_read"], record["page_count"] = pages_read, page_count
+        output.write(_dumps(record) + "\n")
+
+    # Files in output order: (name, digest, result when already known, served from cache).
+    pending: deque[tuple[str, str, ParseResult | None, bool]] = deque()
+    # One parse per distinct file in this run, shared by every copy of it.
+    parses: dict[str, Future[ParseResult] | ParseResult] = {}
+
+    def resolve(digest: str) -> ParseResult:
+        outcome = parses[digest]
+        if isinstance(outcome, Future):
+            outcome = parses[digest] = outcome.result()
+            if not isinstance(outcome, str):
+                cache.put(digest, outcome[0])
+        return outcome
+
+    def drain(limit: int) -> None:
+        while pending and (len(pending) > limit or pending[0][2] is not None):
+            name, digest, result, from_cache = pending.popleft()
+            write(name, digest, resolve(digest) if result is None else result, from_cache)
+
+    with ExitStack() as stack:
+        executor = None
+        if workers != 1:
+            workers = workers or os.cpu_count() or 1
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+        max_pending = max_pending or 4 * (workers or 1)
+
+        for name, data in iter_pdf_files(source):
+            digest = hashlib.sha256(data).hexdigest()
+            raw_scores = cache.get(digest)
+            if raw_scores is not None:
+                pending.append((name, digest, (raw_scores, 0, 0), True))
+            elif digest in parses:
+                pending.append((name, digest, None, True))
+            else:
+                if executor is None:
+                    parses[digest] = Future()
+                    parses[digest].set_result(parse_pdf(data))
+                else:
+                    parses[digest] = executor.submit(parse_pdf, data)
+                pending.append((name, digest, None, False))
+            drain(max_pending)
+        drain(0)
+
+    return BulkImportStats(
+        imported=imported, failed=failed, parsed=parsed, cached=cached, seconds=time.perf_counter() - started
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Parse a folder or archive of Big Five result PDFs into state fragments.")
+    parser.add_argument("source", type=Path, help="Directory, zip or tar archive with PDF files.")
+    parser.add_argument("--output", default="-", help="NDJSON file for state fragments (default: stdout).")
+    parser.add_argument("--errors", required=True, help="NDJSON file for files that could not be parsed.")
+    parser.add_argument("--cache-dir", type=Path, default=None, help="Directory that keeps parsed facets across runs.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 = in-process).")
+    args = parser.parse_args(argv)
+
+    with ExitStack() as stack:
+
+        def open_stream(path: str, default: TextIO) -> TextIO:
+            if path == "-":
+                return default
+            return stack.enter_context(open(path, "w", encoding="utf-8"))
+
+        stats = run_bulk_import(
+            args.source,
+            open_stream(args.output, sys.stdout),
+            open_stream(args.errors, sys.stderr),
+            cache=FacetCache(args.cache_dir),
+            workers=args.workers,
+        )
+
+    print(
+        f"Imported {stats.imported} PDFs ({stats.parsed} parsed, {stats.cached} from cache), "
+        f"{stats.failed} failed, in {stats.seconds:.2f}s.",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
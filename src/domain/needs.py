@@ -1,7 +1,13 @@
 from dataclasses import dataclass, field
 
+from src.domain.revision import Tracked
+
+# Order of every per-need vector (needs, priority, provision) across the services.
+NEED_KEYS = ("safety", "resource", "resonance", "expansion")
+
+
 @dataclass
-class RelationalNeedsComponent:
+class RelationalNeedsComponent(Tracked):
     raw_safety: float = 0.0
     raw_resource: float = 0.0
     raw_resonance: float = 0.0
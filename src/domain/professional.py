@@ -1,8 +1,9 @@
 from dataclasses import dataclass
+from src.domain.revision import Tracked
 from src.enums import HollandCode
 
 @dataclass
-class ProfessionalComponent:
+class ProfessionalComponent(Tracked):
     primary_type: HollandCode = HollandCode.REALISTIC
     secondary_type: HollandCode = HollandCode.INVESTIGATIVE
     tertiary_type: HollandCode = HollandCode.ARTISTIC
@@ -1,4 +1,8 @@
-from dataclasses import dataclass, field
+from array import array
+from dataclasses import dataclass, field, fields
+from typing import Iterable
+
+from src.domain.revision import Tracked, bump_domain_revision
 
 """
     Values are normalized (0.0 - 1.0).
@@ -6,7 +10,7 @@ from dataclasses import dataclass, field
 """
 
 @dataclass
-class NeuroticismDomain:
+class NeuroticismDomain(Tracked):
     """Загроза та Емоційна стабільність"""
     anxiety: float = 0.5          # N1: Тривожність
     hostility: float = 0.5        # N2: Ворожість/Гнів
@@ -21,7 +25,7 @@ class NeuroticismDomain:
                 self.self_consciousness + self.impulsiveness + self.vulnerability) / 6
 
 @dataclass
-class ExtraversionDomain:
+class ExtraversionDomain(Tracked):
     """Енергія та Соціальна взаємодія"""
     warmth: float = 0.5           # E1: Теплота
     gregariousness: float = 0.5   # E2: Стадність
@@ -36,7 +40,7 @@ class ExtraversionDomain:
                 self.activity + self.excitement_seeking + self.positive_emotions) / 6
 
 @dataclass
-class OpennessDomain:
+class OpennessDomain(Tracked):
     """Когнітивний стиль"""
     fantasy: float = 0.5          # O1: Уява
     aesthetics: float = 0.5       # O2: Естетика
@@ -51,7 +55,7 @@ class OpennessDomain:
                     self.actions, self.ideas, self.values]) / 6
 
 @dataclass
-class AgreeablenessDomain:
+class AgreeablenessDomain(Tracked):
     """Соціальний інтерфейс"""
     trust: float = 0.5            # A1: Довіра
     straightforwardness: float = 0.5 # A2: Прямолінійність
@@ -66,7 +70,7 @@ class AgreeablenessDomain:
                     self.compliance, self.modesty, self.tender_mindedness]) / 6
 
 @dataclass
-class ConscientiousnessDomain:
+class ConscientiousnessDomain(Tracked):
     """Виконавча система"""
     competence: float = 0.5       # C1: Компетентність
     order: float = 0.5            # C2: Порядок
@@ -80,18 +84,28 @@ class ConscientiousnessDomain:
         return sum([self.competence, self.order, self.dutifulness,
                     self.achievement, self.self_discipline, self.deliberation]) / 6
 
-@dataclass
-class PsychometricsComponent:
-    """Hardware Layer: Composite Root"""
-    neuroticism: NeuroticismDomain = field(default_factory=NeuroticismDomain)
-    extraversion: ExtraversionDomain = field(default_factory=ExtraversionDomain)
-    openness: OpennessDomain = field(default_factory=OpennessDomain)
-    agreeableness: AgreeablenessDomain = field(default_factory=AgreeablenessDomain)
-    conscientiousness: ConscientiousnessDomain = field(default_factory=ConscientiousnessDomain)
-    
-    # Global modifiers
-    has_adhd: bool = False
-    has_asd: bool = False
+DOMAIN_TYPES = {
+    "neuroticism": NeuroticismDomain,
+    "extraversion": ExtraversionDomain,
+    "openness": OpennessDomain,
+    "agreeableness": AgreeablenessDomain,
+    "conscientiousness": ConscientiousnessDomain,
+}
+FACETS_PER_DOMAIN = 6
+
+# (домен, фасет) -> позиція у плоскому векторі з 30 фасетів; порядок збігається з FACET_SPECS.
+FACET_INDEX: dict[tuple[str, str], int] = {
+    (domain, facet.name): position * FACETS_PER_DOMAIN + offset
+    for position, (domain, domain_type) in enumerate(DOMAIN_TYPES.items())
+    for offset, facet in enumerate(fields(domain_type))
+}
+FACET_COUNT = len(FACET_INDEX)
+
+
+class _NeurodivergenceFlags:
+    __slots__ = ()
+    has_adhd: bool
+    has_asd: bool
 
     @property
     def has_neurodivergence_context(self) -> bool:
@@ -107,11 +121,35 @@ class PsychometricsComponent:
             return "ASD"
         return None
 
+
+def _normalize_high_level(scores: Iterable[float]) -> list[float]:
+    # Нормалізація (якщо 0-100 -> 0-1)
+    return [x / 100.0 if x > 1.0 else x for x in scores]
+
+
+@dataclass
+class PsychometricsComponent(Tracked, _NeurodivergenceFlags):
+    """Hardware Layer: Composite Root"""
+    neuroticism: NeuroticismDomain = field(default_factory=NeuroticismDomain)
+    extraversion: ExtraversionDomain = field(default_factory=ExtraversionDomain)
+    openness: OpennessDomain = field(default_factory=OpennessDomain)
+    agreeableness: AgreeablenessDomain = field(default_factory=AgreeablenessDomain)
+    conscientiousness: ConscientiousnessDomain = field(default_factory=ConscientiousnessDomain)
+    
+    # Global modifiers
+    has_adhd: bool = False
+    has_asd: bool = False
+
+    def facet_values(self) -> tuple[float, ...]:
+        """Усі 30 фасетів у порядку `FACET_INDEX`."""
+        return tuple(
+            getattr(getattr(self, domain), facet) for domain, facet in FACET_INDEX
+        )
+
     @classmethod
     def from_high_level_scores(cls, o: float, c: float, e: float, a: float, n: float, adhd=False, asd=False):
         """Фабрика для створення з 5 загальних цифр (для сумісності зі старим UI)."""
-        # Нормалізація (якщо 0-100 -> 0-1)
-        o, c, e, a, n = [x/100.0 if x > 1.0 else x for x in [o,c,e,a,n]]
+        o, c, e, a, n = _normalize_high_level([o, c, e, a, n])
         
         return cls(
             neuroticism=NeuroticismDomain(*[n]*6),
@@ -122,3 +160,131 @@ class PsychometricsComponent:
             has_adhd=adhd,
             has_asd=asd
         )
+
+
+class _CompactDomain:
+    """Вигляд одного домену поверх спільного масиву `CompactPsychometrics`."""
+
+    __slots__ = ("_owner",)
+    _position = 0
+    _facet_names: tuple[str, ...] = ()
+
+    def __init__(self, owner: "CompactPsychometrics") -> None:
+        self._owner = owner
+
+    @property
+    def average(self) -> float:
+        return self._owner._averages[self._position]
+
+    def __eq__(self, other: object) -> bool:
+        if not hasattr(other, "average"):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name, None) for name in self._facet_names)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._facet_names)
+        return f"{type(self).__name__}({values})"
+
+
+def _facet_property(index: int) -> property:
+    def get(self: _CompactDomain) -> float:
+        return self._owner._values[index]
+
+    def set(self: _CompactDomain, value: float) -> None:
+        self._owner.set_facet(index, value)
+
+    return property(get, set)
+
+
+def _compact_domain_type(position: int, domain_type: type) -> type[_CompactDomain]:
+    names = tuple(facet.name for facet in fields(domain_type))
+    start = position * FACETS_PER_DOMAIN
+    namespace = {name: _facet_property(start + offset) for offset, name in enumerate(names)}
+    namespace.update(__slots__=(), __doc__=domain_type.__doc__, _position=position, _facet_names=names)
+    return type(f"Compact{domain_type.__name__}", (_CompactDomain,), namespace)
+
+
+def _domain_property(position: int, domain_type: type) -> property:
+    view_type = _compact_domain_type(position, domain_type)
+    start = position * FACETS_PER_DOMAIN
+
+    def get(self: "CompactPsychometrics") -> _CompactDomain:
+        return view_type(self)
+
+    def set(self: "CompactPsychometrics", domain: object) -> None:
+        for offset, name in enumerate(view_type._facet_names):
+            self._values[start + offset] = float(getattr(domain, name))
+        self._refresh_average(position)
+        bump_domain_revision()
+
+    return property(get, set)
+
+
+class CompactPsychometrics(Tracked, _NeurodivergenceFlags):
+    """
+    Компактна заміна `PsychometricsComponent` для великих наборів профілів у пам'яті.
+
+    30 фасетів лежать в одному `array('d')` у порядку `FACET_INDEX`, середні доменів
+    кешуються й оновлюються при записі фасета. Атрибутний API той самий:
+    `psycho.openness.ideas`, `psycho.openness.average`, присвоєння фасетів.
+    """
+
+    __slots__ = ("_values", "_averages", "has_adhd", "has_asd")
+
+    neuroticism = _domain_property(0, NeuroticismDomain)
+    extraversion = _domain_property(1, ExtraversionDomain)
+    openness = _domain_property(2, OpennessDomain)
+    agreeableness = _domain_property(3, AgreeablenessDomain)
+    conscientiousness = _domain_property(4, ConscientiousnessDomain)
+
+    def __init__(self, values: Iterable[float] | None = None, has_adhd: bool = False, has_asd: bool = False) -> None:
+        self._values = array("d", [0.5] * FACET_COUNT if values is None else values)
+        if len(self._values) != FACET_COUNT:
+            raise ValueError(f"Expected {FACET_COUNT} facet values, got {len(self._values)}.")
+        self._averages = array("d", [0.0] * len(DOMAIN_TYPES))
+        for position in range(len(DOMAIN_TYPES)):
+            self._refresh_average(position)
+        self.has_adhd = has_adhd
+        self.has_asd = has_asd
+
+    @classmethod
+    def from_component(cls, psycho: PsychometricsComponent) -> "CompactPsychometrics":
+        return cls(psycho.facet_values(), has_adhd=psycho.has_adhd, has_asd=psycho.has_asd)
+
+    @classmethod
+    def from_high_level_scores(cls, o: float, c: float, e: float, a: float, n: float, adhd=False, asd=False):
+        o, c, e, a, n = _normalize_high_level([o, c, e, a, n])
+        return cls([n] * 6 + [e] * 6 + [o] * 6 + [a] * 6 + [c] * 6, has_adhd=adhd, has_asd=asd)
+
+    def to_component(self) -> PsychometricsComponent:
+        domains = {
+            domain: domain_type(*self._values[position * FACETS_PER_DOMAIN : (position + 1) * FACETS_PER_DOMAIN])
+            for position, (domain, domain_type) in enumerate(DOMAIN_TYPES.items())
+        }
+        return PsychometricsComponent(**domains, has_adhd=self.has_adhd, has_asd=self.has_asd)
+
+    def facet(self, index: int) -> float:
+        return self._values[index]
+
+    def set_facet(self, index: int, value: float) -> None:
+        self._values[index] = value
+        self._refresh_average(index // FACETS_PER_DOMAIN)
+        bump_domain_revision()
+
+    def facet_values(self) -> tuple[float, ...]:
+        return tuple(self._values)
+
+    def _refresh_average(self, position: int) -> None:
+        start = position * FACETS_PER_DOMAIN
+        self._averages[position] = sum(self._values[start : start + FACETS_PER_DOMAIN]) / FACETS_PER_DOMAIN
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactPsychometrics):
+            return NotImplemented
+        return (self._values, self.has_adhd, self.has_asd) == (other._values, other.has_adhd, other.has_asd)
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactPsychometrics(values={list(self._values)!r}, "
+            f"has_adhd={self.has_adhd!r}, has_asd={self.has_asd!r})"
+        )
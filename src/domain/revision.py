@@ -0,0 +1,31 @@
+"""
+Change tracking for the mutable profile components.
+
+Values derived from a profile are cached by identity (see `src.services.derived_features`).
+Instead of re-reading every input on each lookup, the cache remembers the revision it was
+computed at: every attribute write on a `Tracked` component bumps the process-wide
+revision, so a hit costs one integer comparison and any edit invalidates explicitly.
+In-place edits of containers (e.g. `profile.provision["x"] = ...`) are not seen; assign a
+new value instead.
+"""
+
+from __future__ import annotations
+
+_revision = 0
+
+
+def domain_revision() -> int:
+    return _revision
+
+
+def bump_domain_revision() -> None:
+    global _revision
+    _revision += 1
+
+
+class Tracked:
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: object) -> None:
+        super().__setattr__(name, value)
+        bump_domain_revision()
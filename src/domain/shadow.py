@@ -1,8 +1,9 @@
 from dataclasses import dataclass
+from src.domain.revision import Tracked
 from src.enums import AttachmentStyle, ConflictResponse, RegulationMethod
 
 @dataclass
-class ShadowComponent:
+class ShadowComponent(Tracked):
     attachment_style: AttachmentStyle = AttachmentStyle.SECURE
     conflict_response: ConflictResponse = ConflictResponse.FLIGHT
     regulation_method: RegulationMethod = RegulationMethod.AUTO_REGULATION
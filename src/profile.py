@@ -1,17 +1,18 @@
 from dataclasses import dataclass, field
-from src.domain.psychometrics import PsychometricsComponent
+from src.domain.psychometrics import CompactPsychometrics, PsychometricsComponent
 from src.domain.shadow import ShadowComponent
 from src.domain.eros import ErosComponent
 from src.domain.needs import RelationalNeedsComponent
 from src.domain.professional import ProfessionalComponent
+from src.domain.revision import Tracked
 
 @dataclass
-class UserProfile:
+class UserProfile(Tracked):
     name: str
-    psychometrics: PsychometricsComponent
+    psychometrics: PsychometricsComponent | CompactPsychometrics
     shadow: ShadowComponent
     eros: ErosComponent
     needs: RelationalNeedsComponent
     professional: ProfessionalComponent
     provision: dict[str, float] | None = None
-    calibration_notes: list[str] = field(default_factory=list)
\ No newline at end of file
+    calibration_notes: list[str] = field(default_factory=list)
@@ -0,0 +1,127 @@
+"""
+Per-payload cost of the JSON (4.0) profile codec.
+
+    python -m src.profile_codec_benchmark samples.ndjson [--repeat 5]
+
+`samples.ndjson` holds exported payloads (`ProfileCodec.to_json_dict`). Each payload is
+built, encoded and decoded by the current codec and by a reference copy of the previous
+implementation, which serialized the state once for the checksum, again for the string
+and a third time to verify it on decode. Both use the same compression, so the difference
+is the serialization work alone.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+from pathlib import Path
+import time
+from typing import Any, Callable, Mapping
+
+from src.services.profile_codec import ProfileCodec, ProfileCodecError, ProfilePayload
+
+
+def _dumps(data: Mapping[str, Any]) -> str:
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def _legacy_checksum(payload_data: Mapping[str, Any]) -> str:
+    return hashlib.sha256(_dumps(payload_data).encode("utf-8")).hexdigest()[:16]
+
+
+def _legacy_build(raw_payload: Mapping[str, Any]) -> ProfilePayload:
+    payload_data = {
+        "format_version": ProfileCodec.FORMAT_VERSION,
+        "bank_fingerprint": raw_payload["bank_fingerprint"],
+        "state": dict(raw_payload["state"]),
+        "created_at": raw_payload["created_at"],
+    }
+    return ProfilePayload(checksum=_legacy_checksum(payload_data), **payload_data)
+
+
+def _legacy_encode(payload: ProfilePayload) -> str:
+    raw_json = _dumps(ProfileCodec.to_json_dict(payload)).encode("utf-8")
+    compressed = ProfileCodec._compress(raw_json, payload.format_version, payload.bank_fingerprint)
+    return base64.urlsafe_b64encode(compressed).decode("ascii").rstrip("=")
+
+
+def _legacy_decode(encoded_payload: str) -> ProfilePayload:
+    compressed = base64.urlsafe_b64decode(encoded_payload + "=" * (-len(encoded_payload) % 4))
+    raw_payload = json.loads(ProfileCodec._decompress(compressed).decode("utf-8"))
+    payload = ProfilePayload(**raw_payload)
+    payload_data = ProfileCodec.to_json_dict(payload)
+    del payload_data["checksum"]
+    if _legacy_checksum(payload_data) != payload.checksum:
+        raise ProfileCodecError("Profile payload checksum mismatch.")
+    return payload
+
+
+def _current_build(raw_payload: Mapping[str, Any]) -> ProfilePayload:
+    return ProfileCodec.build_payload(raw_payload["state"], raw_payload["bank_fingerprint"], raw_payload["created_at"])
+
+
+def _per_payload_us(function: Callable[[Any], Any], items: list[Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - started)
+    return best / len(items) * 1e6
+
+
+def _batch_decode_us(encoded: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in ProfileCodec.decode_many(encoded):
+            pass
+        best = min(best, time.perf_counter() - started)
+    return best / len(encoded) * 1e6
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the JSON profile codec against the previous implementation.")
+    parser.add_argument("samples", type=Path, help="NDJSON file of ProfileCodec JSON payloads.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the fastest is reported.")
+    args = parser.parse_args(argv)
+
+    with args.samples.open(encoding="utf-8") as handle:
+        raw_payloads = [json.loads(line) for line in handle if line.strip()]
+    if not raw_payloads:
+        parser.error("no payloads in the samples file.")
+
+    legacy_payloads = [_legacy_build(raw_payload) for raw_payload in raw_payloads]
+    current_payloads = [_current_build(raw_payload) for raw_payload in raw_payloads]
+    legacy_strings = [_legacy_encode(payload) for payload in legacy_payloads]
+    current_strings = list(ProfileCodec.encode_many(current_payloads))
+    if legacy_strings != current_strings:
+        raise SystemExit("The current codec no longer produces the same strings as the reference implementation.")
+
+    rows = (
+        ("build", _per_payload_us(_legacy_build, raw_payloads, args.repeat), _per_payload_us(_current_build, raw_payloads, args.repeat)),
+        (
+            "encode",
+            _per_payload_us(_legacy_encode, legacy_payloads, args.repeat),
+            _per_payload_us(ProfileCodec.encode_payload, current_payloads, args.repeat),
+        ),
+        (
+            "decode",
+            _per_payload_us(_legacy_decode, legacy_strings, args.repeat),
+            _per_payload_us(ProfileCodec.decode_string, current_strings, args.repeat),
+        ),
+    )
+    print(f"{len(raw_payloads)} payloads, microseconds per payload (before -> after):")
+    for label, before, after in rows:
+        print(f"  {label:<8} {before:8.1f} -> {after:8.1f}")
+    total_before = sum(row[1] for row in rows)
+    total_after = sum(row[2] for row in rows)
+    print(f"  {'total':<8} {total_before:8.1f} -> {total_after:8.1f}")
+    print(f"  decode_many {_batch_decode_us(current_strings, args.repeat):8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+"""
+zlib preset dictionaries for JSON (4.1) profile strings.
+
+A profile payload is a few kilobytes of canonical JSON whose keys are fixed by the bank
+version and whose values come from a handful of option ids, so nearly all of it can be
+referenced from a preset dictionary instead of being spelled out in every string.
+
+Dictionaries are only ever read from `question_bank/dictionaries/<fingerprint>.<id>.zdict`,
+where `<id>` is the zlib dictionary id (adler32), never rebuilt from the live registry, so
+a string keeps decoding after its bank changes. They are committed artifacts: `python -m
+src.profile_dictionary` saves one generated from the current registry's state keys and
+typical values, and `python -m src.profile_dictionary samples.ndjson` trains a better one
+from real exported payloads. Both record the id in `manifest.json`; new strings use the id
+listed last for their bank version. Decoding picks whichever dictionary the zlib header
+names, so every file must be kept. Nothing here writes at export time.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter, defaultdict
+from functools import lru_cache
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Any, Iterable, Mapping
+import zlib
+
+from src.question_bank import QUESTION_BANK_DIR, QuestionBankRegistry, get_question_bank_registry
+from src.question_bank_history import find_registry
+from src.services.sanitizer import ENUM_FIELDS, FACET_KEYS, FLAG_KEYS, HIGH_LEVEL_KEYS, MODE_FIELDS, UNIT_KEYS
+
+PROFILE_DICTIONARY_DIR = QUESTION_BANK_DIR / "dictionaries"
+# zlib only looks back 32 KiB, so anything beyond that in a dictionary is never used.
+MAX_DICTIONARY_SIZE = 32 * 1024
+COMPRESSION_LEVEL = 9
+_FDICT = 0x20
+
+
+def _fragment(key: str, value: Any) -> str:
+    """`"key":value` exactly as it appears inside a canonical payload."""
+    return json.dumps({key: value}, ensure_ascii=False, separators=(",", ":"))[1:-1]
+
+
+def _typical_state(registry: QuestionBankRegistry) -> dict[str, Any]:
+    state: dict[str, Any] = {key: choices[-1] for key, choices in MODE_FIELDS.items()}
+    state.update((key, False) for key in FLAG_KEYS)
+    state.update((key, 50.0) for key in HIGH_LEVEL_KEYS)
+    state.update((key, 10.0) for key in FACET_KEYS)
+    state.update((key, 0.5) for key in UNIT_KEYS)
+    state.update((key, next(iter(enum_class.__members__))) for key, enum_class in ENUM_FIELDS.items())
+    state["eros_tags"] = []
+    for bank in registry.banks.values():
+        for question, state_keys in zip(bank.questions, bank.state_keys()):
+            for position, state_key in enumerate(state_keys):
+                state[state_key] = question.options[min(position + 1, len(question.options) - 1)].id
+    return state
+
+
+def _assemble(fingerprint: str, skeleton: Mapping[str, str], alternates: Iterable[str] = ()) -> bytes:
+    # The skeleton mirrors a whole canonical payload and goes last, closest to the data.
+    state = ",".join(skeleton[key] for key in sorted(skeleton))
+    tail = (
+        f'{{"bank_fingerprint":"{fingerprint}","checksum":"","created_at":"+00:00",'
+        f'"format_version":"4.1","state":{{{state}}}}}'
+    ).encode("utf-8")
+    head = b""
+    for fragment in alternates:
+        encoded = fragment.encode("utf-8") + b","
+        if len(head) + len(encoded) + len(tail) > MAX_DICTIONARY_SIZE:
+            break
+        head = encoded + head
+    return (head + tail)[-MAX_DICTIONARY_SIZE:]
+
+
+def build_registry_dictionary(registry: QuestionBankRegistry) -> bytes:
+    """Dictionary built only from the registry's state keys and typical values."""
+    skeleton = {key: _fragment(key, value) for key, value in _typical_state(registry).items()}
+    return _assemble(registry.fingerprint, skeleton)
+
+
+def train_dictionary(registry: QuestionBankRegistry, states: Iterable[Mapping[str, Any]]) -> bytes:
+    """
+    Dictionary from sample states of one bank version.
+
+    Each key contributes its most common `"key":value` fragment to the payload skeleton;
+    the other fragments seen at least twice fill the remaining space, most common nearest
+    to the skeleton.
+    """
+    counts: dict[str, Counter[str]] = defaultdict(Counter)
+    for state in states:
+        for key, value in state.items():
+            counts[key][_fragment(key, value)] += 1
+
+    skeleton = {key: _fragment(key, value) for key, value in _typical_state(registry).items()}
+    alternates: Counter[str] = Counter()
+    for key, fragments in counts.items():
+        ranked = fragments.most_common()
+        skeleton[key] = ranked[0][0]
+        alternates.update({fragment: count for fragment, count in ranked[1:] if count > 1})
+    return _assemble(registry.fingerprint, skeleton, (fragment for fragment, _ in alternates.most_common()))
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    return zlib.adler32(dictionary)
+
+
+def dictionary_path(fingerprint: str, dictionary: bytes, directory: Path | None = None) -> Path:
+    return (directory or PROFILE_DICTIONARY_DIR) / f"{fingerprint}.{dictionary_id(dictionary):08x}.zdict"
+
+
+def _manifest_path(directory: Path) -> Path:
+    return directory / "manifest.json"
+
+
+def _read_manifest(directory: Path) -> dict[str, list[str]]:
+    """Dictionary ids of each bank version in the order they were saved; the last one is preferred."""
+    path = _manifest_path(directory)
+    if not path.is_file():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    # A private temporary file per writer, so concurrent runs never share a temp path.
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as handle:
+        handle.write(data)
+    os.replace(handle.name, path)
+
+
+def save_dictionary(fingerprint: str, dictionary: bytes, directory: Path | None = None) -> Path:
+    """Store `dictionary` for a bank version and list it last in the manifest, making it the one new strings use."""
+    directory = directory or PROFILE_DICTIONARY_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    path = dictionary_path(fingerprint, dictionary, directory)
+    if not path.exists():
+        _write_atomically(path, dictionary)
+
+    saved_id = f"{dictionary_id(dictionary):08x}"
+    manifest = _read_manifest(directory)
+    manifest[fingerprint] = [saved for saved in manifest.get(fingerprint, []) if saved != saved_id] + [saved_id]
+    _write_atomically(_manifest_path(directory), (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    profile_dictionaries.cache_clear()
+    return path
+
+
+@lru_cache(maxsize=16)
+def profile_dictionaries(fingerprint: str) -> tuple[bytes, ...]:
+    """
+    Committed dictionaries of a bank version, the one new strings should use first; empty if none
+    is listed in the manifest. Files missing from the manifest still decode, after the listed ones.
+    """
+    listed = [
+        PROFILE_DICTIONARY_DIR / f"{fingerprint}.{saved_id}.zdict"
+        for saved_id in _read_manifest(PROFILE_DICTIONARY_DIR).get(fingerprint, [])
+    ]
+    if not listed:
+        return ()
+    unlisted = sorted(set(PROFILE_DICTIONARY_DIR.glob(f"{fingerprint}.*.zdict")) - set(listed))
+    return tuple(path.read_bytes() for path in [*reversed(listed), *unlisted])
+
+
+def compress(data: bytes, dictionary: bytes) -> bytes:
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=dictionary)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(stream: bytes, dictionaries: Iterable[bytes]) -> bytes:
+    """Inflate a zlib stream with whichever of `dictionaries` its header names."""
+    if len(stream) < 6 or not stream[1] & _FDICT:
+        raise ValueError("zlib stream does not use a preset dictionary.")
+    wanted = int.from_bytes(stream[2:6], "big")
+    for dictionary in dictionaries:
+        if dictionary_id(dictionary) == wanted:
+            decompressor = zlib.decompressobj(zdict=dictionary)
+            data = decompressor.decompress(stream) + decompressor.flush()
+            if not decompressor.eof:
+                raise ValueError("zlib stream is truncated.")
+            return data
+    raise ValueError(f"Unknown profile dictionary {wanted:08x}.")
+
+
+def _canonical(raw_payload: Mapping[str, Any]) -> bytes:
+    return json.dumps(raw_payload, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _measure(samples: list[bytes], dictionary: bytes | None) -> tuple[float, float, float]:
+    """Average compressed size and per-payload encode / decode microseconds."""
+    started = time.perf_counter()
+    if dictionary is None:
+        streams = [zlib.compress(sample, COMPRESSION_LEVEL) for sample in samples]
+    else:
+        streams = [compress(sample, dictionary) for sample in samples]
+    encode_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for stream in streams:
+        if dictionary is None:
+            zlib.decompress(stream)
+        else:
+            decompress(stream, (dictionary,))
+    decode_seconds = time.perf_counter() - started
+
+    count = len(samples)
+    return sum(map(len, streams)) / count, encode_seconds / count * 1e6, decode_seconds / count * 1e6
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Train zlib preset dictionaries from exported profile payloads.")
+    parser.add_argument(
+        "samples",
+        type=Path,
+        nargs="?",
+        help="NDJSON file of ProfileCodec JSON payloads; without it the current registry's generated dictionary is saved.",
+    )
+    parser.add_argument("--output-dir", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    if args.samples is None:
+        registry = get_question_bank_registry()
+        path = save_dictionary(registry.fingerprint, build_registry_dictionary(registry), args.output_dir)
+        print(f"{registry.fingerprint}: saved the generated dictionary to {path}")
+        return 0
+
+    payloads: dict[str, list[Mapping[str, Any]]] = defaultdict(list)
+    with args.samples.open(encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                raw_payload = json.loads(line)
+                payloads[str(raw_payload.get("bank_fingerprint"))].append(raw_payload)
+
+    for fingerprint, raw_payloads in sorted(payloads.items()):
+        registry = find_registry(fingerprint)
+        if registry is None:
+            print(f"{fingerprint}: skipped {len(raw_payloads)} payloads from an unknown bank version.")
+            continue
+        dictionary = train_dictionary(registry, (raw_payload["state"] for raw_payload in raw_payloads))
+        path = save_dictionary(fingerprint, dictionary, args.output_dir)
+
+        samples = [_canonical(raw_payload) for raw_payload in raw_payloads]
+        print(f"{fingerprint}: {len(samples)} payloads, wrote {path} ({len(dictionary)} bytes)")
+        for label, candidate in (
+            ("zlib", None),
+            ("registry dictionary", build_registry_dictionary(registry)),
+            ("trained dictionary", dictionary),
+        ):
+            size, encode_us, decode_us = _measure(samples, candidate)
+            print(f"  {label:<20} {size:8.1f} bytes  encode {encode_us:7.1f} us  decode {decode_us:7.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
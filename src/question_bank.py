@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
 import hashlib
 import json
-from typing import Any, Mapping
+from typing import Any, Callable, Mapping
 
 from src.question_bank_blueprints import get_question_bank_blueprint
 
@@ -17,6 +18,7 @@ QUESTION_STATE_PREFIXES = {
     "provision": "provision_q",
     "calibration": "calibration_q",
 }
+QUESTION_BANK_MODULES = ("needs", "shadow", "eros", "provision", "calibration")
 QUESTION_RESPONSE_TYPES = {"single_choice", "best_worst"}
 NEEDS_QUESTION_FAMILIES = {"absolute", "priority"}
 
@@ -42,15 +44,28 @@ class QuestionItem:
     response_type: str = "single_choice"
     family: str | None = None
     dimension: str | None = None
+    _option_ids: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    _option_positions: dict[str, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        option_ids = tuple(option.id for option in self.options)
+        object.__setattr__(self, "_option_ids", option_ids)
+        object.__setattr__(self, "_option_positions", {option_id: index for index, option_id in enumerate(option_ids)})
 
     def option_ids(self) -> tuple[str, ...]:
-        return tuple(option.id for option in self.options)
+        return self._option_ids
+
+    def has_option(self, option_id: object) -> bool:
+        return isinstance(option_id, str) and option_id in self._option_positions
+
+    def option_position(self, option_id: str) -> int:
+        try:
+            return self._option_positions[option_id]
+        except KeyError:
+            raise KeyError(f"Unknown option id '{option_id}' for question '{self.id}'.") from None
 
     def get_option(self, option_id: str) -> QuestionOption:
-        for option in self.options:
-            if option.id == option_id:
-                return option
-        raise KeyError(f"Unknown option id '{option_id}' for question '{self.id}'.")
+        return self.options[self.option_position(option_id)]
 
     @property
     def is_best_worst(self) -> bool:
@@ -81,11 +96,95 @@ class QuestionBankMetadata:
     vector_labels: tuple[str, ...]
 
 
+@dataclass(frozen=True)
+class CompiledQuestionBank:
+    """Index-backed view of a bank's questions, built once per loaded bank.
+
+    `vectors` stores every option vector row-major in one contiguous float64
+    buffer; rows for question `i` span `offsets[i]:offsets[i + 1]`.
+    """
+
+    vector_size: int
+    question_positions: dict[str, int]
+    dominant_dimensions: tuple[tuple[int, ...], ...]
+    vectors: array
+    offsets: tuple[int, ...]
+    min_vector: tuple[float, ...]
+    max_vector: tuple[float, ...]
+
+    @classmethod
+    def build(cls, questions: tuple[QuestionItem, ...], vector_size: int) -> "CompiledQuestionBank":
+        vectors = array("d")
+        offsets = [0]
+        dominant_dimensions: list[tuple[int, ...]] = []
+        mins = [0.0] * vector_size
+        maxes = [0.0] * vector_size
+        for question in questions:
+            for option in question.options:
+                vectors.extend(option.vector)
+            offsets.append(offsets[-1] + len(question.options))
+            dominant_dimensions.append(
+                tuple(
+                    max(range(vector_size), key=lambda index: option.vector[index])
+                    for option in question.options
+                )
+            )
+            for index in range(vector_size):
+                mins[index] += min(option.vector[index] for option in question.options)
+                maxes[index] += max(option.vector[index] for option in question.options)
+
+        return cls(
+            vector_size=vector_size,
+            question_positions={question.id: index for index, question in enumerate(questions)},
+            dominant_dimensions=tuple(dominant_dimensions),
+            vectors=vectors,
+            offsets=tuple(offsets),
+            min_vector=tuple(mins),
+            max_vector=tuple(maxes),
+        )
+
+    @property
+    def option_count(self) -> int:
+        return self.offsets[-1]
+
+    def option_counts(self) -> tuple[int, ...]:
+        return tuple(end - start for start, end in zip(self.offsets, self.offsets[1:]))
+
+
 @dataclass(frozen=True)
 class QuestionBank:
     metadata: QuestionBankMetadata
     questions: tuple[QuestionItem, ...]
     fingerprint: str
+    compiled: CompiledQuestionBank | None = field(default=None, repr=False, compare=False)
+    _state_keys: tuple[tuple[str, ...], ...] = field(init=False, repr=False, compare=False)
+    _mode_views: dict[str, "QuestionBank"] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.compiled is None:
+            object.__setattr__(self, "compiled", CompiledQuestionBank.build(self.questions, self.vector_size))
+        object.__setattr__(self, "_state_keys", self._build_state_keys())
+
+        # Mode views are built once here; the simple view contains only simple questions,
+        # so building its own views stops at itself.
+        simple_questions = tuple(question for question in self.questions if question.mode == "simple")
+        if len(simple_questions) == len(self.questions):
+            simple_view = self
+        else:
+            simple_view = QuestionBank(metadata=self.metadata, questions=simple_questions, fingerprint=self.fingerprint)
+        object.__setattr__(self, "_mode_views", {"simple": simple_view, "extended": self, "full": self})
+
+    def _build_state_keys(self) -> tuple[tuple[str, ...], ...]:
+        if self.module not in QUESTION_STATE_PREFIXES:
+            return ()
+        return tuple(
+            (
+                (question_state_key(self.module, question.id, "best"), question_state_key(self.module, question.id, "worst"))
+                if question.is_best_worst
+                else (question_state_key(self.module, question.id),)
+            )
+            for question in self.questions
+        )
 
     @property
     def module(self) -> str:
@@ -96,38 +195,31 @@ class QuestionBank:
         return len(self.metadata.vector_labels)
 
     def question_ids(self) -> tuple[str, ...]:
-        return tuple(question.id for question in self.questions)
+        return tuple(self.compiled.question_positions)
 
     def get_question(self, question_id: str) -> QuestionItem:
-        for question in self.questions:
-            if question.id == question_id:
-                return question
-        raise KeyError(f"Unknown question id '{question_id}' in module '{self.module}'.")
+        position = self.compiled.question_positions.get(question_id)
+        if position is None:
+            raise KeyError(f"Unknown question id '{question_id}' in module '{self.module}'.")
+        return self.questions[position]
 
     def min_vector(self) -> tuple[float, ...]:
-        mins = [0.0] * self.vector_size
-        for question in self.questions:
-            for index in range(self.vector_size):
-                mins[index] += min(option.vector[index] for option in question.options)
-        return tuple(mins)
+        return self.compiled.min_vector
 
     def max_vector(self) -> tuple[float, ...]:
-        maxes = [0.0] * self.vector_size
-        for question in self.questions:
-            for index in range(self.vector_size):
-                maxes[index] += max(option.vector[index] for option in question.options)
-        return tuple(maxes)
+        return self.compiled.max_vector
+
+    def state_keys(self) -> tuple[tuple[str, ...], ...]:
+        """Session-state keys per question: `(key,)` for single choice, `(best_key, worst_key)` for best/worst."""
+        if self.module not in QUESTION_STATE_PREFIXES:
+            raise KeyError(self.module)
+        return self._state_keys
 
     def for_mode(self, mode: str) -> "QuestionBank":
-        if mode not in {"simple", "extended", "full"}:
+        view = self._mode_views.get(mode)
+        if view is None:
             raise QuestionBankValidationError(f"Unsupported questionnaire mode '{mode}'.")
-        if mode in {"extended", "full"}:
-            return self
-        return QuestionBank(
-            metadata=self.metadata,
-            questions=tuple(question for question in self.questions if question.mode == "simple"),
-            fingerprint=self.fingerprint,
-        )
+        return view
 
 
 @dataclass(frozen=True)
@@ -323,7 +415,13 @@ def load_question_bank_from_payload(raw_bank: Mapping[str, Any]) -> QuestionBank
         )
 
     fingerprint = _compute_fingerprint(raw_bank)
-    return QuestionBank(metadata=metadata, questions=tuple(questions), fingerprint=fingerprint)
+    compiled_questions = tuple(questions)
+    return QuestionBank(
+        metadata=metadata,
+        questions=compiled_questions,
+        fingerprint=fingerprint,
+        compiled=CompiledQuestionBank.build(compiled_questions, len(vector_labels)),
+    )
 
 
 def load_question_bank_from_path(path: Path) -> QuestionBank:
@@ -344,12 +442,7 @@ def load_question_bank(module: str) -> QuestionBank:
     return bank
 
 
-@lru_cache(maxsize=1)
-def get_question_bank_registry() -> QuestionBankRegistry:
-    banks = {
-        module: load_question_bank(module)
-        for module in ("needs", "shadow", "eros", "provision", "calibration")
-    }
+def build_question_bank_registry(banks: Mapping[str, QuestionBank]) -> QuestionBankRegistry:
     payload = {
         module: {
             "bank_id": bank.metadata.bank_id,
@@ -358,4 +451,30 @@ def get_question_bank_registry() -> QuestionBankRegistry:
         }
         for module, bank in banks.items()
     }
-    return QuestionBankRegistry(banks=banks, fingerprint=_compute_fingerprint(payload))
+    return QuestionBankRegistry(banks=dict(banks), fingerprint=_compute_fingerprint(payload))
+
+
+_registry_provider: Callable[[], QuestionBankRegistry] | None = None
+
+
+def set_question_bank_registry_provider(provider: Callable[[], QuestionBankRegistry] | None) -> None:
+    """Route `get_question_bank_registry()` through `provider`, or back to the cached default when None."""
+    global _registry_provider
+    _registry_provider = provider
+
+
+def get_question_bank_registry() -> QuestionBankRegistry:
+    if _registry_provider is not None:
+        return _registry_provider()
+    return _load_default_question_bank_registry()
+
+
+@lru_cache(maxsize=1)
+def _load_default_question_bank_registry() -> QuestionBankRegistry:
+    # Imported lazily because the artifact module builds on top of this one.
+    from src.question_bank_artifact import load_registry_artifact
+
+    registry = load_registry_artifact()
+    if registry is not None:
+        return registry
+    return build_question_bank_registry({module: load_question_bank(module) for module in QUESTION_BANK_MODULES})
@@ -0,0 +1,299 @@
+"""
+Precompiled binary form of the question bank registry.
+
+The JSON banks stay the source of truth. `build_registry_artifact` validates them
+once and writes a single versioned file; workers then load that file at start-up
+instead of re-parsing, re-validating and re-fingerprinting every bank. The file
+embeds the sha256 of each source JSON, so an edited bank silently falls back to
+the JSON path until the artifact is rebuilt.
+
+Layout (all sections 8-byte aligned so the file can be memory-mapped):
+    header   struct `_HEADER`
+    strings  utf-8 blob of interned strings joined by NUL
+    records  int32 stream describing registry -> banks -> questions -> options
+    vectors  per bank: float64 option vectors in question / option order,
+             followed by the bank's min and max vectors
+"""
+
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from typing import Iterator, Sequence
+
+from src.question_bank import (
+    QUESTION_BANK_DIR,
+    CompiledQuestionBank,
+    QUESTION_BANK_MODULES,
+    QuestionBank,
+    QuestionBankMetadata,
+    QuestionBankRegistry,
+    QuestionBankValidationError,
+    QuestionItem,
+    QuestionOption,
+    build_question_bank_registry,
+    load_question_bank_from_payload,
+)
+
+ARTIFACT_PATH = QUESTION_BANK_DIR / "registry.bin"
+ARTIFACT_MAGIC = b"CRQB"
+ARTIFACT_FORMAT_VERSION = 1
+
+# magic, format version, byte order flag, string blob size, record count, vector value count
+_HEADER = struct.Struct("<4sHHQQQ")
+_NO_STRING = -1
+_BYTE_ORDER_FLAG = 1 if sys.byteorder == "little" else 2
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._positions: dict[str, int] = {}
+
+    def intern(self, value: str | None) -> int:
+        if value is None:
+            return _NO_STRING
+        if "\x00" in value:
+            raise QuestionBankValidationError("Question bank strings must not contain NUL characters.")
+        position = self._positions.get(value)
+        if position is None:
+            position = len(self.strings)
+            self._positions[value] = position
+            self.strings.append(value)
+        return position
+
+
+def _source_path(source_dir: Path, module: str) -> Path:
+    return source_dir / f"{module}.json"
+
+
+def _source_digest(raw_bytes: bytes) -> str:
+    return hashlib.sha256(raw_bytes).hexdigest()
+
+
+def _pad(size: int) -> bytes:
+    return b"\x00" * (-size % 8)
+
+
+def build_registry_artifact(
+    path: Path = ARTIFACT_PATH,
+    *,
+    source_dir: Path = QUESTION_BANK_DIR,
+    modules: Sequence[str] = QUESTION_BANK_MODULES,
+) -> QuestionBankRegistry:
+    """Validate the JSON banks in `source_dir` and write them to one binary artifact."""
+    strings = _StringTable()
+    records = array("i")
+    vectors = array("d")
+    banks: dict[str, QuestionBank] = {}
+
+    records.append(len(modules))
+    for module in modules:
+        source_path = _source_path(source_dir, module)
+        raw_bytes = source_path.read_bytes()
+        bank = load_question_bank_from_payload(json.loads(raw_bytes.decode("utf-8")))
+        if bank.module != module:
+            raise QuestionBankValidationError(
+                f"Bank file '{source_path.name}' declares module '{bank.module}' instead of '{module}'."
+            )
+        banks[module] = bank
+
+        metadata = bank.metadata
+        records.extend(
+            (
+                strings.intern(module),
+                strings.intern(_source_digest(raw_bytes)),
+                strings.intern(bank.fingerprint),
+                strings.intern(metadata.bank_id),
+                strings.intern(metadata.version),
+                strings.intern(metadata.authoring_instructions),
+                len(metadata.vector_labels),
+            )
+        )
+        records.extend(strings.intern(label) for label in metadata.vector_labels)
+        records.append(len(bank.questions))
+        for position, question in enumerate(bank.questions):
+            records.extend(
+                (
+                    strings.intern(question.id),
+                    strings.intern(question.question),
+                    strings.intern(question.description),
+                    strings.intern(question.mode),
+                    strings.intern(question.response_type),
+                    strings.intern(question.family),
+                    strings.intern(question.dimension),
+                    len(question.options),
+                )
+            )
+            for option, dominant_dimension in zip(question.options, bank.compiled.dominant_dimensions[position]):
+                records.extend((strings.intern(option.id), strings.intern(option.text), dominant_dimension))
+        vectors.extend(bank.compiled.vectors)
+        vectors.extend(bank.compiled.min_vector)
+        vectors.extend(bank.compiled.max_vector)
+
+    string_blob = "\x00".join(strings.strings).encode("utf-8")
+    header = _HEADER.pack(
+        ARTIFACT_MAGIC,
+        ARTIFACT_FORMAT_VERSION,
+        _BYTE_ORDER_FLAG,
+        len(string_blob),
+        len(records),
+        len(vectors),
+    )
+    record_bytes = records.tobytes()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_suffix(path.suffix + ".tmp")
+    with temporary_path.open("wb") as handle:
+        handle.write(header)
+        handle.write(_pad(len(header)))
+        handle.write(string_blob)
+        handle.write(_pad(len(string_blob)))
+        handle.write(record_bytes)
+        handle.write(_pad(len(record_bytes)))
+        handle.write(vectors.tobytes())
+    temporary_path.replace(path)
+    return build_question_bank_registry(banks)
+
+
+def load_registry_artifact(
+    path: Path = ARTIFACT_PATH,
+    *,
+    source_dir: Path = QUESTION_BANK_DIR,
+    modules: Sequence[str] = QUESTION_BANK_MODULES,
+) -> QuestionBankRegistry | None:
+    """Load a registry from `path`, or return None when the artifact is missing or stale."""
+    try:
+        with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            banks = _read_artifact(mapped, source_dir)
+    except (OSError, ValueError, TypeError, struct.error, IndexError, StopIteration, UnicodeDecodeError):
+        return None
+
+    if banks is None or tuple(banks) != tuple(modules):
+        return None
+    return build_question_bank_registry(banks)
+
+
+def _read_artifact(mapped: mmap.mmap, source_dir: Path) -> dict[str, QuestionBank] | None:
+    magic, version, byte_order, string_size, record_count, vector_count = _HEADER.unpack_from(mapped)
+    if magic != ARTIFACT_MAGIC or version != ARTIFACT_FORMAT_VERSION or byte_order != _BYTE_ORDER_FLAG:
+        return None
+
+    string_start = _HEADER.size + len(_pad(_HEADER.size))
+    record_start = string_start + string_size + len(_pad(string_size))
+    vector_start = record_start + record_count * 4 + len(_pad(record_count * 4))
+    vector_end = vector_start + vector_count * 8
+    if vector_end > len(mapped):
+        return None
+
+    strings = mapped[string_start : string_start + string_size].decode("utf-8").split("\x00")
+    with memoryview(mapped) as buffer, \
+            buffer[record_start : record_start + record_count * 4].cast("i") as records, \
+            buffer[vector_start:vector_end].cast("d") as vectors:
+        return _read_banks(iter(records), vectors, strings, source_dir)
+
+
+def _read_banks(
+    records: Iterator[int],
+    vectors: memoryview,
+    strings: list[str],
+    source_dir: Path,
+) -> dict[str, QuestionBank] | None:
+    def text(position: int) -> str | None:
+        return None if position == _NO_STRING else strings[position]
+
+    banks: dict[str, QuestionBank] = {}
+    vector_cursor = 0
+    for _ in range(next(records)):
+        module = strings[next(records)]
+        source_digest = strings[next(records)]
+        source_path = _source_path(source_dir, module)
+        if not source_path.exists() or _source_digest(source_path.read_bytes()) != source_digest:
+            return None
+
+        fingerprint = strings[next(records)]
+        bank_id = strings[next(records)]
+        version = strings[next(records)]
+        authoring_instructions = strings[next(records)]
+        vector_labels = tuple([strings[next(records)] for _ in range(next(records))])
+        vector_size = len(vector_labels)
+
+        bank_vector_start = vector_cursor
+        questions: list[QuestionItem] = []
+        dominant_dimensions: list[tuple[int, ...]] = []
+        offsets = [0]
+        for _ in range(next(records)):
+            question_id, question_text, description, mode, response_type, family, dimension, option_count = [
+                next(records) for _ in range(8)
+            ]
+            options: list[QuestionOption] = []
+            option_dimensions: list[int] = []
+            for _ in range(option_count):
+                option_id = strings[next(records)]
+                option_text = strings[next(records)]
+                option_dimensions.append(next(records))
+                options.append(
+                    QuestionOption(
+                        id=option_id,
+                        text=option_text,
+                        vector=tuple(vectors[vector_cursor : vector_cursor + vector_size]),
+                    )
+                )
+                vector_cursor += vector_size
+            dominant_dimensions.append(tuple(option_dimensions))
+            offsets.append(offsets[-1] + option_count)
+            questions.append(
+                QuestionItem(
+                    id=strings[question_id],
+                    question=strings[question_text],
+                    description=strings[description],
+                    options=tuple(options),
+                    mode=strings[mode],
+                    response_type=strings[response_type],
+                    family=text(family),
+                    dimension=text(dimension),
+                )
+            )
+
+        bank_vectors = array("d")
+        bank_vectors.frombytes(vectors[bank_vector_start:vector_cursor].tobytes())
+        min_vector = tuple(vectors[vector_cursor : vector_cursor + vector_size])
+        max_vector = tuple(vectors[vector_cursor + vector_size : vector_cursor + 2 * vector_size])
+        vector_cursor += 2 * vector_size
+
+        bank_questions = tuple(questions)
+        banks[module] = QuestionBank(
+            metadata=QuestionBankMetadata(
+                bank_id=bank_id,
+                version=version,
+                module=module,
+                authoring_instructions=authoring_instructions,
+                vector_labels=vector_labels,
+            ),
+            questions=bank_questions,
+            fingerprint=fingerprint,
+            compiled=CompiledQuestionBank(
+                vector_size=vector_size,
+                question_positions={question.id: index for index, question in enumerate(bank_questions)},
+                dominant_dimensions=tuple(dominant_dimensions),
+                vectors=bank_vectors,
+                offsets=tuple(offsets),
+                min_vector=min_vector,
+                max_vector=max_vector,
+            ),
+        )
+    return banks
+
+
+def main() -> None:
+    registry = build_registry_artifact()
+    print(f"Wrote {ARTIFACT_PATH} (registry {registry.fingerprint}, {ARTIFACT_PATH.stat().st_size} bytes).")
+
+
+if __name__ == "__main__":
+    main()
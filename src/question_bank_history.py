@@ -0,0 +1,225 @@
+"""
+Historical question bank versions kept side by side.
+
+Exported profiles carry the registry fingerprint they were answered on. Keeping
+older registries loaded lets those profiles be sanitized and scored against the
+exact bank version instead of being discarded after every content release.
+Unchanged banks and questions are shared between versions, so each extra version
+costs only the questions that actually changed.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Iterable, Mapping, Sequence
+
+from src.question_bank import (
+    QUESTION_BANK_DIR,
+    QUESTION_BANK_MODULES,
+    QuestionBank,
+    QuestionBankRegistry,
+    QuestionBankValidationError,
+    QuestionItem,
+    build_question_bank_registry,
+    get_question_bank_registry,
+    load_question_bank_from_payload,
+)
+
+QUESTION_BANK_HISTORY_DIR = QUESTION_BANK_DIR / "history"
+
+
+class QuestionBankHistory:
+    def __init__(self, registries: Iterable[QuestionBankRegistry] = ()) -> None:
+        self._registries: dict[str, QuestionBankRegistry] = {}
+        self._banks: dict[str, QuestionBank] = {}
+        self._questions: dict[QuestionItem, QuestionItem] = {}
+        for registry in registries:
+            self.add(registry)
+
+    def __contains__(self, fingerprint: object) -> bool:
+        return fingerprint in self._registries
+
+    def __len__(self) -> int:
+        return len(self._registries)
+
+    def fingerprints(self) -> tuple[str, ...]:
+        return tuple(self._registries)
+
+    def add(self, registry: QuestionBankRegistry) -> QuestionBankRegistry:
+        """Store `registry`, sharing banks and questions with versions already kept."""
+        existing = self._registries.get(registry.fingerprint)
+        if existing is not None:
+            return existing
+
+        shared = QuestionBankRegistry(
+            banks={module: self._intern_bank(bank) for module, bank in registry.banks.items()},
+            fingerprint=registry.fingerprint,
+        )
+        self._registries[registry.fingerprint] = shared
+        return shared
+
+    def get(self, fingerprint: str) -> QuestionBankRegistry | None:
+        return self._registries.get(fingerprint)
+
+    def resolve(self, fingerprint: str | None, default: QuestionBankRegistry | None = None) -> QuestionBankRegistry:
+        """Return the registry a profile was answered on, or `default` (the current registry) if unknown."""
+        if fingerprint:
+            registry = self._registries.get(fingerprint)
+            if registry is not None:
+                return registry
+        return default or get_question_bank_registry()
+
+    def _intern_bank(self, bank: QuestionBank) -> QuestionBank:
+        existing = self._banks.get(bank.fingerprint)
+        if existing is not None:
+            return existing
+
+        questions = tuple(self._questions.setdefault(question, question) for question in bank.questions)
+        if all(shared is original for shared, original in zip(questions, bank.questions)):
+            shared_bank = bank
+        else:
+            shared_bank = QuestionBank(metadata=bank.metadata, questions=questions, fingerprint=bank.fingerprint)
+        self._banks[bank.fingerprint] = shared_bank
+        return shared_bank
+
+
+def _snapshot_payload(source_dir: Path, modules: Sequence[str]) -> dict[str, Any]:
+    return {
+        module: json.loads((source_dir / f"{module}.json").read_text(encoding="utf-8"))
+        for module in modules
+    }
+
+
+def _registry_from_snapshot_banks(raw_banks: Mapping[str, Any]) -> QuestionBankRegistry:
+    banks: dict[str, QuestionBank] = {}
+    for module, raw_bank in raw_banks.items():
+        bank = load_question_bank_from_payload(raw_bank)
+        if bank.module != module:
+            raise QuestionBankValidationError(
+                f"Snapshot bank '{module}' declares module '{bank.module}' instead of '{module}'."
+            )
+        banks[module] = bank
+    return build_question_bank_registry(banks)
+
+
+def save_registry_snapshot(
+    history_dir: Path = QUESTION_BANK_HISTORY_DIR,
+    *,
+    source_dir: Path = QUESTION_BANK_DIR,
+    modules: Sequence[str] = QUESTION_BANK_MODULES,
+) -> Path:
+    """Archive the current JSON banks as `<registry fingerprint>.json` in `history_dir`."""
+    return write_registry_snapshot(_snapshot_payload(source_dir, modules), history_dir)
+
+
+def write_registry_snapshot(raw_banks: Mapping[str, Any], history_dir: Path = QUESTION_BANK_HISTORY_DIR) -> Path:
+    """Archive raw bank payloads by module as `<registry fingerprint>.json`; an existing snapshot is kept."""
+    registry = _registry_from_snapshot_banks(raw_banks)
+    path = history_dir / f"{registry.fingerprint}.json"
+    if path.exists():
+        return path
+    history_dir.mkdir(parents=True, exist_ok=True)
+    # A private temporary file per writer, so concurrent archivers never clobber each other's output.
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=history_dir, prefix=f"{registry.fingerprint}.", suffix=".tmp", delete=False
+    ) as handle:
+        handle.write(
+            json.dumps({"registry_fingerprint": registry.fingerprint, "banks": dict(raw_banks)}, ensure_ascii=False)
+            + "\n"
+        )
+    os.replace(handle.name, path)
+    return path
+
+
+def archived_snapshot_path(registry: QuestionBankRegistry, history_dir: Path | None = None) -> Path | None:
+    """
+    The committed snapshot of `registry` in `history_dir`, or None when it has not been archived.
+    Never writes: snapshots are made with `python -m src.question_bank_history` and committed.
+    """
+    history_dir = history_dir or QUESTION_BANK_HISTORY_DIR
+    path = history_dir / f"{registry.fingerprint}.json"
+    if path in _archived:
+        return path
+    if not path.is_file():
+        return None
+    remember_registry(registry)
+    _archived.add(path)
+    return path
+
+
+def load_registry_snapshot(path: Path) -> QuestionBankRegistry:
+    raw_snapshot = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(raw_snapshot, dict) or not isinstance(raw_snapshot.get("banks"), dict):
+        raise QuestionBankValidationError(f"Registry snapshot '{path.name}' must contain a 'banks' object.")
+    registry = _registry_from_snapshot_banks(raw_snapshot["banks"])
+    if registry.fingerprint != raw_snapshot.get("registry_fingerprint"):
+        raise QuestionBankValidationError(
+            f"Registry snapshot '{path.name}' does not match its declared fingerprint."
+        )
+    return registry
+
+
+def load_question_bank_history(
+    history_dir: Path | None = None,
+    current: QuestionBankRegistry | None = None,
+) -> QuestionBankHistory:
+    history_dir = history_dir or QUESTION_BANK_HISTORY_DIR
+    history = QuestionBankHistory()
+    history.add(current or get_question_bank_registry())
+    if history_dir.is_dir():
+        for path in sorted(history_dir.glob("*.json")):
+            history.add(load_registry_snapshot(path))
+    return history
+
+
+_history: QuestionBankHistory | None = None
+_history_lock = threading.Lock()
+_archived: set[Path] = set()
+
+
+def get_question_bank_history() -> QuestionBankHistory:
+    """
+    Process-wide history: the archived snapshots plus every registry that has been
+    current since, so versions swapped out by a hot reload stay resolvable.
+    """
+    return remember_registry(get_question_bank_registry())
+
+
+def remember_registry(registry: QuestionBankRegistry) -> QuestionBankHistory:
+    """Add `registry` to the process-wide history, e.g. when it is activated."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = load_question_bank_history(current=registry)
+        else:
+            _history.add(registry)
+        return _history
+
+
+def reset_question_bank_history() -> None:
+    """Drop the process-wide history so the next lookup reloads the snapshots from disk."""
+    global _history
+    with _history_lock:
+        _history = None
+    _archived.clear()
+
+
+def find_registry(fingerprint: str) -> QuestionBankRegistry | None:
+    """The current or an archived registry with exactly this fingerprint, if any."""
+    current = get_question_bank_registry()
+    if fingerprint == current.fingerprint:
+        return current
+    return get_question_bank_history().get(fingerprint)
+
+
+def main() -> None:
+    path = save_registry_snapshot()
+    print(f"Archived current question banks to {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from src.domain.needs import RelationalNeedsComponent
-from src.domain.psychometrics import PsychometricsComponent
-from src.services.neurodivergence import NeurodivergenceService
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.domain.needs import NEED_KEYS, RelationalNeedsComponent
+from src.domain.psychometrics import FACET_COUNT, FACET_INDEX, PsychometricsComponent
+from src.services.neurodivergence import NeurodivergenceContext, NeurodivergenceService
 
 
 def _clamp(value: float) -> float:
@@ -35,43 +39,90 @@ def calculate_adjusted_score(
     )
 
 
+# (domain, facet, weight, inverted) terms of each OCEAN prediction; inverted terms use 1 - facet.
+OCEAN_PREDICTION_TERMS: dict[str, tuple[tuple[str, str, float, bool], ...]] = {
+    "safety": (
+        ("neuroticism", "anxiety", 0.30, False),
+        ("neuroticism", "vulnerability", 0.25, False),
+        ("neuroticism", "self_consciousness", 0.15, False),
+        ("agreeableness", "trust", 0.20, True),
+        ("conscientiousness", "deliberation", 0.10, False),
+    ),
+    "resource": (
+        ("conscientiousness", "order", 0.35, False),
+        ("conscientiousness", "dutifulness", 0.25, False),
+        ("conscientiousness", "self_discipline", 0.20, True),
+        ("neuroticism", "vulnerability", 0.20, False),
+    ),
+    "resonance": (
+        ("openness", "feelings", 0.25, False),
+        ("openness", "ideas", 0.20, False),
+        ("agreeableness", "tender_mindedness", 0.25, False),
+        ("extraversion", "warmth", 0.20, False),
+        ("agreeableness", "trust", 0.10, False),
+    ),
+    "expansion": (
+        ("openness", "actions", 0.35, False),
+        ("extraversion", "excitement_seeking", 0.30, False),
+        ("conscientiousness", "deliberation", 0.15, True),
+        ("openness", "fantasy", 0.10, False),
+        ("extraversion", "gregariousness", 0.10, False),
+    ),
+}
+
+
+def _predict_from_ocean(psycho: PsychometricsComponent, need: str) -> float:
+    parts = []
+    for domain, facet, weight, inverted in OCEAN_PREDICTION_TERMS[need]:
+        value = getattr(getattr(psycho, domain), facet)
+        parts.append((1.0 - value if inverted else value, weight))
+    return _weighted_mean(parts)
+
+
 def predict_safety_from_ocean(psycho: PsychometricsComponent) -> float:
-    return _weighted_mean([
-        (psycho.neuroticism.anxiety, 0.30),
-        (psycho.neuroticism.vulnerability, 0.25),
-        (psycho.neuroticism.self_consciousness, 0.15),
-        (1.0 - psycho.agreeableness.trust, 0.20),
-        (psycho.conscientiousness.deliberation, 0.10),
-    ])
+    return _predict_from_ocean(psycho, "safety")
 
 
 def predict_resource_from_ocean(psycho: PsychometricsComponent) -> float:
-    return _weighted_mean([
-        (psycho.conscientiousness.order, 0.35),
-        (psycho.conscientiousness.dutifulness, 0.25),
-        (1.0 - psycho.conscientiousness.self_discipline, 0.20),
-        (psycho.neuroticism.vulnerability, 0.20),
-    ])
+    return _predict_from_ocean(psycho, "resource")
 
 
 def predict_resonance_from_ocean(psycho: PsychometricsComponent) -> float:
-    return _weighted_mean([
-        (psycho.openness.feelings, 0.25),
-        (psycho.openness.ideas, 0.20),
-        (psycho.agreeableness.tender_mindedness, 0.25),
-        (psycho.extraversion.warmth, 0.20),
-        (psycho.agreeableness.trust, 0.10),
-    ])
+    return _predict_from_ocean(psycho, "resonance")
 
 
 def predict_expansion_from_ocean(psycho: PsychometricsComponent) -> float:
-    return _weighted_mean([
-        (psycho.openness.actions, 0.35),
-        (psycho.extraversion.excitement_seeking, 0.30),
-        (1.0 - psycho.conscientiousness.deliberation, 0.15),
-        (psycho.openness.fantasy, 0.10),
-        (psycho.extraversion.gregariousness, 0.10),
-    ])
+    return _predict_from_ocean(psycho, "expansion")
+
+
+def _ocean_prediction_matrix() -> tuple[np.ndarray, np.ndarray]:
+    """`facets @ weights + offsets` reproduces the four `predict_*_from_ocean` values."""
+    weights = np.zeros((FACET_COUNT, len(NEED_KEYS)))
+    offsets = np.zeros(len(NEED_KEYS))
+    for column, need in enumerate(NEED_KEYS):
+        terms = OCEAN_PREDICTION_TERMS[need]
+        total_weight = sum(weight for _, _, weight, _ in terms)
+        for domain, facet, weight, inverted in terms:
+            share = weight / total_weight
+            weights[FACET_INDEX[(domain, facet)], column] += -share if inverted else share
+            offsets[column] += share if inverted else 0.0
+    return weights, offsets
+
+
+OCEAN_WEIGHTS, OCEAN_OFFSETS = _ocean_prediction_matrix()
+CONFIDENCE_LABELS = np.array(["High", "Medium", "Mixed", "Low"])
+# Smallest direct vs. OCEAN disagreement for each label, strictest first; below all of them it is "High".
+DISAGREEMENT_THRESHOLDS: tuple[tuple[str, float], ...] = (("Mixed", 0.40), ("Medium", 0.25))
+
+
+@dataclass(frozen=True)
+class AdjustedNeedsBatch:
+    """Columns follow `NEED_KEYS`; `confidence` holds the same labels as `confidence_from_alignment`."""
+
+    adjusted: np.ndarray
+    predictions: np.ndarray
+    confidence: np.ndarray
+    critical_contradiction: np.ndarray
 
 
 def confidence_from_alignment(
@@ -82,13 +133,20 @@ def confidence_from_alignment(
     disagreement = abs(direct_score - ocean_prediction)
     if calibration_flags.get("critical_contradiction"):
         return "Low"
-    if disagreement >= 0.40:
-        return "Mixed"
-    if disagreement >= 0.25:
-        return "Medium"
+    for label, threshold in DISAGREEMENT_THRESHOLDS:
+        if disagreement >= threshold:
+            return label
     return "High"
 
 
+def confidence_codes(disagreement: np.ndarray) -> np.ndarray:
+    """`CONFIDENCE_LABELS` indices of `confidence_from_alignment` without a critical contradiction."""
+    codes = np.zeros(np.shape(disagreement), dtype=np.int64)
+    for label, threshold in reversed(DISAGREEMENT_THRESHOLDS):
+        codes[disagreement >= threshold] = CONFIDENCE_LABELS.tolist().index(label)
+    return codes
+
+
 class NeedsAdjustmentService:
     @staticmethod
     def adjust_needs(
@@ -96,6 +154,7 @@ class NeedsAdjustmentService:
         psycho: PsychometricsComponent,
         calibration_scores: dict[str, float] | None = None,
         calibration_notes: list[str] | None = None,
+        context: NeurodivergenceContext | None = None,
     ) -> RelationalNeedsComponent:
         """
         Adjusts already-normalized SRME scores using detailed Big Five facets.
@@ -110,7 +169,7 @@ class NeedsAdjustmentService:
             priority_resonance=raw_needs.priority_resonance,
             priority_expansion=raw_needs.priority_expansion,
         )
-        context = NeurodivergenceService.analyze(psycho)
+        context = context or NeurodivergenceService.analyze(psycho)
 
         # 1. Compute predictions
         pred_safety = predict_safety_from_ocean(psycho)
@@ -178,3 +237,42 @@ class NeedsAdjustmentService:
         )
 
         return adjusted
+
+    @staticmethod
+    def adjust_needs_batch(
+        facets: np.ndarray,
+        has_adhd: np.ndarray,
+        has_asd: np.ndarray,
+        raw_needs: np.ndarray,
+        priorities: np.ndarray | None = None,
+        need_vs_priority: np.ndarray | None = None,
+    ) -> AdjustedNeedsBatch:
+        """
+        `adjust_needs` for N profiles at once.
+
+        `facets` is N x 30 in `FACET_INDEX` order, `raw_needs` and `priorities` are N x 4
+        in `NEED_KEYS` order, `need_vs_priority` is the optional calibration score per row.
+        Calibration notes are text and stay with the per-profile `adjust_needs`.
+        """
+        facets = np.asarray(facets, dtype=np.float64).reshape(-1, FACET_COUNT)
+        raw = np.clip(np.asarray(raw_needs, dtype=np.float64).reshape(-1, len(NEED_KEYS)), 0.0, 1.0)
+        predictions = facets @ OCEAN_WEIGHTS + OCEAN_OFFSETS
+        targets = NeurodivergenceService.targets_batch(facets, has_adhd, has_asd)
+        adjusted = np.clip(raw * 0.70 + predictions * 0.20 + targets * 0.10, 0.0, 1.0)
+
+        critical = np.zeros(raw.shape[0], dtype=bool)
+        if need_vs_priority is not None:
+            critical |= np.asarray(need_vs_priority, dtype=np.float64) >= 0.6
+        if priorities is not None:
+            priorities = np.asarray(priorities, dtype=np.float64).reshape(raw.shape)
+            critical |= (((raw >= 0.7) & (priorities <= -1.5)) | ((raw <= 0.3) & (priorities >= 1.5))).any(axis=1)
+
+        disagreement = np.abs(raw - predictions)
+        codes = confidence_codes(disagreement)
+        codes[critical] = 3
+        return AdjustedNeedsBatch(
+            adjusted=adjusted,
+            predictions=predictions,
+            confidence=CONFIDENCE_LABELS[codes],
+            critical_contradiction=critical,
+        )
@@ -0,0 +1,86 @@
+"""
+Big Five facet catalogue: the 30 facets with their PDF labels and session keys.
+
+Kept apart from `bigfive_pdf_parser` so scoring, packing and codec code can use the
+session keys without loading the PDF parser.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class BigFiveFacetSpec:
+    domain: str
+    attr_name: str
+    label_uk: str
+    session_key: str
+
+    @property
+    def index(self) -> int:
+        """Position of the facet in `PsychometricsComponent.facet_values()` / `CompactPsychometrics`."""
+        from src.domain.psychometrics import FACET_INDEX
+
+        return FACET_INDEX[(self.domain, self.attr_name)]
+
+
+FACET_SPECS: tuple[BigFiveFacetSpec, ...] = (
+    BigFiveFacetSpec("neuroticism", "anxiety", "Тривога", "facet_neur_anxiety"),
+    BigFiveFacetSpec("neuroticism", "hostility", "Злість", "facet_neur_hostility"),
+    BigFiveFacetSpec("neuroticism", "depression", "Депресія", "facet_neur_depression"),
+    BigFiveFacetSpec("neuroticism", "self_consciousness", "Сором'язливість", "facet_neur_self_consciousness"),
+    BigFiveFacetSpec("neuroticism", "impulsiveness", "Невгамовність", "facet_neur_impulsiveness"),
+    BigFiveFacetSpec("neuroticism", "vulnerability", "Вразливість", "facet_neur_vulnerability"),
+    BigFiveFacetSpec("extraversion", "warmth", "Дружелюбність", "facet_extr_warmth"),
+    BigFiveFacetSpec("extraversion", "gregariousness", "Компанійськість", "facet_extr_gregariousness"),
+    BigFiveFacetSpec("extraversion", "assertiveness", "Наполегливість", "facet_extr_assertiveness"),
+    BigFiveFacetSpec("extraversion", "activity", "Рівень активності", "facet_extr_activity"),
+    BigFiveFacetSpec("extraversion", "excitement_seeking", "Пошук збуджень", "facet_extr_excitement_seeking"),
+    BigFiveFacetSpec("extraversion", "positive_emotions", "Життєрадісність", "facet_extr_positive_emotions"),
+    BigFiveFacetSpec("openness", "fantasy", "Уява", "facet_open_fantasy"),
+    BigFiveFacetSpec("openness", "aesthetics", "Художні інтереси", "facet_open_aesthetics"),
+    BigFiveFacetSpec("openness", "feelings", "Емоційність", "facet_open_feelings"),
+    BigFiveFacetSpec("openness", "actions", "Пригодницькість", "facet_open_actions"),
+    BigFiveFacetSpec("openness", "ideas", "Інтелект", "facet_open_ideas"),
+    BigFiveFacetSpec("openness", "values", "Лібералізм", "facet_open_values"),
+    BigFiveFacetSpec("agreeableness", "trust", "Довіра", "facet_agre_trust"),
+    BigFiveFacetSpec("agreeableness", "straightforwardness", "Моральність", "facet_agre_straightforwardness"),
+    BigFiveFacetSpec("agreeableness", "altruism", "Альтруїзм", "facet_agre_altruism"),
+    BigFiveFacetSpec("agreeableness", "compliance", "Співпраця", "facet_agre_compliance"),
+    BigFiveFacetSpec("agreeableness", "modesty", "Скромність", "facet_agre_modesty"),
+    BigFiveFacetSpec("agreeableness", "tender_mindedness", "Співчуття", "facet_agre_tender_mindedness"),
+    BigFiveFacetSpec("conscientiousness", "competence", "Самоефективність", "facet_cons_competence"),
+    BigFiveFacetSpec("conscientiousness", "order", "Організованість", "facet_cons_order"),
+    BigFiveFacetSpec("conscientiousness", "dutifulness", "Відповідальність", "facet_cons_dutifulness"),
+    BigFiveFacetSpec("conscientiousness", "achievement", "Прагнення до досягнень", "facet_cons_achievement"),
+    BigFiveFacetSpec("conscientiousness", "self_discipline", "Самодисципліна", "facet_cons_self_discipline"),
+    BigFiveFacetSpec("conscientiousness", "deliberation", "Обачність", "facet_cons_deliberation"),
+)
+
+HIGH_LEVEL_SESSION_KEYS = {
+    "openness": "psycho_o",
+    "conscientiousness": "psycho_c",
+    "extraversion": "psycho_e",
+    "agreeableness": "psycho_a",
+    "neuroticism": "psycho_n",
+}
+
+
+@dataclass(frozen=True)
+class ParsedBigFiveFacets:
+    raw_scores: dict[str, int]
+
+    @property
+    def normalized_scores(self) -> dict[str, float]:
+        return {key: value / 20.0 for key, value in self.raw_scores.items()}
+
+    @property
+    def high_level_scores(self) -> dict[str, int]:
+        scores: dict[str, list[int]] = {domain: [] for domain in HIGH_LEVEL_SESSION_KEYS}
+        for spec in FACET_SPECS:
+            scores[spec.domain].append(self.raw_scores[spec.session_key])
+        return {
+            HIGH_LEVEL_SESSION_KEYS[domain]: round((sum(values) / len(values)) * 5)
+            for domain, values in scores.items()
+        }
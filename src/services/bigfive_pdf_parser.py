@@ -3,132 +3,214 @@ from __future__ import annotations
 from dataclasses import dataclass
 from io import BytesIO
 import re
+import time
 import unicodedata
 
+from src.services.bigfive_facets import (  # noqa: F401 - re-exported for existing imports
+    FACET_SPECS,
+    HIGH_LEVEL_SESSION_KEYS,
+    BigFiveFacetSpec,
+    ParsedBigFiveFacets,
+)
+
 
 class BigFivePdfParseError(ValueError):
     """Raised when a Big Five PDF cannot be converted into all 30 facet scores."""
 
 
-@dataclass(frozen=True)
-class BigFiveFacetSpec:
-    domain: str
-    attr_name: str
-    label_uk: str
-    session_key: str
-
-
-FACET_SPECS: tuple[BigFiveFacetSpec, ...] = (
-    BigFiveFacetSpec("neuroticism", "anxiety", "Тривога", "facet_neur_anxiety"),
-    BigFiveFacetSpec("neuroticism", "hostility", "Злість", "facet_neur_hostility"),
-    BigFiveFacetSpec("neuroticism", "depression", "Депресія", "facet_neur_depression"),
-    BigFiveFacetSpec("neuroticism", "self_consciousness", "Сором'язливість", "facet_neur_self_consciousness"),
-    BigFiveFacetSpec("neuroticism", "impulsiveness", "Невгамовність", "facet_neur_impulsiveness"),
-    BigFiveFacetSpec("neuroticism", "vulnerability", "Вразливість", "facet_neur_vulnerability"),
-    BigFiveFacetSpec("extraversion", "warmth", "Дружелюбність", "facet_extr_warmth"),
-    BigFiveFacetSpec("extraversion", "gregariousness", "Компанійськість", "facet_extr_gregariousness"),
-    BigFiveFacetSpec("extraversion", "assertiveness", "Наполегливість", "facet_extr_assertiveness"),
-    BigFiveFacetSpec("extraversion", "activity", "Рівень активності", "facet_extr_activity"),
-    BigFiveFacetSpec("extraversion", "excitement_seeking", "Пошук збуджень", "facet_extr_excitement_seeking"),
-    BigFiveFacetSpec("extraversion", "positive_emotions", "Життєрадісність", "facet_extr_positive_emotions"),
-    BigFiveFacetSpec("openness", "fantasy", "Уява", "facet_open_fantasy"),
-    BigFiveFacetSpec("openness", "aesthetics", "Художні інтереси", "facet_open_aesthetics"),
-    BigFiveFacetSpec("openness", "feelings", "Емоційність", "facet_open_feelings"),
-    BigFiveFacetSpec("openness", "actions", "Пригодницькість", "facet_open_actions"),
-    BigFiveFacetSpec("openness", "ideas", "Інтелект", "facet_open_ideas"),
-    BigFiveFacetSpec("openness", "values", "Лібералізм", "facet_open_values"),
-    BigFiveFacetSpec("agreeableness", "trust", "Довіра", "facet_agre_trust"),
-    BigFiveFacetSpec("agreeableness", "straightforwardness", "Моральність", "facet_agre_straightforwardness"),
-    BigFiveFacetSpec("agreeableness", "altruism", "Альтруїзм", "facet_agre_altruism"),
-    BigFiveFacetSpec("agreeableness", "compliance", "Співпраця", "facet_agre_compliance"),
-    BigFiveFacetSpec("agreeableness", "modesty", "Скромність", "facet_agre_modesty"),
-    BigFiveFacetSpec("agreeableness", "tender_mindedness", "Співчуття", "facet_agre_tender_mindedness"),
-    BigFiveFacetSpec("conscientiousness", "competence", "Самоефективність", "facet_cons_competence"),
-    BigFiveFacetSpec("conscientiousness", "order", "Організованість", "facet_cons_order"),
-    BigFiveFacetSpec("conscientiousness", "dutifulness", "Відповідальність", "facet_cons_dutifulness"),
-    BigFiveFacetSpec("conscientiousness", "achievement", "Прагнення до досягнень", "facet_cons_achievement"),
-    BigFiveFacetSpec("conscientiousness", "self_discipline", "Самодисципліна", "facet_cons_self_discipline"),
-    BigFiveFacetSpec("conscientiousness", "deliberation", "Обачність", "facet_cons_deliberation"),
-)
+_SCORE_MARKER = "Бали:"
+_SCORE_TAIL = re.compile(r"\s*(\d{1,2})\s*\(")
+# The score has to follow its label within this many characters.
+_SCORE_WINDOW = 2500
 
-HIGH_LEVEL_SESSION_KEYS = {
-    "openness": "psycho_o",
-    "conscientiousness": "psycho_c",
-    "extraversion": "psycho_e",
-    "agreeableness": "psycho_a",
-    "neuroticism": "psycho_n",
-}
 
+def _normalize_text(text: str) -> str:
+    normalized = unicodedata.normalize("NFKC", text)
+    normalized = normalized.replace("ʼ", "'").replace("’", "'").replace("`", "'")
+    # Same as re.sub(r"\s+", " ", ...), which is several times slower on long PDF text.
+    collapsed = " ".join(normalized.split())
+    if not collapsed:
+        return " " if normalized else ""
+    if normalized[0].isspace():
+        collapsed = " " + collapsed
+    if normalized[-1].isspace():
+        collapsed += " "
+    return collapsed
+
+
+def _fold_case(text: str) -> str:
+    """Lowercase `text` without changing any character position."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+def _label_variants(label: str) -> tuple[str, ...]:
+    """
+    Every spelling of a label in normalized, case-folded text: spaces stay single spaces,
+    and an apostrophe may have a space on either side.
+    """
+    first, *rest = _fold_case(_normalize_text(label)).split("'")
+    variants = [first]
+    for part in rest:
+        variants = [variant + separator + part for variant in variants for separator in ("'", " '", "' ", " ' ")]
+    return tuple(variants)
+
+
+_LABEL_VARIANTS = tuple(_label_variants(spec.label_uk) for spec in FACET_SPECS)
 
-@dataclass(frozen=True)
-class ParsedBigFiveFacets:
-    raw_scores: dict[str, int]
+
+_LABEL_MAX_LENGTH = max(len(variant) for variants in _LABEL_VARIANTS for variant in variants)
+
+
+class FacetMatcher:
+    """
+    Finds the 30 facet scores in `FACET_SPECS` order in one left-to-right pass.
+
+    Each facet label is searched from the end of the previous facet's score, and its
+    score is the first `Бали: N (` within `_SCORE_WINDOW` characters after the label.
+    Labels match case-insensitively and are precompiled once per process.
+
+    Text can arrive in chunks (PDF pages, joined by newlines as in a full extraction).
+    A label or score is only taken once no later text could change it, and consumed text
+    is dropped, so the result equals parsing the joined text.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._folded = ""
+        self._chunks = 0
+        self._position = 0
+        self._label_end: int | None = None
+        self.raw_scores: dict[str, int] = {}
 
     @property
-    def normalized_scores(self) -> dict[str, float]:
-        return {key: value / 20.0 for key, value in self.raw_scores.items()}
+    def is_complete(self) -> bool:
+        return len(self.raw_scores) == len(FACET_SPECS)
+
+    def feed(self, text: str) -> bool:
+        """Match one more chunk; returns whether all facets have been found."""
+        normalized = _normalize_text("\n" + text if self._chunks else text)
+        self._chunks += 1
+        if normalized.startswith(" ") and self._text.endswith(" "):
+            normalized = normalized[1:]
+        self._text += normalized
+        self._folded += _fold_case(normalized)
+        self._advance(final=False)
+        return self.is_complete
+
+    def finish(self) -> ParsedBigFiveFacets:
+        """Result once all text has been fed; raises for the first facet that was not found."""
+        self._advance(final=True)
+        return ParsedBigFiveFacets(raw_scores=dict(self.raw_scores))
+
+    def _advance(self, final: bool) -> None:
+        text = self._text
+        while not self.is_complete:
+            spec = FACET_SPECS[len(self.raw_scores)]
+            if self._label_end is None:
+                variants = _LABEL_VARIANTS[len(self.raw_scores)]
+                found = [
+                    (start, start + len(variant))
+                    for variant in variants
+                    if (start := self._folded.find(variant, self._position)) != -1
+                ]
+                # A longer spelling starting earlier may still be cut off at the end of the text.
+                settled = len(text) - _LABEL_MAX_LENGTH
+                if not final and (not found or min(found)[0] > settled):
+                    self._position = max(self._position, settled + 1)
+                    break
+                if not found:
+                    raise BigFivePdfParseError(f"Не знайдено фасет '{spec.label_uk}' у PDF.")
+                self._label_end = self._position = min(found)[1]
+
+            window_end = self._label_end + _SCORE_WINDOW
+            window_open = not final and window_end > len(text)
+            match = None
+            marker = text.find(_SCORE_MARKER, self._position, window_end)
+            while marker != -1:
+                match = _SCORE_TAIL.match(text, marker + len(_SCORE_MARKER), window_end)
+                if match is not None or window_open:
+                    break
+                marker = text.find(_SCORE_MARKER, marker + 1, window_end)
+            if match is None:
+                if window_open:
+                    # Retry from the undecided marker, or from where a marker could still start.
+                    self._position = marker if marker != -1 else max(self._position, len(text) - len(_SCORE_MARKER) + 1)
+                    break
+                raise BigFivePdfParseError(f"Не знайдено бал для фасета '{spec.label_uk}'.")
+
+            score = int(match.group(1))
+            if not 0 <= score <= 20:
+                raise BigFivePdfParseError(f"Бал фасета '{spec.label_uk}' поза шкалою 0-20: {score}.")
+            self.raw_scores[spec.session_key] = score
+            self._label_end = None
+            self._position = match.end()
+        self._discard_consumed()
+
+    def _discard_consumed(self) -> None:
+        # Nothing before the current position is searched again.
+        cut = self._position
+        if self._label_end is not None:
+            cut = min(cut, self._label_end)
+            self._label_end -= cut
+        self._text = self._text[cut:]
+        self._folded = self._folded[cut:]
+        self._position -= cut
+
+
+@dataclass(frozen=True)
+class PageTiming:
+    page: int
+    characters: int
+    seconds: float
+
+
+@dataclass(frozen=True)
+class StreamedBigFivePdf:
+    facets: ParsedBigFiveFacets
+    page_count: int
+    page_timings: tuple[PageTiming, ...]
 
     @property
-    def high_level_scores(self) -> dict[str, int]:
-        scores: dict[str, list[int]] = {domain: [] for domain in HIGH_LEVEL_SESSION_KEYS}
-        for spec in FACET_SPECS:
-            scores[spec.domain].append(self.raw_scores[spec.session_key])
-        return {
-            HIGH_LEVEL_SESSION_KEYS[domain]: round((sum(values) / len(values)) * 5)
-            for domain, values in scores.items()
-        }
+    def pages_read(self) -> int:
+        return len(self.page_timings)
 
 
 class BigFivePdfParser:
     @staticmethod
     def parse_pdf_bytes(pdf_bytes: bytes) -> ParsedBigFiveFacets:
+        return BigFivePdfParser.parse_pdf_stream(pdf_bytes).facets
+
+    @staticmethod
+    def parse_pdf_stream(pdf_bytes: bytes) -> StreamedBigFivePdf:
+        """Extract text page by page and stop at the page that completes all 30 facets."""
         try:
             from pypdf import PdfReader
         except ImportError as exc:  # pragma: no cover - covered by dependency contract
             raise BigFivePdfParseError("Для PDF-імпорту потрібна залежність `pypdf`.") from exc
 
+        matcher = FacetMatcher()
+        timings: list[PageTiming] = []
         try:
             reader = PdfReader(BytesIO(pdf_bytes))
-            text = "\n".join(page.extract_text() or "" for page in reader.pages)
+            page_count = len(reader.pages)
+            for index, page in enumerate(reader.pages):
+                started = time.perf_counter()
+                text = page.extract_text() or ""
+                timings.append(PageTiming(page=index, characters=len(text), seconds=time.perf_counter() - started))
+                if matcher.feed(text):
+                    break
+        except BigFivePdfParseError:
+            raise
         except Exception as exc:  # noqa: BLE001 - pypdf can raise several parser exceptions
             raise BigFivePdfParseError(f"Не вдалося прочитати PDF: {exc}") from exc
 
-        return BigFivePdfParser.parse_text(text)
+        return StreamedBigFivePdf(facets=matcher.finish(), page_count=page_count, page_timings=tuple(timings))
 
     @staticmethod
     def parse_text(text: str) -> ParsedBigFiveFacets:
-        normalized_text = BigFivePdfParser._normalize_text(text)
-        raw_scores: dict[str, int] = {}
-        cursor = 0
-
-        for spec in FACET_SPECS:
-            label_match = BigFivePdfParser._find_label(normalized_text, spec.label_uk, cursor)
-            if label_match is None:
-                raise BigFivePdfParseError(f"Не знайдено фасет '{spec.label_uk}' у PDF.")
-
-            score_match = re.search(r"Бали:\s*(\d{1,2})\s*\(", normalized_text[label_match.end() : label_match.end() + 2500])
-            if score_match is None:
-                raise BigFivePdfParseError(f"Не знайдено бал для фасета '{spec.label_uk}'.")
-
-            score = int(score_match.group(1))
-            if not 0 <= score <= 20:
-                raise BigFivePdfParseError(f"Бал фасета '{spec.label_uk}' поза шкалою 0-20: {score}.")
-
-            raw_scores[spec.session_key] = score
-            cursor = label_match.end() + score_match.end()
-
-        return ParsedBigFiveFacets(raw_scores=raw_scores)
-
-    @staticmethod
-    def _normalize_text(text: str) -> str:
-        normalized = unicodedata.normalize("NFKC", text)
-        normalized = normalized.replace("ʼ", "'").replace("’", "'").replace("`", "'")
-        return re.sub(r"\s+", " ", normalized)
-
-    @staticmethod
-    def _find_label(text: str, label: str, cursor: int) -> re.Match[str] | None:
-        normalized_label = BigFivePdfParser._normalize_text(label)
-        escaped = re.escape(normalized_label)
-        escaped = escaped.replace(r"\ ", r"\s+")
-        escaped = escaped.replace("'", r"\s*['ʼ’]\s*")
-        return re.compile(escaped, flags=re.IGNORECASE).search(text, pos=cursor)
+        matcher = FacetMatcher()
+        matcher.feed(text)
+        return matcher.finish()
@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, MutableMapping
 
-from src.services.bigfive_pdf_parser import BigFivePdfParser, FACET_SPECS, HIGH_LEVEL_SESSION_KEYS
+from src.services.bigfive_pdf_parser import BigFivePdfParser, FACET_SPECS, HIGH_LEVEL_SESSION_KEYS, ParsedBigFiveFacets
 
 
 BIGFIVE_IMPORT_SOURCE_KEY = "_bigfive_facets_source"
@@ -23,6 +23,11 @@ class BigFiveImportStatus:
         return self.import_source == BIGFIVE_PDF_SOURCE
 
 
+def bigfive_state_fragment(parsed: ParsedBigFiveFacets) -> dict[str, int]:
+    """Facet scores by `FACET_SPECS` session key, plus the OCEAN scores derived from them."""
+    return {**parsed.raw_scores, **parsed.high_level_scores}
+
+
 def apply_bigfive_pdf_scores(
     state: MutableMapping[str, Any],
     pdf_bytes: bytes,
@@ -30,10 +35,7 @@ def apply_bigfive_pdf_scores(
     file_name: str | None = None,
 ) -> int:
     parsed = BigFivePdfParser.parse_pdf_bytes(pdf_bytes)
-    for key, value in parsed.raw_scores.items():
-        state[key] = value
-    for key, value in parsed.high_level_scores.items():
-        state[key] = value
+    state.update(bigfive_state_fragment(parsed))
     state[BIGFIVE_IMPORT_SOURCE_KEY] = BIGFIVE_PDF_SOURCE
     state[BIGFIVE_IMPORT_FILENAME_KEY] = file_name or ""
     return len(parsed.raw_scores)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import numpy as np
 
 from src.enums import AttachmentStyle
 from src.profile import UserProfile
-from src.services.provision import ProvisionService
-from src.services.shadow_analysis import analyze_shadow
+from src.services.compatibility_rules import ATTACHMENT_CODES, CompatibilityRuleSet, Features, get_compatibility_rules
+from src.services.derived_features import get_derived_features
 
 
 @dataclass(frozen=True)
@@ -23,271 +26,277 @@ class CompatibilityReport:
     notes: tuple[CompatibilityItem, ...]
 
 
-class CompatibilityComparator:
-    NEED_LABELS = {
-        "safety": "Безпека",
-        "resource": "Ресурс",
-        "resonance": "Резонанс",
-        "expansion": "Експансія",
-    }
+# Attachment style codes shared with the rule table; "none" marks a mixed / low-confidence pattern.
+_STYLE_CODES = {
+    None: ATTACHMENT_CODES["none"],
+    AttachmentStyle.SECURE: ATTACHMENT_CODES["secure"],
+    AttachmentStyle.ANXIOUS: ATTACHMENT_CODES["anxious"],
+    AttachmentStyle.AVOIDANT: ATTACHMENT_CODES["avoidant"],
+    AttachmentStyle.DISORGANIZED: ATTACHMENT_CODES["disorganized"],
+}
 
-    @staticmethod
-    def compare(first: UserProfile, second: UserProfile) -> CompatibilityReport:
-        strengths: list[CompatibilityItem] = []
-        tensions: list[CompatibilityItem] = []
-        notes: list[CompatibilityItem] = []
-
-        first_needs = CompatibilityComparator._needs(first)
-        second_needs = CompatibilityComparator._needs(second)
-        first_provision = CompatibilityComparator._provision(first)
-        second_provision = CompatibilityComparator._provision(second)
-        first_priority = CompatibilityComparator._priority(first)
-        second_priority = CompatibilityComparator._priority(second)
-
-        total_gap = 0.0
-        for key, label in CompatibilityComparator.NEED_LABELS.items():
-            need_gap = abs(first_needs[key] - second_needs[key])
-            total_gap += need_gap
-            if need_gap >= 0.35:
-                tensions.append(
-                    CompatibilityItem(
-                        title=f"Різний рівень потреби: {label}",
-                        detail=(
-                            f"Профілі відрізняються приблизно на {need_gap * 100:.0f} пунктів. "
-                            "Це варто проговорити як очікування, а не як чиюсь помилку."
-                        ),
-                        severity="high" if need_gap >= 0.5 else "medium",
-                    )
-                )
-            elif need_gap <= 0.15:
-                strengths.append(
-                    CompatibilityItem(
-                        title=f"Схожий запит: {label}",
-                        detail="Ваші потреби в цьому вимірі близькі, тому домовленості можуть даватися легше.",
-                        severity="positive",
-                    )
-                )
-
-            for demander_name, demand, provider_name, provision in (
-                ("Перший профіль", first_needs[key], "другий профіль", second_provision[key]),
-                ("Другий профіль", second_needs[key], "перший профіль", first_provision[key]),
-            ):
-                if demand >= 0.68 and provision <= 0.38:
-                    tensions.append(
-                        CompatibilityItem(
-                            title=f"Можливий дефіцит підтримки: {label}",
-                            detail=(
-                                f"{demander_name} має високий запит, а {provider_name} може давати мало цього ресурсу. "
-                                "Потрібні явні правила підтримки."
-                            ),
-                            severity="high",
-                        )
-                    )
-                elif demand >= 0.65 and provision >= 0.65:
-                    strengths.append(
-                        CompatibilityItem(
-                            title=f"Добре покриття потреби: {label}",
-                            detail=f"{provider_name.capitalize()} природно дає те, що важливо для {demander_name.lower()}.",
-                            severity="positive",
-                        )
-                    )
 
-        first_priority_label = max(first_priority, key=first_priority.get)
-        second_priority_label = max(second_priority, key=second_priority.get)
-        if first_priority_label != second_priority_label:
-            notes.append(
-                CompatibilityItem(
-                    title="Різні пріоритети в trade-off ситуаціях",
-                    detail=(
-                        f"Коли неможливо підтримати все одночасно, перший профіль частіше ставить на перше місце "
-                        f"{CompatibilityComparator.NEED_LABELS[first_priority_label].lower()}, а другий — "
-                        f"{CompatibilityComparator.NEED_LABELS[second_priority_label].lower()}."
-                    ),
-                    severity="note",
-                )
-            )
+@dataclass(frozen=True)
+class CompatibilityPool:
+    """
+    Columnar view of many profiles for `CompatibilityComparator.compare_many`.
 
-        eros_gap = abs(first.eros.accelerator - second.eros.accelerator) + abs(first.eros.brake - second.eros.brake)
-        if abs(first.eros.accelerator - second.eros.accelerator) >= 0.35:
-            tensions.append(
-                CompatibilityItem(
-                    title="Різний темп сексуальної активації",
-                    detail="Одному профілю бажання може вмикатись значно легше. Це потребує обережності з ініціюванням.",
-                    severity="medium",
-                )
-            )
-        if abs(first.eros.brake - second.eros.brake) >= 0.35:
-            tensions.append(
-                CompatibilityItem(
-                    title="Різна чутливість сексуального гальма",
-                    detail="Контекст, стрес або сенсорне середовище можуть мати різну вагу для вас двох.",
-                    severity="medium",
-                )
-            )
-        if eros_gap <= 0.25:
-            strengths.append(
-                CompatibilityItem(
-                    title="Схожий еротичний контекст",
-                    detail="Акселератор і гальмо близькі, тому легше узгоджувати темп і умови близькості.",
-                    severity="positive",
-                )
-            )
+    Columns follow `CompatibilityComparator.NEED_LABELS` order for needs, provision
+    and priority; eros is (accelerator, brake); shadow is (secure, anxious, avoidant,
+    disorganized); facets is (openness average, excitement seeking, conscientiousness average).
+    `profiles` is optional and only needed to build full reports for selected rows.
+    """
 
-        first_shadow = analyze_shadow(first.shadow)
-        second_shadow = analyze_shadow(second.shadow)
-        first_style = first_shadow.style
-        second_style = second_shadow.style
-
-        if first_style is None or second_style is None:
-            notes.append(
-                CompatibilityItem(
-                    title="Прив'язаність потребує обережної інтерпретації",
-                    detail=(
-                        "Один або обидва профілі мають змішаний або слабко виражений attachment-патерн, "
-                        "тому висновки про anxious/avoidant петлі та secure-збіг тут менш надійні."
-                    ),
-                    severity="note",
-                )
-            )
-        else:
-            if {first_style, second_style} == {AttachmentStyle.ANXIOUS, AttachmentStyle.AVOIDANT}:
-                tensions.append(
-                    CompatibilityItem(
-                        title="Тривожно-уникаюча петля",
-                        detail="Один профіль може шукати більше контакту саме тоді, коли інший відступає для регуляції.",
-                        severity="high",
-                    )
-                )
-            if AttachmentStyle.DISORGANIZED in {first_style, second_style}:
-                notes.append(
-                    CompatibilityItem(
-                        title="Потрібний дуже явний repair",
-                        detail="Дезорганізований патерн не є вироком, але потребує передбачуваного відновлення контакту після напруги.",
-                        severity="note",
+    needs: np.ndarray
+    provision: np.ndarray
+    priority: np.ndarray
+    eros: np.ndarray
+    shadow: np.ndarray
+    facets: np.ndarray
+    profiles: Sequence[UserProfile] | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        size = len(self)
+        for name, width in (("needs", 4), ("provision", 4), ("priority", 4), ("eros", 2), ("shadow", 4), ("facets", 3)):
+            column = np.asarray(getattr(self, name), dtype=np.float64)
+            if column.shape != (size, width):
+                raise ValueError(f"Pool column '{name}' must have shape ({size}, {width}), got {column.shape}.")
+            object.__setattr__(self, name, column)
+        if self.profiles is not None and len(self.profiles) != size:
+            raise ValueError("Pool profiles must match the number of pool rows.")
+
+    def __len__(self) -> int:
+        return int(np.shape(self.needs)[0])
+
+    @classmethod
+    def from_profiles(cls, profiles: Sequence[UserProfile]) -> "CompatibilityPool":
+        profiles = tuple(profiles)
+        derived = [get_derived_features(profile) for profile in profiles]
+        return cls(
+            needs=np.array([features.needs for features in derived], dtype=np.float64).reshape(-1, 4),
+            provision=np.array([features.provision for features in derived], dtype=np.float64).reshape(-1, 4),
+            priority=np.array([features.priority for features in derived], dtype=np.float64).reshape(-1, 4),
+            eros=np.array(
+                [(profile.eros.accelerator, profile.eros.brake) for profile in profiles], dtype=np.float64
+            ).reshape(-1, 2),
+            shadow=np.array(
+                [
+                    (
+                        profile.shadow.secure_score,
+                        profile.shadow.anxious_score,
+                        profile.shadow.avoidant_score,
+                        profile.shadow.disorganized_score,
                     )
-                )
-            if first_style == second_style == AttachmentStyle.SECURE:
-                strengths.append(
-                    CompatibilityItem(
-                        title="Схожий стабільний стиль прив'язаності",
-                        detail="Обидва профілі мають більше шансів повертатися до контакту без драматизації дистанції.",
-                        severity="positive",
+                    for profile in profiles
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 4),
+            facets=np.array(
+                [
+                    (
+                        features.domain_averages.openness,
+                        profile.psychometrics.extraversion.excitement_seeking,
+                        features.domain_averages.conscientiousness,
                     )
-                )
-
-        # Evaluate 5 Critical Discussion Flags
-        # 1. Pursuit-Distance Loop
-        pursuit_distance = False
-        if {first_style, second_style} == {AttachmentStyle.ANXIOUS, AttachmentStyle.AVOIDANT}:
-            pursuit_distance = True
-        elif (first.shadow.anxious_score >= 0.45 and second.shadow.avoidant_score >= 0.45) or \
-             (second.shadow.anxious_score >= 0.45 and first.shadow.avoidant_score >= 0.45):
-            pursuit_distance = True
-
-        if pursuit_distance:
-            tensions.append(
-                CompatibilityItem(
-                    title="Цикл Переслідування-Дистанціювання",
-                    detail="Один із партнерів може схилятися до пошуку активного контакту під час стресу, тоді як інший відступає для саморегуляції. Рекомендується встановити передбачуваний протокол відновлення контакту (repair).",
-                    severity="high",
-                )
-            )
-
-        # 2. Expansion-Safety Conflict
-        expansion_safety = (
-            (first_needs["expansion"] >= 0.70 and (second_needs["safety"] >= 0.70 or second.psychometrics.openness.average <= 0.40 or second.psychometrics.extraversion.excitement_seeking <= 0.35)) or
-            (second_needs["expansion"] >= 0.70 and (first_needs["safety"] >= 0.70 or first.psychometrics.openness.average <= 0.40 or first.psychometrics.extraversion.excitement_seeking <= 0.35))
+                    for profile, features in zip(profiles, derived)
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 3),
+            profiles=profiles,
         )
-        if expansion_safety:
-            tensions.append(
-                CompatibilityItem(
-                    title="Конфлікт Експансії та Безпеки",
-                    detail="Потреба одного з партнерів у новизні та розвитку може викликати тривогу в іншого, для кого пріоритетом є стабільність. Рекомендується спільно узгодити межі експеріментів та зону безпеки.",
-                    severity="medium",
-                )
-            )
 
-        # 3. Resource-Routine Friction
-        resource_routine = (
-            (first_needs["resource"] >= 0.70 and (second_provision["resource"] <= 0.40 or second.psychometrics.conscientiousness.average <= 0.40)) or
-            (second_needs["resource"] >= 0.70 and (first_provision["resource"] <= 0.40 or first.psychometrics.conscientiousness.average <= 0.40))
+    def take(self, indexes: np.ndarray) -> "CompatibilityPool":
+        """Sub-pool of the given rows, in the given order."""
+        profiles = None if self.profiles is None else tuple(self.profiles[int(index)] for index in indexes)
+        return CompatibilityPool(
+            needs=self.needs[indexes],
+            provision=self.provision[indexes],
+            priority=self.priority[indexes],
+            eros=self.eros[indexes],
+            shadow=self.shadow[indexes],
+            facets=self.facets[indexes],
+            profiles=profiles,
         )
-        if resource_routine:
-            tensions.append(
-                CompatibilityItem(
-                    title="Побутове тертя (Ресурс vs Рутина)",
-                    detail="Високий запит на практичну підтримку та організацію побуту стикається з обмеженим виконавчим ресурсом партнера. Це питання ємності та планування, а не дефіциту почуттів.",
-                    severity="medium",
-                )
-            )
 
-        # 4. Resonance-Style Mismatch
-        resonance_style = (
-            (first_needs["resonance"] >= 0.70 and second_provision["resonance"] <= 0.40) or
-            (second_needs["resonance"] >= 0.70 and first_provision["resonance"] <= 0.40)
-        )
-        if resonance_style:
-            tensions.append(
-                CompatibilityItem(
-                    title="Розбіжність стилів резонансу",
-                    detail="Запит на глибоке емоційне або когнітивне спілкування стикається з більш практичним або низьковербальним стилем вираження турботи іншого партнера.",
-                    severity="medium",
-                )
-            )
+    def attachment_styles(self) -> np.ndarray:
+        """Per-row attachment code matching `analyze_shadow` (`ATTACHMENT_CODES`, "none" when not confident)."""
+        ranked = np.sort(self.shadow, axis=1)
+        top_score = ranked[:, -1]
+        confident = (top_score >= 0.4) & ((top_score - ranked[:, -2]) >= 0.12)
+        return np.where(confident, np.argmax(self.shadow, axis=1), ATTACHMENT_CODES["none"])
 
-        # 5. Eros Brake/Pressure Loop
-        eros_brake_pressure = (
-            (first.eros.accelerator >= 0.65 and second.eros.brake >= 0.65) or
-            (second.eros.accelerator >= 0.65 and first.eros.brake >= 0.65)
-        )
-        if eros_brake_pressure:
-            tensions.append(
-                CompatibilityItem(
-                    title="Цикл тиску та сексуального гальмування",
-                    detail="Прагнення до сексуальної близькості через ініціативу одного партнера стикається з високою чутливістю сексуального гальма іншого (через стрес, втому чи тривогу).",
-                    severity="high",
-                )
+    def features(self) -> dict[str, np.ndarray]:
+        """Rule-table features as one array per feature, in row order."""
+        features: dict[str, np.ndarray] = {}
+        for column, key in enumerate(CompatibilityComparator.NEED_LABELS):
+            features[f"needs.{key}"] = self.needs[:, column]
+            features[f"provision.{key}"] = self.provision[:, column]
+        features["priority_top"] = np.argmax(self.priority, axis=1)
+        features["eros.accelerator"] = self.eros[:, 0]
+        features["eros.brake"] = self.eros[:, 1]
+        for column, style in enumerate(("secure", "anxious", "avoidant", "disorganized")):
+            features[f"shadow.{style}"] = self.shadow[:, column]
+        features["attachment"] = self.attachment_styles()
+        features["facets.openness"] = self.facets[:, 0]
+        features["facets.excitement_seeking"] = self.facets[:, 1]
+        features["facets.conscientiousness"] = self.facets[:, 2]
+        return features
+
+
+@dataclass(frozen=True)
+class PairwiseScores:
+    scores: np.ndarray
+    tensions: np.ndarray
+    strengths: np.ndarray
+    notes: np.ndarray
+
+
+class CompatibilityRanking:
+    """Scores and flag bitmasks for one profile against a pool; full reports are built on demand."""
+
+    def __init__(
+        self,
+        profile: UserProfile,
+        pool: CompatibilityPool,
+        scores: np.ndarray,
+        tensions: np.ndarray,
+        strengths: np.ndarray,
+        notes: np.ndarray,
+        rules: CompatibilityRuleSet | None = None,
+    ) -> None:
+        self.profile = profile
+        self.pool = pool
+        self.scores = scores
+        self.tensions = tensions
+        self.strengths = strengths
+        self.notes = notes
+        self.rules = rules
+        self._reports: dict[int, CompatibilityReport] = {}
+
+    def __len__(self) -> int:
+        return int(self.scores.shape[0])
+
+    def top(self, count: int) -> np.ndarray:
+        """Pool indexes of the `count` best scores, best first (ties keep pool order)."""
+        count = max(0, min(count, len(self)))
+        if count == 0:
+            return np.empty(0, dtype=np.intp)
+        if count < len(self):
+            candidates = np.argpartition(-self.scores, count - 1)[:count]
+            threshold = self.scores[candidates].min()
+            candidates = np.flatnonzero(self.scores >= threshold)
+        else:
+            candidates = np.arange(len(self))
+        order = np.lexsort((candidates, -self.scores[candidates]))
+        return candidates[order][:count]
+
+    def report(self, index: int) -> CompatibilityReport:
+        index = int(index)
+        report = self._reports.get(index)
+        if report is None:
+            if self.pool.profiles is None:
+                raise ValueError("Full reports need a pool built with profiles.")
+            report = CompatibilityComparator.compare(self.profile, self.pool.profiles[index], rules=self.rules)
+            self._reports[index] = report
+        return report
+
+    def top_reports(self, count: int) -> list[tuple[int, CompatibilityReport]]:
+        return [(int(index), self.report(index)) for index in self.top(count)]
+
+
+class CompatibilityComparator:
+    NEED_LABELS = {
+        "safety": "Безпека",
+        "resource": "Ресурс",
+        "resonance": "Резонанс",
+        "expansion": "Експансія",
+    }
+
+    @staticmethod
+    def compare(
+        first: UserProfile,
+        second: UserProfile,
+        rules: CompatibilityRuleSet | None = None,
+    ) -> CompatibilityReport:
+        rules = rules or get_compatibility_rules()
+        first_features = CompatibilityComparator.profile_features(first)
+        second_features = CompatibilityComparator.profile_features(second)
+        fired = rules.evaluate(first_features, second_features)
+
+        def items(kind: str) -> tuple[CompatibilityItem, ...]:
+            return tuple(
+                CompatibilityItem(title=item.title, detail=item.detail, severity=item.severity)
+                for item in fired[kind][: rules.limits[kind]]
             )
 
-        score = 1.0 - min(1.0, (total_gap / 4 * 0.55) + (eros_gap / 2 * 0.25) + (len(tensions) * 0.04))
+        score = rules.score(first_features, second_features, len(fired["tension"]))
         return CompatibilityReport(
-            score=max(0.0, min(1.0, score)),
-            strengths=tuple(strengths[:8]),
-            tensions=tuple(tensions[:8]),
-            notes=tuple(notes[:6]),
+            score=float(score),
+            strengths=items("strength"),
+            tensions=items("tension"),
+            notes=items("note"),
         )
 
     @staticmethod
-    def _needs(user: UserProfile) -> dict[str, float]:
-        return {
-            "safety": user.needs.adjusted_safety,
-            "resource": user.needs.adjusted_resource,
-            "resonance": user.needs.adjusted_resonance,
-            "expansion": user.needs.adjusted_expansion,
-        }
+    def compare_many(
+        profile: UserProfile,
+        pool: CompatibilityPool,
+        rules: CompatibilityRuleSet | None = None,
+    ) -> CompatibilityRanking:
+        """
+        Score `profile` against every pool row in one vectorized pass.
+
+        Scores and flags match `compare(profile, candidate)` for each candidate; the
+        tension bits map one-to-one onto the tension items `compare` would emit.
+        """
+        pairs = CompatibilityComparator.compare_pools(CompatibilityPool.from_profiles((profile,)), pool, rules)
+        return CompatibilityRanking(
+            profile=profile,
+            pool=pool,
+            scores=pairs.scores[0],
+            tensions=pairs.tensions[0],
+            strengths=pairs.strengths[0],
+            notes=pairs.notes[0],
+            rules=rules,
+        )
 
     @staticmethod
-    def _provision(user: UserProfile) -> dict[str, float]:
-        if user.provision is not None:
-            return {
-                "safety": user.provision.get("safety_provision", 0.0),
-                "resource": user.provision.get("resource_provision", 0.0),
-                "resonance": user.provision.get("resonance_provision", 0.0),
-                "expansion": user.provision.get("expansion_provision", 0.0),
-            }
-        provision = ProvisionService.analyze(user.psychometrics, user.professional)
-        return {
-            "safety": provision.safety_score,
-            "resource": provision.resource_score,
-            "resonance": provision.resonance_score,
-            "expansion": provision.expansion_score,
-        }
+    def compare_pools(
+        first: CompatibilityPool,
+        second: CompatibilityPool,
+        rules: CompatibilityRuleSet | None = None,
+    ) -> PairwiseScores:
+        """Score every `first` row against every `second` row; results have shape (len(first), len(second))."""
+        rules = rules or get_compatibility_rules()
+        # First-side features become (rows, 1) and second-side features (1, rows), so every
+        # rule broadcasts over the full pair grid.
+        first_features = {name: values[:, None] for name, values in first.features().items()}
+        second_features = {name: values[None, :] for name, values in second.features().items()}
+        flags = rules.flags(first_features, second_features, (len(first), len(second)))
+        return PairwiseScores(
+            scores=rules.score(first_features, second_features, flags.tension_count),
+            tensions=flags.tensions,
+            strengths=flags.strengths,
+            notes=flags.notes,
+        )
 
     @staticmethod
-    def _priority(user: UserProfile) -> dict[str, float]:
-        return {
-            "safety": user.needs.priority_safety,
-            "resource": user.needs.priority_resource,
-            "resonance": user.needs.priority_resonance,
-            "expansion": user.needs.priority_expansion,
-        }
+    def profile_features(user: UserProfile) -> Features:
+        """Rule-table features of one profile as plain floats / ints."""
+        derived = get_derived_features(user)
+        features: dict[str, float | int] = {}
+        for position, key in enumerate(CompatibilityComparator.NEED_LABELS):
+            features[f"needs.{key}"] = derived.needs[position]
+            features[f"provision.{key}"] = derived.provision[position]
+        features["priority_top"] = derived.priority.index(max(derived.priority))
+        features["eros.accelerator"] = user.eros.accelerator
+        features["eros.brake"] = user.eros.brake
+        features["shadow.secure"] = user.shadow.secure_score
+        features["shadow.anxious"] = user.shadow.anxious_score
+        features["shadow.avoidant"] = user.shadow.avoidant_score
+        features["shadow.disorganized"] = user.shadow.disorganized_score
+        features["attachment"] = _STYLE_CODES[derived.shadow.style]
+        features["facets.openness"] = derived.domain_averages.openness
+        features["facets.excitement_seeking"] = user.psychometrics.extraversion.excitement_seeking
+        features["facets.conscientiousness"] = derived.domain_averages.conscientiousness
+        return features
@@ -0,0 +1,333 @@
+"""
+Top-k partner search over a large set of stored profiles.
+
+`CompatibilityComparator.compare` scores a pair as
+
+    1 - min(1, need_l1 / 4 * need_gap_weight + eros_l1 / 2 * eros_gap_weight + tensions * tension_penalty)
+
+with the weights taken from the compatibility rule table. The tension term only ever
+lowers the score, so the weighted L1 distance over the 4 adjusted needs and the
+2 eros values gives an upper bound on the score. The index
+keeps a KD-tree over those 6 weighted coordinates, walks it best-first by that bound
+and re-ranks every visited row exactly with `compare_many`. The search stops once no
+unvisited node can beat the current k-th score, so the result is the same top-k that
+exhaustive scoring returns (ties ordered by insertion, like `CompatibilityRanking.top`).
+
+Inserts go to an unindexed tail that is scanned exhaustively; deletes are tombstones.
+Both are folded into a fresh tree once they grow past a fraction of the index.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import heapq
+from typing import Iterable
+
+import numpy as np
+
+from src.profile import UserProfile
+from src.services.compatibility import CompatibilityComparator, CompatibilityPool
+from src.services.compatibility_rules import CompatibilityRuleSet, get_compatibility_rules
+
+INDEX_FORMAT_VERSION = 1
+_COLUMN_WIDTHS = {"needs": 4, "provision": 4, "priority": 4, "eros": 2, "shadow": 4, "facets": 3}
+
+# Guards the bound against rounding differences between the weighted and the exact formula.
+_BOUND_SLACK = 1e-9
+_NO_CHILD = -1
+_DEFAULT_LEAF_SIZE = 256
+_DEFAULT_BATCH_ROWS = 8192
+
+
+class _KDTree:
+    def __init__(
+        self,
+        order: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        lefts: np.ndarray,
+        rights: np.ndarray,
+        lows: np.ndarray,
+        highs: np.ndarray,
+    ) -> None:
+        self.order = order
+        self.starts = starts
+        self.ends = ends
+        self.lefts = lefts
+        self.rights = rights
+        self.lows = lows
+        self.highs = highs
+
+    @classmethod
+    def build(cls, points: np.ndarray, leaf_size: int) -> "_KDTree":
+        order = np.arange(points.shape[0], dtype=np.int64)
+        starts: list[int] = []
+        ends: list[int] = []
+        lefts: list[int] = []
+        rights: list[int] = []
+        lows: list[np.ndarray] = []
+        highs: list[np.ndarray] = []
+
+        def add_node(start: int, end: int) -> int:
+            block = points[order[start:end]]
+            starts.append(start)
+            ends.append(end)
+            lefts.append(_NO_CHILD)
+            rights.append(_NO_CHILD)
+            if end > start:
+                lows.append(block.min(axis=0))
+                highs.append(block.max(axis=0))
+            else:
+                lows.append(np.zeros(points.shape[1]))
+                highs.append(np.zeros(points.shape[1]))
+            return len(starts) - 1
+
+        pending = [add_node(0, points.shape[0])]
+        while pending:
+            node = pending.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= leaf_size:
+                continue
+            spread = highs[node] - lows[node]
+            if not spread.any():
+                continue
+            dimension = int(np.argmax(spread))
+            middle = (start + end) // 2
+            rows = order[start:end]
+            order[start:end] = rows[np.argpartition(points[rows, dimension], middle - start)]
+            lefts[node] = add_node(start, middle)
+            rights[node] = add_node(middle, end)
+            pending.extend((lefts[node], rights[node]))
+
+        return cls(
+            order=order,
+            starts=np.array(starts, dtype=np.int64),
+            ends=np.array(ends, dtype=np.int64),
+            lefts=np.array(lefts, dtype=np.int64),
+            rights=np.array(rights, dtype=np.int64),
+            lows=np.array(lows, dtype=np.float64).reshape(-1, points.shape[1]),
+            highs=np.array(highs, dtype=np.float64).reshape(-1, points.shape[1]),
+        )
+
+    def bound(self, node: int, point: np.ndarray) -> float:
+        """Smallest weighted L1 distance from `point` to anything inside `node`'s box."""
+        below = np.maximum(self.lows[node] - point, 0.0)
+        above = np.maximum(point - self.highs[node], 0.0)
+        return float((below + above).sum())
+
+
+class CompatibilityIndex:
+    def __init__(
+        self,
+        *,
+        leaf_size: int = _DEFAULT_LEAF_SIZE,
+        batch_rows: int = _DEFAULT_BATCH_ROWS,
+        rules: CompatibilityRuleSet | None = None,
+    ) -> None:
+        self.leaf_size = leaf_size
+        self.batch_rows = batch_rows
+        self.rules = rules or get_compatibility_rules()
+        # Per-coordinate weights turning the L1 distance into the gap part of the score penalty.
+        weights = self.rules.weights
+        self._coordinate_weights = np.array(
+            [weights.need_gap_weight / 4] * 4 + [weights.eros_gap_weight / 2] * 2, dtype=np.float64
+        )
+        self._keys: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._columns = {name: np.zeros((0, width)) for name, width in _COLUMN_WIDTHS.items()}
+        self._points = np.zeros((0, len(self._coordinate_weights)))
+        self._tree: _KDTree | None = None
+        self._indexed_rows = 0
+        self._deleted_rows = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._rows
+
+    def keys(self) -> tuple[str, ...]:
+        """Live keys in insertion order."""
+        return tuple(key for key, alive in zip(self._keys, self._alive) if alive)
+
+    @classmethod
+    def build(
+        cls,
+        profiles: Iterable[tuple[str, UserProfile]],
+        *,
+        leaf_size: int = _DEFAULT_LEAF_SIZE,
+        batch_rows: int = _DEFAULT_BATCH_ROWS,
+        rules: CompatibilityRuleSet | None = None,
+    ) -> "CompatibilityIndex":
+        index = cls(leaf_size=leaf_size, batch_rows=batch_rows, rules=rules)
+        items = list(profiles)
+        index._append([key for key, _ in items], CompatibilityPool.from_profiles([profile for _, profile in items]))
+        index.rebuild()
+        return index
+
+    def insert(self, key: str, profile: UserProfile) -> None:
+        """Add or replace the profile stored under `key`."""
+        self.insert_pool([key], CompatibilityPool.from_profiles((profile,)))
+
+    def insert_pool(self, keys: list[str], pool: CompatibilityPool) -> None:
+        if len(keys) != len(pool):
+            raise ValueError("Each pool row needs exactly one key.")
+        if len(set(keys)) != len(keys):
+            raise ValueError("Keys inserted together must be unique.")
+        for key in keys:
+            if key in self._rows:
+                self.delete(key)
+        self._append(keys, pool)
+        self._maybe_rebuild()
+
+    def delete(self, key: str) -> None:
+        row = self._rows.pop(key)
+        self._alive[row] = False
+        self._deleted_rows += 1
+        self._maybe_rebuild()
+
+    def rebuild(self) -> None:
+        """Drop tombstones and index every row, keeping insertion order."""
+        live = np.flatnonzero(self._alive)
+        self._keys = [self._keys[row] for row in live]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._columns = {name: column[live] for name, column in self._columns.items()}
+        self._points = self._points[live]
+        self._alive = np.ones(len(self._keys), dtype=bool)
+        self._deleted_rows = 0
+        self._tree = _KDTree.build(self._points, self.leaf_size)
+        self._indexed_rows = len(self._keys)
+
+    def top(self, profile: UserProfile, count: int) -> list[tuple[str, float]]:
+        """The `count` best `(key, score)` matches for `profile`, best first."""
+        if count <= 0 or not self._rows:
+            return []
+        query = CompatibilityPool.from_profiles((profile,))
+        point = self._coordinates(query)[0]
+        best_scores = np.empty(0)
+        best_rows = np.empty(0, dtype=np.int64)
+
+        def kth_score() -> float:
+            return float(best_scores[-1]) if best_scores.shape[0] >= count else -np.inf
+
+        def score_rows(rows: np.ndarray) -> None:
+            nonlocal best_scores, best_rows
+            rows = rows[self._alive[rows]]
+            if rows.shape[0] == 0:
+                return
+            ranking = CompatibilityComparator.compare_many(profile, self._pool(rows), self.rules)
+            scores = np.concatenate((best_scores, ranking.scores))
+            candidates = np.concatenate((best_rows, rows))
+            keep = np.lexsort((candidates, -scores))[:count]
+            best_scores, best_rows = scores[keep], candidates[keep]
+
+        score_rows(np.arange(self._indexed_rows, len(self._keys)))
+
+        tree = self._tree
+        if tree is not None and self._indexed_rows:
+            heap = [(tree.bound(0, point), 0)]
+            batch: list[np.ndarray] = []
+            batch_size = 0
+            while heap:
+                bound, node = heap[0]
+                if _score_ceiling(bound) < kth_score():
+                    if not batch:
+                        break
+                elif batch_size < self.batch_rows:
+                    heapq.heappop(heap)
+                    left = int(tree.lefts[node])
+                    if left == _NO_CHILD:
+                        batch.append(tree.order[tree.starts[node] : tree.ends[node]])
+                        batch_size += batch[-1].shape[0]
+                    else:
+                        right = int(tree.rights[node])
+                        heapq.heappush(heap, (tree.bound(left, point), left))
+                        heapq.heappush(heap, (tree.bound(right, point), right))
+                    continue
+                score_rows(np.concatenate(batch))
+                batch, batch_size = [], 0
+            if batch:
+                score_rows(np.concatenate(batch))
+
+        return [(self._keys[int(row)], float(score)) for row, score in zip(best_rows, best_scores)]
+
+    def save(self, path: Path) -> None:
+        if self._tree is None or self._indexed_rows != len(self._keys) or self._deleted_rows:
+            self.rebuild()
+        tree = self._tree
+        temporary_path = path.with_name(path.name + ".tmp")
+        with temporary_path.open("wb") as handle:
+            np.savez(
+                handle,
+                format_version=np.array(INDEX_FORMAT_VERSION),
+                leaf_size=np.array(self.leaf_size),
+                coordinate_weights=self._coordinate_weights,
+                keys=np.array(self._keys, dtype=str),
+                tree_order=tree.order,
+                tree_starts=tree.starts,
+                tree_ends=tree.ends,
+                tree_lefts=tree.lefts,
+                tree_rights=tree.rights,
+                tree_lows=tree.lows,
+                tree_highs=tree.highs,
+                **{f"column_{name}": column for name, column in self._columns.items()},
+            )
+        temporary_path.replace(path)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path,
+        *,
+        batch_rows: int = _DEFAULT_BATCH_ROWS,
+        rules: CompatibilityRuleSet | None = None,
+    ) -> "CompatibilityIndex":
+        with np.load(path, allow_pickle=False) as stored:
+            if int(stored["format_version"]) != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Unsupported compatibility index format in '{path.name}'.")
+            index = cls(leaf_size=int(stored["leaf_size"]), batch_rows=batch_rows, rules=rules)
+            index._append(
+                stored["keys"].tolist(),
+                CompatibilityPool(**{name: stored[f"column_{name}"] for name in _COLUMN_WIDTHS}),
+            )
+            if not np.array_equal(stored["coordinate_weights"], index._coordinate_weights):
+                # The score weights were retuned since the index was saved; the stored boxes no longer apply.
+                index.rebuild()
+                return index
+            index._tree = _KDTree(
+                order=stored["tree_order"],
+                starts=stored["tree_starts"],
+                ends=stored["tree_ends"],
+                lefts=stored["tree_lefts"],
+                rights=stored["tree_rights"],
+                lows=stored["tree_lows"],
+                highs=stored["tree_highs"],
+            )
+        index._indexed_rows = len(index._keys)
+        return index
+
+    def _append(self, keys: list[str], pool: CompatibilityPool) -> None:
+        start = len(self._keys)
+        self._keys.extend(keys)
+        self._rows.update((key, start + offset) for offset, key in enumerate(keys))
+        self._alive = np.concatenate((self._alive, np.ones(len(keys), dtype=bool)))
+        self._columns = {
+            name: np.concatenate((column, getattr(pool, name))) for name, column in self._columns.items()
+        }
+        self._points = np.concatenate((self._points, self._coordinates(pool)))
+
+    def _maybe_rebuild(self) -> None:
+        pending = len(self._keys) - self._indexed_rows + self._deleted_rows
+        if pending > max(1024, self._indexed_rows // 4):
+            self.rebuild()
+
+    def _coordinates(self, pool: CompatibilityPool) -> np.ndarray:
+        return np.hstack((pool.needs, pool.eros)) * self._coordinate_weights
+
+    def _pool(self, rows: np.ndarray) -> CompatibilityPool:
+        return CompatibilityPool(**{name: column[rows] for name, column in self._columns.items()})
+
+
+def _score_ceiling(bound: float) -> float:
+    return 1.0 - min(1.0, max(0.0, bound - _BOUND_SLACK))
@@ -0,0 +1,204 @@
+"""
+All-pairs compatibility for a cohort, computed in tiles on a process pool.
+
+The upper triangle of the N x N matrix is split into `block_size` tiles. Each worker
+scores a tile with `CompatibilityComparator.compare_pools` and writes it straight into
+`scores.npy`, a float32 memory-mapped matrix (`compare(first, second)` lands at
+`[first, second]` for first < second; the rest stays NaN). The tension, strength and
+note bit masks of each pair go the same way into `tensions.npy`, `strengths.npy` and
+`notes.npy`, uint32 memory-mapped matrices of the same shape (zero outside the upper
+triangle). Notes fire on nearly every pair, so the masks are kept dense rather than as
+sparse records. Once a tile is flushed an empty marker file records it as finished, so an
+interrupted job resumes with the tiles that are still missing.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import json
+
+import numpy as np
+
+from src.services.compatibility import CompatibilityComparator, CompatibilityPool
+from src.services.compatibility_rules import COMPATIBILITY_RULES_PATH, CompatibilityRuleSet, load_compatibility_rules
+
+MATRIX_FORMAT_VERSION = 3
+FLAG_KINDS = ("tensions", "strengths", "notes")
+_POOL_COLUMNS = ("needs", "provision", "priority", "eros", "shadow", "facets")
+
+# Per-worker state, set once by `_init_worker` so tasks only carry tile coordinates.
+_worker_pool: CompatibilityPool | None = None
+_worker_rules: CompatibilityRuleSet | None = None
+_worker_scores: np.memmap | None = None
+_worker_flags: dict[str, np.memmap] = {}
+_worker_output_dir: Path | None = None
+_worker_block_size = 0
+
+
+@dataclass(frozen=True)
+class AllPairsProgress:
+    total_blocks: int
+    completed_blocks: int
+
+    @property
+    def is_complete(self) -> bool:
+        return self.completed_blocks == self.total_blocks
+
+
+class AllPairsCompatibilityJob:
+    def __init__(
+        self,
+        pool: CompatibilityPool,
+        output_dir: Path,
+        *,
+        block_size: int = 1024,
+        workers: int | None = None,
+        rules_path: Path = COMPATIBILITY_RULES_PATH,
+    ) -> None:
+        if block_size <= 0:
+            raise ValueError("block_size must be positive.")
+        # Workers only need the numeric columns; profiles would be pickled to every process.
+        self.pool = CompatibilityPool(**{name: getattr(pool, name) for name in _POOL_COLUMNS})
+        self.output_dir = output_dir
+        self.block_size = block_size
+        self.workers = workers
+        self.rules_path = rules_path
+
+    @property
+    def scores_path(self) -> Path:
+        return self.output_dir / "scores.npy"
+
+    def flags_path(self, kind: str) -> Path:
+        if kind not in FLAG_KINDS:
+            raise ValueError(f"Unknown flag kind '{kind}'; expected one of {', '.join(FLAG_KINDS)}.")
+        return self.output_dir / f"{kind}.npy"
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.output_dir / "manifest.json"
+
+    def blocks(self) -> list[tuple[int, int]]:
+        block_count = -(-len(self.pool) // self.block_size)
+        return [(row, column) for row in range(block_count) for column in range(row, block_count)]
+
+    def progress(self) -> AllPairsProgress:
+        blocks = self.blocks()
+        return AllPairsProgress(
+            total_blocks=len(blocks),
+            completed_blocks=sum(1 for block in blocks if _block_path(self.output_dir, block).exists()),
+        )
+
+    def run(self, *, max_blocks: int | None = None) -> AllPairsProgress:
+        """Score the missing tiles, at most `max_blocks` of them."""
+        self._prepare()
+        pending = [block for block in self.blocks() if not _block_path(self.output_dir, block).exists()]
+        if max_blocks is not None:
+            pending = pending[:max_blocks]
+        if pending:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.pool, self.rules_path, self.output_dir, self.block_size),
+            ) as executor:
+                for future in as_completed([executor.submit(_score_block, block) for block in pending]):
+                    future.result()
+        return self.progress()
+
+    def scores(self) -> np.memmap:
+        return np.load(self.scores_path, mmap_mode="r")
+
+    def flags(self, kind: str) -> np.memmap:
+        """`tensions`, `strengths` or `notes` bit masks, laid out like `scores()`."""
+        return np.load(self.flags_path(kind), mmap_mode="r")
+
+    def _prepare(self) -> None:
+        manifest = {
+            "format_version": MATRIX_FORMAT_VERSION,
+            "size": len(self.pool),
+            "block_size": self.block_size,
+            "pool_digest": _pool_digest(self.pool),
+            "rules_digest": hashlib.sha256(self.rules_path.read_bytes()).hexdigest(),
+        }
+        if self.manifest_path.exists():
+            existing = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if existing != manifest:
+                raise ValueError(
+                    f"'{self.output_dir}' holds a different all-pairs job; use a new directory to start over."
+                )
+            return
+
+        (self.output_dir / "blocks").mkdir(parents=True, exist_ok=True)
+        scores = np.lib.format.open_memmap(
+            self.scores_path, mode="w+", dtype=np.float32, shape=(len(self.pool), len(self.pool))
+        )
+        scores[:] = np.nan
+        scores.flush()
+        del scores
+        for kind in FLAG_KINDS:
+            # A fresh file reads as zeros; only the scored upper triangle is ever written.
+            flags = np.lib.format.open_memmap(
+                self.flags_path(kind), mode="w+", dtype=np.uint32, shape=(len(self.pool), len(self.pool))
+            )
+            flags.flush()
+            del flags
+        # The manifest is written last, so a crash before this point simply starts over.
+        self.manifest_path.write_text(json.dumps(manifest, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _block_path(output_dir: Path, block: tuple[int, int]) -> Path:
+    return output_dir / "blocks" / f"{block[0]}_{block[1]}.done"
+
+
+def _pool_digest(pool: CompatibilityPool) -> str:
+    digest = hashlib.sha256()
+    for name in _POOL_COLUMNS:
+        digest.update(np.ascontiguousarray(getattr(pool, name), dtype="<f8").tobytes())
+    return digest.hexdigest()
+
+
+def _init_worker(
+    pool: CompatibilityPool,
+    rules_path: Path,
+    output_dir: Path,
+    block_size: int,
+) -> None:
+    global _worker_pool, _worker_rules, _worker_scores, _worker_flags, _worker_output_dir, _worker_block_size
+    _worker_pool = pool
+    _worker_rules = load_compatibility_rules(rules_path)
+    _worker_scores = np.load(output_dir / "scores.npy", mmap_mode="r+")
+    _worker_flags = {kind: np.load(output_dir / f"{kind}.npy", mmap_mode="r+") for kind in FLAG_KINDS}
+    _worker_output_dir = output_dir
+    _worker_block_size = block_size
+
+
+def _score_block(block: tuple[int, int]) -> tuple[int, int]:
+    pool, scores, output_dir, block_size = _worker_pool, _worker_scores, _worker_output_dir, _worker_block_size
+    row_start = block[0] * block_size
+    column_start = block[1] * block_size
+    row_end = min(row_start + block_size, len(pool))
+    column_end = min(column_start + block_size, len(pool))
+
+    pairs = CompatibilityComparator.compare_pools(
+        pool.take(np.arange(row_start, row_end)),
+        pool.take(np.arange(column_start, column_end)),
+        _worker_rules,
+    )
+    rows, columns = np.indices(pairs.scores.shape)
+    rows += row_start
+    columns += column_start
+    upper = rows < columns
+
+    tile = scores[row_start:row_end, column_start:column_end]
+    tile[upper] = pairs.scores[upper]
+    scores.flush()
+    for kind, flags in _worker_flags.items():
+        flag_tile = flags[row_start:row_end, column_start:column_end]
+        flag_tile[upper] = getattr(pairs, kind)[upper]
+        flags.flush()
+
+    # Written after every matrix is flushed: an existing marker means the tile is finished.
+    _block_path(output_dir, block).touch()
+    return block
@@ -0,0 +1,410 @@
+"""
+Declarative compatibility rules.
+
+The rule table lives in `question_bank/compatibility_rules.json`, next to the question
+banks, so thresholds and wording can be reviewed and tuned without touching code.
+`load_compatibility_rules` validates the table and compiles every condition into a
+small closure tree built only from comparison and `&` / `|` operators. The same
+compiled rules therefore evaluate one pair (feature values are floats) and whole
+grids of pairs (feature values are broadcastable NumPy arrays).
+
+Features are the flat names produced by `CompatibilityComparator.profile_features`
+and `CompatibilityPool.features`, e.g. `needs.safety`, `provision.resource`,
+`eros.brake`, `shadow.anxious`, `facets.openness`, `attachment`, `priority_top`.
+
+Directions:
+    mutual      the condition already names both sides; evaluated once
+    symmetric   fires when the condition holds in either orientation
+    asymmetric  evaluated per orientation; each orientation is its own item and flag
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+import json
+import operator
+from typing import Any, Callable, Mapping
+
+import numpy as np
+
+from src.domain.needs import NEED_KEYS
+from src.question_bank import QUESTION_BANK_DIR
+
+COMPATIBILITY_RULES_PATH = QUESTION_BANK_DIR / "compatibility_rules.json"
+RULE_KINDS = ("tension", "strength", "note")
+RULE_DIRECTIONS = ("mutual", "symmetric", "asymmetric")
+ATTACHMENT_CODES = {"none": -1, "secure": 0, "anxious": 1, "avoidant": 2, "disorganized": 3}
+FEATURE_NAMES = frozenset(
+    [f"needs.{key}" for key in NEED_KEYS]
+    + [f"provision.{key}" for key in NEED_KEYS]
+    + ["eros.accelerator", "eros.brake"]
+    + [f"shadow.{style}" for style in ("secure", "anxious", "avoidant", "disorganized")]
+    + ["facets.openness", "facets.excitement_seeking", "facets.conscientiousness"]
+    + ["attachment", "priority_top"]
+)
+_MAX_FLAGS_PER_KIND = 32
+_OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+Features = Mapping[str, Any]
+Condition = Callable[[Features, Features], Any]
+
+
+class CompatibilityRuleError(ValueError):
+    """Raised when the compatibility rule table is malformed."""
+
+
+@dataclass(frozen=True)
+class ScoreWeights:
+    need_gap_weight: float
+    eros_gap_weight: float
+    tension_penalty: float
+
+
+@dataclass(frozen=True)
+class CompatibilityRule:
+    id: str
+    kind: str
+    direction: str
+    condition: Condition
+    severity: str
+    escalation: tuple[str, Condition] | None
+    measure: tuple[str, ...]
+    title: str
+    detail: str
+    # One flag bit per emitted orientation: two for asymmetric rules, one otherwise.
+    bits: tuple[int, ...]
+
+    def orientations(self) -> tuple[bool, ...]:
+        """False = first profile as `self`; True = second profile as `self`."""
+        return (False, True) if self.direction == "asymmetric" else (False,)
+
+    def holds(self, first: Features, second: Features, swapped: bool = False) -> Any:
+        if swapped:
+            return self.condition(second, first)
+        if self.direction == "symmetric":
+            forward = self.condition(first, second)
+            return forward if forward is True else forward | self.condition(second, first)
+        return self.condition(first, second)
+
+
+@dataclass(frozen=True)
+class FiredRule:
+    rule: CompatibilityRule
+    title: str
+    detail: str
+    severity: str
+
+
+@dataclass(frozen=True)
+class RuleFlags:
+    tensions: np.ndarray
+    strengths: np.ndarray
+    notes: np.ndarray
+    tension_count: np.ndarray
+
+
+class CompatibilityRuleSet:
+    def __init__(
+        self,
+        rules: tuple[CompatibilityRule, ...],
+        weights: ScoreWeights,
+        limits: Mapping[str, int],
+        need_labels: Mapping[str, str],
+        side_names: tuple[str, str],
+    ) -> None:
+        self.rules = rules
+        self.weights = weights
+        self.limits = dict(limits)
+        self.need_labels = dict(need_labels)
+        self.side_names = side_names
+
+    def evaluate(self, first: Features, second: Features) -> dict[str, list[FiredRule]]:
+        """Fired rules for one pair of scalar feature maps, grouped by kind in table order."""
+        fired: dict[str, list[FiredRule]] = {kind: [] for kind in RULE_KINDS}
+        template_values = (
+            self._template_values(first, second, swapped=False),
+            self._template_values(first, second, swapped=True),
+        )
+        for rule in self.rules:
+            for swapped in rule.orientations():
+                if not rule.holds(first, second, swapped):
+                    continue
+                own, other = (second, first) if swapped else (first, second)
+                severity = rule.severity
+                if rule.escalation is not None and rule.escalation[1](own, other):
+                    severity = rule.escalation[0]
+                values = template_values[swapped]
+                if rule.measure:
+                    values = {**values, "measure_points": _gap(own, other, rule.measure) * 100}
+                fired[rule.kind].append(
+                    FiredRule(
+                        rule=rule,
+                        title=rule.title.format(**values),
+                        detail=rule.detail.format(**values),
+                        severity=severity,
+                    )
+                )
+        return fired
+
+    def flags(self, first: Features, second: Features, shape: tuple[int, ...]) -> RuleFlags:
+        """Flag bitmasks per kind for array features that broadcast to `shape`."""
+        masks = {kind: np.zeros(shape, dtype=np.uint32) for kind in RULE_KINDS}
+        tension_count = np.zeros(shape, dtype=np.int64)
+        for rule in self.rules:
+            for swapped, bit in zip(rule.orientations(), rule.bits):
+                condition = np.broadcast_to(rule.holds(first, second, swapped), shape)
+                masks[rule.kind] |= np.where(condition, np.uint32(bit), np.uint32(0))
+                if rule.kind == "tension":
+                    tension_count += condition
+        return RuleFlags(
+            tensions=masks["tension"],
+            strengths=masks["strength"],
+            notes=masks["note"],
+            tension_count=tension_count,
+        )
+
+    def score(self, first: Features, second: Features, tension_count: Any) -> Any:
+        need_gap = 0.0
+        for key in NEED_KEYS:
+            need_gap = need_gap + abs(first[f"needs.{key}"] - second[f"needs.{key}"])
+        eros_gap = abs(first["eros.accelerator"] - second["eros.accelerator"]) + abs(
+            first["eros.brake"] - second["eros.brake"]
+        )
+        weights = self.weights
+        penalty = (
+            (need_gap / 4 * weights.need_gap_weight)
+            + (eros_gap / 2 * weights.eros_gap_weight)
+            + (tension_count * weights.tension_penalty)
+        )
+        if isinstance(penalty, np.ndarray):
+            return np.clip(1.0 - np.minimum(1.0, penalty), 0.0, 1.0)
+        return max(0.0, min(1.0, 1.0 - min(1.0, penalty)))
+
+    def flag_names(self, kind: str, mask: int) -> tuple[str, ...]:
+        """Decode a bitmask of `kind` into rule ids (`id:first` / `id:second` for asymmetric rules)."""
+        names: list[str] = []
+        for rule in self.rules:
+            if rule.kind != kind:
+                continue
+            for swapped, bit in zip(rule.orientations(), rule.bits):
+                if int(mask) & bit:
+                    suffix = (":second" if swapped else ":first") if rule.direction == "asymmetric" else ""
+                    names.append(rule.id + suffix)
+        return tuple(names)
+
+    def flag_bit(self, name: str) -> int:
+        rule_id, _, side = name.partition(":")
+        for rule in self.rules:
+            if rule.id == rule_id:
+                return rule.bits[1] if side == "second" else rule.bits[0]
+        raise KeyError(name)
+
+    def _template_values(self, first: Features, second: Features, swapped: bool) -> dict[str, Any]:
+        own_name, other_name = reversed(self.side_names) if swapped else self.side_names
+        need_labels = list(self.need_labels.values())
+        return {
+            "self_name": own_name,
+            "self_name_lower": own_name.lower(),
+            "other_name": other_name,
+            "other_name_lower": other_name.lower(),
+            "first_priority": need_labels[int(first["priority_top"])].lower(),
+            "second_priority": need_labels[int(second["priority_top"])].lower(),
+        }
+
+
+def _gap(own: Features, other: Features, fields: tuple[str, ...]) -> Any:
+    total = abs(own[fields[0]] - other[fields[0]])
+    for field_name in fields[1:]:
+        total = total + abs(own[field_name] - other[field_name])
+    return total
+
+
+def _expand(raw_rules: list[Any], groups: Mapping[str, list[Mapping[str, str]]]) -> list[dict[str, Any]]:
+    expanded: list[dict[str, Any]] = []
+    for raw_rule in raw_rules:
+        if not isinstance(raw_rule, dict):
+            raise CompatibilityRuleError("Each rule must be an object.")
+        if "for_each" not in raw_rule:
+            expanded.append(raw_rule)
+            continue
+        group = groups.get(raw_rule["for_each"])
+        if group is None:
+            raise CompatibilityRuleError(f"Unknown for_each group '{raw_rule['for_each']}'.")
+        for values in group:
+            for template_rule in raw_rule.get("rules", []):
+                expanded.append(_substitute(template_rule, values))
+    return expanded
+
+
+def _substitute(value: Any, values: Mapping[str, str]) -> Any:
+    if isinstance(value, str):
+        return Template(value).safe_substitute(values)
+    if isinstance(value, list):
+        return [_substitute(item, values) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, values) for key, item in value.items()}
+    return value
+
+
+def _compile_condition(raw: Any, rule_id: str) -> Condition:
+    if not isinstance(raw, dict):
+        raise CompatibilityRuleError(f"Rule '{rule_id}' has a condition that is not an object.")
+
+    for combinator, combine, decided in (("all", operator.and_, False), ("any", operator.or_, True)):
+        if combinator in raw:
+            parts = [_compile_condition(item, rule_id) for item in raw[combinator]]
+            if not parts:
+                raise CompatibilityRuleError(f"Rule '{rule_id}' has an empty '{combinator}' condition.")
+
+            def combined(own: Features, other: Features, parts=parts, combine=combine, decided=decided) -> Any:
+                result = parts[0](own, other)
+                for part in parts[1:]:
+                    # Scalar features give plain bools, so a single pair can stop early;
+                    # arrays are always combined in full.
+                    if result is decided:
+                        return result
+                    result = combine(result, part(own, other))
+                return result
+
+            return combined
+
+    compare = _OPERATORS.get(raw.get("op"))
+    if compare is None:
+        raise CompatibilityRuleError(f"Rule '{rule_id}' uses unsupported operator '{raw.get('op')}'.")
+
+    if "gap" in raw:
+        fields = tuple(_check_field(name, rule_id) for name in raw["gap"])
+        if not fields:
+            raise CompatibilityRuleError(f"Rule '{rule_id}' has an empty gap.")
+        threshold = _number(raw.get("value"), rule_id)
+        return lambda own, other: compare(_gap(own, other, fields), threshold)
+
+    sides = [side for side in ("self", "other") if side in raw]
+    if not sides:
+        raise CompatibilityRuleError(f"Rule '{rule_id}' has a term without 'self', 'other' or 'gap'.")
+    if len(sides) == 2:
+        own_field = _check_field(raw["self"], rule_id)
+        other_field = _check_field(raw["other"], rule_id)
+        return lambda own, other: compare(own[own_field], other[other_field])
+
+    side = sides[0]
+    field_name = _check_field(raw[side], rule_id)
+    threshold = _term_value(field_name, raw.get("value"), rule_id)
+    if side == "self":
+        return lambda own, other: compare(own[field_name], threshold)
+    return lambda own, other: compare(other[field_name], threshold)
+
+
+def _check_field(name: Any, rule_id: str) -> str:
+    if name not in FEATURE_NAMES:
+        raise CompatibilityRuleError(f"Rule '{rule_id}' references unknown feature '{name}'.")
+    return name
+
+
+def _term_value(field_name: str, value: Any, rule_id: str) -> float | int:
+    if field_name == "attachment":
+        if value not in ATTACHMENT_CODES:
+            raise CompatibilityRuleError(f"Rule '{rule_id}' uses unknown attachment style '{value}'.")
+        return ATTACHMENT_CODES[value]
+    if field_name == "priority_top":
+        if value not in NEED_KEYS:
+            raise CompatibilityRuleError(f"Rule '{rule_id}' uses unknown need '{value}'.")
+        return NEED_KEYS.index(value)
+    return _number(value, rule_id)
+
+
+def _number(value: Any, rule_id: str) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise CompatibilityRuleError(f"Rule '{rule_id}' needs a numeric threshold.")
+    return float(value)
+
+
+def load_compatibility_rules_from_payload(payload: Mapping[str, Any]) -> CompatibilityRuleSet:
+    try:
+        raw_needs = payload["needs"]
+        need_labels = {item["need"]: item["label"] for item in raw_needs}
+        if tuple(need_labels) != NEED_KEYS:
+            raise CompatibilityRuleError(f"Rule table needs must be listed as {NEED_KEYS}.")
+        raw_score = payload["score"]
+        weights = ScoreWeights(
+            need_gap_weight=float(raw_score["need_gap_weight"]),
+            eros_gap_weight=float(raw_score["eros_gap_weight"]),
+            tension_penalty=float(raw_score["tension_penalty"]),
+        )
+        limits = {kind: int(payload["limits"][f"{kind}s"]) for kind in RULE_KINDS}
+        side_names = (str(payload["sides"]["first"]), str(payload["sides"]["second"]))
+        raw_rules = _expand(payload["rules"], {"needs": raw_needs})
+    except (KeyError, TypeError) as exc:
+        raise CompatibilityRuleError(f"Rule table is missing or has a malformed field: {exc}") from exc
+    if min(weights.need_gap_weight, weights.eros_gap_weight, weights.tension_penalty) < 0:
+        raise CompatibilityRuleError("Score weights must not be negative.")
+
+    rules: list[CompatibilityRule] = []
+    next_bit = {kind: 0 for kind in RULE_KINDS}
+    seen_ids: set[str] = set()
+    for raw_rule in raw_rules:
+        rule_id = raw_rule.get("id")
+        if not isinstance(rule_id, str) or not rule_id or rule_id in seen_ids:
+            raise CompatibilityRuleError(f"Rule id '{rule_id}' is missing or duplicated.")
+        seen_ids.add(rule_id)
+        kind = raw_rule.get("kind")
+        direction = raw_rule.get("direction", "symmetric")
+        if kind not in RULE_KINDS:
+            raise CompatibilityRuleError(f"Rule '{rule_id}' has unsupported kind '{kind}'.")
+        if direction not in RULE_DIRECTIONS:
+            raise CompatibilityRuleError(f"Rule '{rule_id}' has unsupported direction '{direction}'.")
+
+        bit_count = 2 if direction == "asymmetric" else 1
+        if next_bit[kind] + bit_count > _MAX_FLAGS_PER_KIND:
+            raise CompatibilityRuleError(f"Too many {kind} rules for a {_MAX_FLAGS_PER_KIND}-bit flag mask.")
+        bits = tuple(1 << (next_bit[kind] + offset) for offset in range(bit_count))
+        next_bit[kind] += bit_count
+
+        escalation = None
+        if "escalate" in raw_rule:
+            raw_escalation = raw_rule["escalate"]
+            if not isinstance(raw_escalation, dict) or "severity" not in raw_escalation or "when" not in raw_escalation:
+                raise CompatibilityRuleError(f"Rule '{rule_id}' escalation must be an object with 'severity' and 'when'.")
+            escalation = (str(raw_escalation["severity"]), _compile_condition(raw_escalation["when"], rule_id))
+
+        rules.append(
+            CompatibilityRule(
+                id=rule_id,
+                kind=kind,
+                direction=direction,
+                condition=_compile_condition(raw_rule.get("when"), rule_id),
+                severity=str(raw_rule.get("severity", kind)),
+                escalation=escalation,
+                measure=tuple(_check_field(name, rule_id) for name in raw_rule.get("measure", [])),
+                title=str(raw_rule.get("title", "")),
+                detail=str(raw_rule.get("detail", "")),
+                bits=bits,
+            )
+        )
+
+    return CompatibilityRuleSet(
+        rules=tuple(rules),
+        weights=weights,
+        limits=limits,
+        need_labels=need_labels,
+        side_names=side_names,
+    )
+
+
+def load_compatibility_rules(path: Path = COMPATIBILITY_RULES_PATH) -> CompatibilityRuleSet:
+    return load_compatibility_rules_from_payload(json.loads(path.read_text(encoding="utf-8")))
+
+
+@lru_cache(maxsize=1)
+def get_compatibility_rules() -> CompatibilityRuleSet:
+    return load_compatibility_rules()
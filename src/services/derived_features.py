@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+import weakref
+
+from src.domain.needs import NEED_KEYS
+from src.domain.revision import domain_revision
+from src.services.neurodivergence import NeurodivergenceContext, NeurodivergenceService
+from src.services.provision import ProvisionProfile, ProvisionService
+from src.services.shadow_analysis import ShadowSignal, analyze_shadow
+
+if TYPE_CHECKING:
+    from src.profile import UserProfile
+
+
+@dataclass(frozen=True)
+class DomainAverages:
+    neuroticism: float
+    extraversion: float
+    openness: float
+    agreeableness: float
+    conscientiousness: float
+
+
+@dataclass(frozen=True)
+class DerivedFeatures:
+    """
+    Values every service derives from a `UserProfile`, computed once per profile.
+
+    `provision` is the questionnaire provision when the profile has one, otherwise the
+    Big Five estimate from `ProvisionService`; vectors follow `NEED_KEYS` order.
+    """
+
+    neurodivergence: NeurodivergenceContext
+    shadow: ShadowSignal
+    domain_averages: DomainAverages
+    needs: tuple[float, float, float, float]
+    priority: tuple[float, float, float, float]
+    provision: tuple[float, float, float, float]
+    estimated_provision: ProvisionProfile | None
+
+    def needs_map(self) -> dict[str, float]:
+        return dict(zip(NEED_KEYS, self.needs))
+
+    def priority_map(self) -> dict[str, float]:
+        return dict(zip(NEED_KEYS, self.priority))
+
+    def provision_map(self) -> dict[str, float]:
+        return dict(zip(NEED_KEYS, self.provision))
+
+
+# Keyed by `id(profile)`; the weak reference both confirms the key still names that profile
+# and drops the entry once the profile is garbage collected. An entry is only valid at the
+# domain revision it was computed at, so any write to a tracked component invalidates it.
+_derived_cache: dict[int, tuple[weakref.ref, int, DerivedFeatures]] = {}
+
+
+def get_derived_features(user: UserProfile) -> DerivedFeatures:
+    """Derived features of `user`, computed on first use and cached until a tracked component changes."""
+    key = id(user)
+    revision = domain_revision()
+    cached = _derived_cache.get(key)
+    if cached is not None and cached[0]() is user and cached[1] == revision:
+        return cached[2]
+    derived = derive_features(user)
+    _derived_cache[key] = (weakref.ref(user, lambda _, key=key: _derived_cache.pop(key, None)), revision, derived)
+    return derived
+
+
+def invalidate_derived_features(user: UserProfile) -> None:
+    """Forget the cached features of `user`; needed after in-place edits the revision cannot see (`provision[...] = ...`)."""
+    _derived_cache.pop(id(user), None)
+
+
+def derive_features(user: UserProfile) -> DerivedFeatures:
+    psycho = user.psychometrics
+    needs = user.needs
+    context = NeurodivergenceService.analyze(psycho)
+
+    estimated_provision = None
+    if user.provision is not None:
+        provision = tuple(user.provision.get(f"{key}_provision", 0.0) for key in NEED_KEYS)
+    else:
+        estimated_provision = ProvisionService.analyze(psycho, user.professional, context=context)
+        provision = (
+            estimated_provision.safety_score,
+            estimated_provision.resource_score,
+            estimated_provision.resonance_score,
+            estimated_provision.expansion_score,
+        )
+
+    return DerivedFeatures(
+        neurodivergence=context,
+        shadow=analyze_shadow(user.shadow),
+        domain_averages=DomainAverages(
+            neuroticism=psycho.neuroticism.average,
+            extraversion=psycho.extraversion.average,
+            openness=psycho.openness.average,
+            agreeableness=psycho.agreeableness.average,
+            conscientiousness=psycho.conscientiousness.average,
+        ),
+        needs=(needs.adjusted_safety, needs.adjusted_resource, needs.adjusted_resonance, needs.adjusted_expansion),
+        priority=(needs.priority_safety, needs.priority_resource, needs.priority_resonance, needs.priority_expansion),
+        provision=provision,
+        estimated_provision=estimated_provision,
+    )
@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Mapping
 
-from src.question_bank import QuestionBank, QuestionResponse, question_state_key
+from src.question_bank import QuestionBank, QuestionResponse
 
 
 @dataclass(frozen=True)
@@ -20,17 +20,14 @@ def collect_bank_responses(bank: QuestionBank, state: Mapping[str, object]) -> B
     responses: dict[str, QuestionResponse] = {}
     missing_questions: list[str] = []
 
-    for question in bank.questions:
+    for question, state_keys in zip(bank.questions, bank.state_keys()):
         if question.is_best_worst:
-            best_key = question_state_key(bank.module, question.id, "best")
-            worst_key = question_state_key(bank.module, question.id, "worst")
+            best_key, worst_key = state_keys
             best_value = state.get(best_key)
             worst_value = state.get(worst_key)
             if (
-                isinstance(best_value, str)
-                and isinstance(worst_value, str)
-                and best_value in question.option_ids()
-                and worst_value in question.option_ids()
+                question.has_option(best_value)
+                and question.has_option(worst_value)
                 and best_value != worst_value
             ):
                 responses[question.id] = QuestionResponse.best_worst(best_value, worst_value)
@@ -39,9 +36,8 @@ def collect_bank_responses(bank: QuestionBank, state: Mapping[str, object]) -> B
                     f"{question.question} (оберіть окремо найважливіше і найменш критичне)"
                 )
         else:
-            state_key = question_state_key(bank.module, question.id)
-            raw_value = state.get(state_key)
-            if isinstance(raw_value, str) and raw_value in question.option_ids():
+            raw_value = state.get(state_keys[0])
+            if question.has_option(raw_value):
                 responses[question.id] = QuestionResponse.single_choice(raw_value)
             else:
                 missing_questions.append(question.question)
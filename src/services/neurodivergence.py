@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from src.domain.psychometrics import PsychometricsComponent
+import numpy as np
+
+from src.domain.psychometrics import FACET_INDEX, PsychometricsComponent
 
 
 def _clamp(value: float) -> float:
@@ -13,6 +15,38 @@ def _mean(*values: float) -> float:
     return sum(values) / len(values)
 
 
+# Facets averaged into each target; `resource` is one minus its average.
+TARGET_FACETS: dict[str, tuple[tuple[str, str], ...]] = {
+    "safety": (("neuroticism", "anxiety"), ("neuroticism", "vulnerability")),
+    "resource": (
+        ("conscientiousness", "order"),
+        ("conscientiousness", "self_discipline"),
+        ("conscientiousness", "competence"),
+    ),
+    "resonance": (
+        ("openness", "feelings"),
+        ("agreeableness", "tender_mindedness"),
+        ("agreeableness", "straightforwardness"),
+    ),
+    "expansion": (("extraversion", "excitement_seeking"), ("openness", "actions")),
+}
+INVERTED_TARGETS = frozenset({"resource"})
+# (condition, target, offset) in the order they apply; each step clamps to [0, 1].
+TARGET_ADJUSTMENTS: tuple[tuple[str, str, float], ...] = (
+    ("asd", "safety", 0.15),
+    ("asd", "resonance", 0.08),
+    ("adhd", "resource", 0.15),
+    ("adhd", "expansion", 0.12),
+    ("audhd", "safety", 0.05),
+    ("audhd", "resource", 0.05),
+)
+SUPPORT_NOTES = {
+    "asd": "Пряма мова, сенсорна передбачуваність і час на відновлення можуть бути важливіші за читання між рядків.",
+    "adhd": "Зовнішні опори, явний розподіл задач і низький побутовий friction можуть впливати на сумісність сильніше за добрі наміри.",
+    "audhd": "AuDHD-профіль часто потребує одночасно новизни й передбачуваності; це краще трактувати як вимогу до середовища, а не як суперечливість.",
+}
+
+
 @dataclass(frozen=True)
 class NeurodivergenceContext:
     label: str | None
@@ -38,60 +72,53 @@ class NeurodivergenceService:
 
     @staticmethod
     def analyze(psycho: PsychometricsComponent) -> NeurodivergenceContext:
-        label = psycho.neurodivergence_label
-        safety_target = _mean(
-            psycho.neuroticism.anxiety,
-            psycho.neuroticism.vulnerability,
-        )
-        resource_target = 1.0 - _mean(
-            psycho.conscientiousness.order,
-            psycho.conscientiousness.self_discipline,
-            psycho.conscientiousness.competence,
-        )
-        resonance_target = _mean(
-            psycho.openness.feelings,
-            psycho.agreeableness.tender_mindedness,
-            psycho.agreeableness.straightforwardness,
-        )
-        expansion_signal = _mean(
-            psycho.extraversion.excitement_seeking,
-            psycho.openness.actions,
-        )
-        resource_provision_penalty = 0.0
-        support_notes: list[str] = []
-
-        if psycho.has_asd:
-            safety_target = _clamp(safety_target + 0.15)
-            resonance_target = _clamp(resonance_target + 0.08)
-            support_notes.append(
-                "Пряма мова, сенсорна передбачуваність і час на відновлення можуть бути важливіші за читання між рядків."
-            )
+        conditions = {
+            "asd": psycho.has_asd,
+            "adhd": psycho.has_adhd,
+            "audhd": psycho.has_adhd and psycho.has_asd,
+        }
+        targets = {}
+        for target, facets in TARGET_FACETS.items():
+            average = _mean(*(getattr(getattr(psycho, domain), facet) for domain, facet in facets))
+            targets[target] = 1.0 - average if target in INVERTED_TARGETS else average
+        for condition, target, offset in TARGET_ADJUSTMENTS:
+            if conditions[condition]:
+                targets[target] = _clamp(targets[target] + offset)
 
+        resource_provision_penalty = 0.0
         if psycho.has_adhd:
-            resource_target = _clamp(resource_target + 0.15)
-            expansion_signal = _clamp(expansion_signal + 0.12)
             executive_friction = 1.0 - _mean(
                 psycho.conscientiousness.order,
                 psycho.conscientiousness.self_discipline,
             )
             resource_provision_penalty = 0.12 * executive_friction
-            support_notes.append(
-                "Зовнішні опори, явний розподіл задач і низький побутовий friction можуть впливати на сумісність сильніше за добрі наміри."
-            )
-
-        if psycho.has_adhd and psycho.has_asd:
-            safety_target = _clamp(safety_target + 0.05)
-            resource_target = _clamp(resource_target + 0.05)
-            support_notes.append(
-                "AuDHD-профіль часто потребує одночасно новизни й передбачуваності; це краще трактувати як вимогу до середовища, а не як суперечливість."
-            )
 
         return NeurodivergenceContext(
-            label=label,
-            safety_target=safety_target,
-            resource_target=resource_target,
-            resonance_target=resonance_target,
-            expansion_signal=expansion_signal,
+            label=psycho.neurodivergence_label,
+            safety_target=targets["safety"],
+            resource_target=targets["resource"],
+            resonance_target=targets["resonance"],
+            expansion_signal=targets["expansion"],
             resource_provision_penalty=resource_provision_penalty,
-            support_notes=tuple(support_notes),
+            support_notes=tuple(note for condition, note in SUPPORT_NOTES.items() if conditions[condition]),
         )
+
+    @staticmethod
+    def targets_batch(facets: np.ndarray, has_adhd: np.ndarray, has_asd: np.ndarray) -> np.ndarray:
+        """
+        Safety / resource / resonance / expansion targets of `analyze` for an N x 30 facet matrix.
+        """
+        adhd = np.asarray(has_adhd, dtype=bool)
+        asd = np.asarray(has_asd, dtype=bool)
+        conditions = {"asd": asd, "adhd": adhd, "audhd": adhd & asd}
+        targets = {}
+        for target, target_facets in TARGET_FACETS.items():
+            # Summed left to right like `_mean`, so both paths round identically.
+            total = np.zeros(facets.shape[0])
+            for domain, facet in target_facets:
+                total = total + facets[:, FACET_INDEX[(domain, facet)]]
+            average = total / len(target_facets)
+            targets[target] = 1.0 - average if target in INVERTED_TARGETS else average
+        for condition, target, offset in TARGET_ADJUSTMENTS:
+            targets[target] = np.where(conditions[condition], np.clip(targets[target] + offset, 0.0, 1.0), targets[target])
+        return np.stack([targets[target] for target in TARGET_FACETS], axis=1)
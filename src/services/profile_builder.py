@@ -5,6 +5,7 @@ from typing import Any, Mapping
 
 from src.data import EROS_TAGS_EXPLANATIONS
 from src.domain.eros import ErosComponent
+from src.domain.needs import RelationalNeedsComponent
 from src.domain.professional import ProfessionalComponent
 from src.domain.psychometrics import PsychometricsComponent
 from src.domain.shadow import ShadowComponent
@@ -12,13 +13,21 @@ from src.enums import AttachmentStyle, ConflictResponse, ContextDependency, Holl
 from src.profile import UserProfile
 from src.question_bank import QuestionBankRegistry
 from src.services.adjustment import NeedsAdjustmentService
-from src.services.bigfive_pdf_parser import FACET_SPECS
+from src.services.bigfive_facets import FACET_SPECS
 from src.services.form_state import collect_bank_responses
+from src.services.profile_graph import DependencyGraph
 from src.services.scoring import QuestionnaireScorer
 
 
 QUESTIONNAIRE_MODE_KEY = "questionnaire_mode"
 QUESTIONNAIRE_MODES = {"simple", "extended", "full"}
+# State keys read outside the question banks, per component.
+PSYCHOMETRICS_KEYS = ("psycho_o", "psycho_c", "psycho_e", "psycho_a", "psycho_n", "psycho_adhd", "psycho_asd") + tuple(
+    spec.session_key for spec in FACET_SPECS
+)
+SHADOW_KEYS = ("shadow_input_mode", "shadow_manual_att", "shadow_manual_conf", "shadow_manual_reg")
+EROS_KEYS = ("eros_tags", "eros_input_mode", "eros_manual_acc", "eros_manual_brk", "eros_manual_ctx")
+PROFESSIONAL_KEYS = ("prof_primary", "prof_secondary", "prof_tertiary", "prof_centrality")
 
 
 @dataclass(frozen=True)
@@ -127,67 +136,176 @@ def _build_professional(state: Mapping[str, Any]) -> ProfessionalComponent:
     )
 
 
-def build_user_profile_from_state(
-    state: Mapping[str, Any],
-    registry: QuestionBankRegistry,
-    *,
-    name: str = "User",
-) -> BuiltProfile:
-    mode = normalize_questionnaire_mode(state.get(QUESTIONNAIRE_MODE_KEY))
-    missing: list[str] = []
-    psycho = _build_psychometrics(state)
-
-    shadow, shadow_missing = _build_shadow(state, registry, mode)
-    missing.extend(f"Shadow: {item}" for item in shadow_missing)
+def _build_needs_scores(
+    state: Mapping[str, Any], registry: QuestionBankRegistry, mode: str
+) -> tuple[RelationalNeedsComponent | None, list[str]]:
+    bank = registry.get("needs").for_mode(mode)
+    response_state = collect_bank_responses(bank, state)
+    if not response_state.is_complete:
+        return None, list(response_state.missing_questions)
+    return QuestionnaireScorer.build_needs_component(bank, response_state.responses), []
 
-    eros, eros_missing = _build_eros(state, registry, mode)
-    missing.extend(f"Eros: {item}" for item in eros_missing)
 
-    needs_bank = registry.get("needs").for_mode(mode)
-    needs_state = collect_bank_responses(needs_bank, state)
-    needs = None
-    if not needs_state.is_complete:
-        missing.extend(f"Needs: {item}" for item in needs_state.missing_questions)
-    
-    provision_scores = None
+def _build_full_mode_scores(
+    state: Mapping[str, Any], registry: QuestionBankRegistry, mode: str, module: str
+) -> tuple[dict[str, float] | None, list[str]]:
+    """Provision or calibration scores; both banks are only asked in full mode."""
+    if mode != "full":
+        return None, []
+    bank = registry.get(module).for_mode(mode)
+    response_state = collect_bank_responses(bank, state)
+    if not response_state.is_complete:
+        return None, list(response_state.missing_questions)
+    if module == "provision":
+        return QuestionnaireScorer.build_provision_scores(bank, response_state.responses), []
+    return QuestionnaireScorer.build_calibration_scores(bank, response_state.responses), []
+
+
+def _adjust_needs(
+    raw_needs: RelationalNeedsComponent | None,
+    psycho: PsychometricsComponent,
+    calibration_scores: dict[str, float] | None,
+) -> tuple[RelationalNeedsComponent | None, list[str]]:
+    if raw_needs is None:
+        return None, []
     calibration_notes: list[str] = []
-    calib_scores = None
-
-    if mode == "full":
-        prov_bank = registry.get("provision").for_mode(mode)
-        prov_state = collect_bank_responses(prov_bank, state)
-        if not prov_state.is_complete:
-            missing.extend(f"Provision: {item}" for item in prov_state.missing_questions)
-        else:
-            provision_scores = QuestionnaireScorer.build_provision_scores(prov_bank, prov_state.responses)
-
-        calib_bank = registry.get("calibration").for_mode(mode)
-        calib_state = collect_bank_responses(calib_bank, state)
-        if not calib_state.is_complete:
-            missing.extend(f"Calibration: {item}" for item in calib_state.missing_questions)
-        else:
-            calib_scores = QuestionnaireScorer.build_calibration_scores(calib_bank, calib_state.responses)
-
-    if needs_state.is_complete:
-        needs = QuestionnaireScorer.build_needs_component(needs_bank, needs_state.responses)
-        needs = NeedsAdjustmentService.adjust_needs(
-            needs, psycho, calibration_scores=calib_scores, calibration_notes=calibration_notes
-        )
-
-    if missing or shadow is None or eros is None or needs is None:
+    needs = NeedsAdjustmentService.adjust_needs(
+        raw_needs, psycho, calibration_scores=calibration_scores, calibration_notes=calibration_notes
+    )
+    return needs, calibration_notes
+
+
+def _assemble_profile(
+    name: str,
+    mode: str,
+    psycho: PsychometricsComponent,
+    shadow: tuple[ShadowComponent | None, list[str]],
+    eros: tuple[ErosComponent | None, list[str]],
+    needs_scores: tuple[RelationalNeedsComponent | None, list[str]],
+    provision: tuple[dict[str, float] | None, list[str]],
+    calibration: tuple[dict[str, float] | None, list[str]],
+    needs: tuple[RelationalNeedsComponent | None, list[str]],
+    professional: ProfessionalComponent,
+) -> BuiltProfile:
+    missing = [
+        *(f"Shadow: {item}" for item in shadow[1]),
+        *(f"Eros: {item}" for item in eros[1]),
+        *(f"Needs: {item}" for item in needs_scores[1]),
+        *(f"Provision: {item}" for item in provision[1]),
+        *(f"Calibration: {item}" for item in calibration[1]),
+    ]
+    if missing or shadow[0] is None or eros[0] is None or needs[0] is None:
         return BuiltProfile(user=None, missing_inputs=tuple(missing), mode=mode)
 
     return BuiltProfile(
         user=UserProfile(
             name=name,
             psychometrics=psycho,
-            shadow=shadow,
-            eros=eros,
-            needs=needs,
-            professional=_build_professional(state),
-            provision=provision_scores,
-            calibration_notes=calibration_notes,
+            shadow=shadow[0],
+            eros=eros[0],
+            needs=needs[0],
+            professional=professional,
+            provision=provision[0],
+            calibration_notes=needs[1],
         ),
         missing_inputs=(),
         mode=mode,
     )
+
+
+def build_user_profile_from_state(
+    state: Mapping[str, Any],
+    registry: QuestionBankRegistry,
+    *,
+    name: str = "User",
+) -> BuiltProfile:
+    mode = normalize_questionnaire_mode(state.get(QUESTIONNAIRE_MODE_KEY))
+    psycho = _build_psychometrics(state)
+    needs_scores = _build_needs_scores(state, registry, mode)
+    calibration = _build_full_mode_scores(state, registry, mode, "calibration")
+    return _assemble_profile(
+        name,
+        mode,
+        psycho,
+        _build_shadow(state, registry, mode),
+        _build_eros(state, registry, mode),
+        needs_scores,
+        _build_full_mode_scores(state, registry, mode, "provision"),
+        calibration,
+        _adjust_needs(needs_scores[0], psycho, calibration[0]),
+        _build_professional(state),
+    )
+
+
+def _bank_state_keys(registry: QuestionBankRegistry, module: str) -> tuple[str, ...]:
+    return tuple(key for keys in registry.get(module).state_keys() for key in keys)
+
+
+class IncrementalProfileBuilder:
+    """
+    `build_user_profile_from_state` as a memoized `DependencyGraph`: each component is
+    rebuilt only when the state keys it reads, or a component it depends on, changed since
+    the previous `build`. Results are equal to a full rebuild; components that did not
+    change are the same objects as in the previous result and must not be mutated.
+    """
+
+    def __init__(self, registry: QuestionBankRegistry, *, name: str = "User") -> None:
+        self.registry = registry
+        self.name = name
+        graph = DependencyGraph()
+        graph.add_node(
+            "mode",
+            lambda state: normalize_questionnaire_mode(state.get(QUESTIONNAIRE_MODE_KEY)),
+            keys=(QUESTIONNAIRE_MODE_KEY,),
+        )
+        graph.add_node("psychometrics", _build_psychometrics, keys=PSYCHOMETRICS_KEYS)
+        graph.add_node(
+            "shadow",
+            lambda state, mode: _build_shadow(state, registry, mode),
+            keys=SHADOW_KEYS + _bank_state_keys(registry, "shadow"),
+            dependencies=("mode",),
+        )
+        graph.add_node(
+            "eros",
+            lambda state, mode: _build_eros(state, registry, mode),
+            keys=EROS_KEYS + _bank_state_keys(registry, "eros"),
+            dependencies=("mode",),
+        )
+        graph.add_node(
+            "needs_scores",
+            lambda state, mode: _build_needs_scores(state, registry, mode),
+            keys=_bank_state_keys(registry, "needs"),
+            dependencies=("mode",),
+        )
+        for module in ("provision", "calibration"):
+            graph.add_node(
+                module,
+                lambda state, mode, module=module: _build_full_mode_scores(state, registry, mode, module),
+                keys=_bank_state_keys(registry, module),
+                dependencies=("mode",),
+            )
+        graph.add_node(
+            "needs",
+            lambda _, needs_scores, psycho, calibration: _adjust_needs(needs_scores[0], psycho, calibration[0]),
+            dependencies=("needs_scores", "psychometrics", "calibration"),
+        )
+        graph.add_node("professional", _build_professional, keys=PROFESSIONAL_KEYS)
+        graph.add_node(
+            "profile",
+            lambda _, *components: _assemble_profile(name, *components),
+            dependencies=(
+                "mode",
+                "psychometrics",
+                "shadow",
+                "eros",
+                "needs_scores",
+                "provision",
+                "calibration",
+                "needs",
+                "professional",
+            ),
+        )
+        self.graph = graph
+
+    def build(self, state: Mapping[str, Any]) -> BuiltProfile:
+        return self.graph.evaluate(state)["profile"]
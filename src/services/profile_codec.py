@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field, replace
 from datetime import datetime, UTC
 import base64
 import hashlib
@@ -9,6 +10,21 @@ import json
 import zlib
 from typing import Any
 
+from src.profile_dictionary import compress, decompress, profile_dictionaries
+from src.question_bank import QuestionBankRegistry
+from src.question_bank_history import archived_snapshot_path, find_registry
+from src.services.profile_packing import (
+    BINARY_VERSION,
+    CHECKSUM_SIZE,
+    ProfilePackingError,
+    get_profile_layout,
+    packed_checksum,
+    read_fingerprint,
+)
+
+
+_CANONICAL_JSON = json.JSONEncoder(sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
 
 class ProfileCodecError(ValueError):
     """Raised when encoded profile data is malformed or invalid."""
@@ -21,23 +37,48 @@ class ProfilePayload:
     state: dict[str, Any]
     created_at: str
     checksum: str
+    # Checksummed form of `state`, kept so encoding and re-validation skip serializing it again:
+    # canonical JSON for 4.0 / 4.1, packed bytes for 5.0. `state` must not be mutated once this is set.
+    _canonical: str | bytes | None = field(default=None, compare=False, repr=False)
 
 
 class ProfileCodec:
     FORMAT_VERSION = "4.0"
+    # The 4.0 JSON payload compressed against a saved preset dictionary of its bank version.
+    DICTIONARY_FORMAT_VERSION = "4.1"
+    # Answers packed as option indexes against the bank named by the fingerprint; see `profile_packing`.
+    BINARY_FORMAT_VERSION = "5.0"
+    # Leads every 4.1 string: marker, 8-byte fingerprint, zlib stream.
+    DICTIONARY_MARKER = 0x04
+
+    @staticmethod
+    def _canonical_state(payload: ProfilePayload) -> str:
+        if isinstance(payload._canonical, str):
+            return payload._canonical
+        return _CANONICAL_JSON.encode(payload.state)
 
     @staticmethod
-    def _canonical_payload_data(payload_data: Mapping[str, Any]) -> str:
-        return json.dumps(
-            payload_data,
-            sort_keys=True,
-            ensure_ascii=False,
-            separators=(",", ":"),
+    def _canonical_document(
+        format_version: str,
+        bank_fingerprint: str,
+        created_at: str,
+        state_json: str,
+        checksum: str | None = None,
+    ) -> str:
+        """
+        Same text as `json.dumps(..., sort_keys=True)` of the payload fields, assembled around an
+        already serialized state. Without `checksum` this is the text the checksum is taken over.
+        """
+        quote = _CANONICAL_JSON.encode
+        checksum_field = "" if checksum is None else f'"checksum":{quote(checksum)},'
+        return (
+            f'{{"bank_fingerprint":{quote(bank_fingerprint)},{checksum_field}"created_at":{quote(created_at)},'
+            f'"format_version":{quote(format_version)},"state":{state_json}}}'
         )
 
     @staticmethod
-    def _calculate_checksum(payload_data: Mapping[str, Any]) -> str:
-        canonical = ProfileCodec._canonical_payload_data(payload_data)
+    def _calculate_checksum(format_version: str, bank_fingerprint: str, created_at: str, state_json: str) -> str:
+        canonical = ProfileCodec._canonical_document(format_version, bank_fingerprint, created_at, state_json)
         return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
 
     @staticmethod
@@ -45,16 +86,69 @@ class ProfileCodec:
         state: Mapping[str, Any],
         bank_fingerprint: str,
         created_at: str | None = None,
+        *,
+        format_version: str = FORMAT_VERSION,
     ) -> ProfilePayload:
+        """JSON payload: 4.0, or 4.1 for strings compressed against the bank version's saved dictionary."""
+        if format_version not in (ProfileCodec.FORMAT_VERSION, ProfileCodec.DICTIONARY_FORMAT_VERSION):
+            raise ProfileCodecError(f"Profile format {format_version} is not a JSON format.")
         created_at = created_at or datetime.now(UTC).isoformat()
-        payload_data = {
-            "format_version": ProfileCodec.FORMAT_VERSION,
-            "bank_fingerprint": bank_fingerprint,
-            "state": dict(state),
-            "created_at": created_at,
-        }
-        checksum = ProfileCodec._calculate_checksum(payload_data)
-        return ProfilePayload(checksum=checksum, **payload_data)
+        state = dict(state)
+        state_json = _CANONICAL_JSON.encode(state)
+        return ProfilePayload(
+            format_version=format_version,
+            bank_fingerprint=bank_fingerprint,
+            state=state,
+            created_at=created_at,
+            checksum=ProfileCodec._calculate_checksum(format_version, bank_fingerprint, created_at, state_json),
+            _canonical=state_json,
+        )
+
+    @staticmethod
+    def build_binary_payload(
+        state: Mapping[str, Any],
+        registry: QuestionBankRegistry,
+        created_at: str | None = None,
+    ) -> ProfilePayload:
+        """5.0 payload; the state and timestamp come back in the exact form the packed bytes decode to."""
+        created_at = created_at or datetime.now(UTC).isoformat()
+        layout = get_profile_layout(registry)
+        try:
+            packed = layout.pack(state, created_at)
+            created_at, packed_state = layout.unpack(packed)
+        except ProfilePackingError as exc:
+            raise ProfileCodecError(str(exc)) from exc
+        return ProfilePayload(
+            format_version=ProfileCodec.BINARY_FORMAT_VERSION,
+            bank_fingerprint=registry.fingerprint,
+            state=packed_state,
+            created_at=created_at,
+            checksum=packed_checksum(packed).hex(),
+            _canonical=packed,
+        )
+
+    @staticmethod
+    def build_compact_payload(
+        state: Mapping[str, Any],
+        registry: QuestionBankRegistry,
+        created_at: str | None = None,
+    ) -> ProfilePayload:
+        """
+        5.0 payload when the state fits the binary layout, otherwise a 4.1 payload, or 4.0 when
+        the bank version has no committed dictionary. 5.0 strings only decode while their bank version is known,
+        so they are only made for a registry whose snapshot is already committed to the question
+        bank history; any other registry gets a JSON payload. Nothing is written here.
+        """
+        if archived_snapshot_path(registry) is not None:
+            try:
+                return ProfileCodec.build_binary_payload(state, registry, created_at)
+            except ProfileCodecError:
+                pass
+        if profile_dictionaries(registry.fingerprint):
+            return ProfileCodec.build_payload(
+                state, registry.fingerprint, created_at, format_version=ProfileCodec.DICTIONARY_FORMAT_VERSION
+            )
+        return ProfileCodec.build_payload(state, registry.fingerprint, created_at)
 
     @staticmethod
     def to_json_dict(payload: ProfilePayload) -> dict[str, Any]:
@@ -68,6 +162,35 @@ class ProfileCodec:
 
     @staticmethod
     def from_json_dict(raw_payload: Mapping[str, Any]) -> ProfilePayload:
+        return ProfileCodec._from_json(raw_payload)
+
+    @staticmethod
+    def from_json_text(raw_json: str) -> ProfilePayload:
+        """
+        Parse and verify a JSON payload. Canonical text, as written by `to_json_text` and held
+        inside 4.0 and 4.1 strings, is verified against its own state text without serializing it again.
+        """
+        try:
+            raw_payload = json.loads(raw_json)
+        except json.JSONDecodeError as exc:
+            raise ProfileCodecError(str(exc)) from exc
+        if not isinstance(raw_payload, dict):
+            raise ProfileCodecError("Profile payload must be a JSON object.")
+        return ProfileCodec._from_json(raw_payload, raw_json)
+
+    @staticmethod
+    def to_json_text(payload: ProfilePayload) -> str:
+        """Canonical JSON of `to_json_dict(payload)`."""
+        return ProfileCodec._canonical_document(
+            payload.format_version,
+            payload.bank_fingerprint,
+            payload.created_at,
+            ProfileCodec._canonical_state(payload),
+            payload.checksum,
+        )
+
+    @staticmethod
+    def _from_json(raw_payload: Mapping[str, Any], raw_json: str | None = None) -> ProfilePayload:
         required_fields = {
             "format_version",
             "bank_fingerprint",
@@ -88,30 +211,56 @@ class ProfileCodec:
             created_at=str(raw_payload["created_at"]),
             checksum=str(raw_payload["checksum"]),
         )
+        if raw_json is not None and payload.format_version != ProfileCodec.BINARY_FORMAT_VERSION:
+            state_json = ProfileCodec._embedded_state_json(payload, raw_json)
+            if state_json is not None and payload.checksum == ProfileCodec._calculate_checksum(
+                payload.format_version, payload.bank_fingerprint, payload.created_at, state_json
+            ):
+                return replace(payload, _canonical=state_json)
+
+        # Serialize the state once for the checksum and keep it for any later encode.
+        if payload.format_version == ProfileCodec.BINARY_FORMAT_VERSION:
+            canonical: str | bytes = ProfileCodec._pack(payload)
+        else:
+            canonical = ProfileCodec._canonical_state(payload)
+        payload = replace(payload, _canonical=canonical)
         ProfileCodec.validate_payload(payload)
         return payload
 
+    @staticmethod
+    def _embedded_state_json(payload: ProfilePayload, raw_json: str) -> str | None:
+        """The state's text inside `raw_json` when the document around it is laid out canonically."""
+        prefix = ProfileCodec._canonical_document(
+            payload.format_version, payload.bank_fingerprint, payload.created_at, "", payload.checksum
+        )[:-1]
+        if raw_json.startswith(prefix) and raw_json.endswith("}"):
+            return raw_json[len(prefix) : -1]
+        return None
+
     @staticmethod
     def validate_payload(payload: ProfilePayload) -> None:
-        payload_data = {
-            "format_version": payload.format_version,
-            "bank_fingerprint": payload.bank_fingerprint,
-            "state": payload.state,
-            "created_at": payload.created_at,
-        }
-        expected_checksum = ProfileCodec._calculate_checksum(payload_data)
+        if payload.format_version == ProfileCodec.BINARY_FORMAT_VERSION:
+            if packed_checksum(ProfileCodec._pack(payload)).hex() != payload.checksum:
+                raise ProfileCodecError("Profile payload checksum mismatch.")
+            return
+
+        expected_checksum = ProfileCodec._calculate_checksum(
+            payload.format_version,
+            payload.bank_fingerprint,
+            payload.created_at,
+            ProfileCodec._canonical_state(payload),
+        )
         if expected_checksum != payload.checksum:
             raise ProfileCodecError("Profile payload checksum mismatch.")
 
     @staticmethod
     def encode_payload(payload: ProfilePayload) -> str:
-        raw_json = json.dumps(
-            ProfileCodec.to_json_dict(payload),
-            sort_keys=True,
-            ensure_ascii=False,
-            separators=(",", ":"),
-        ).encode("utf-8")
-        compressed = zlib.compress(raw_json)
+        if payload.format_version == ProfileCodec.BINARY_FORMAT_VERSION:
+            packed = ProfileCodec._pack(payload)
+            return base64.urlsafe_b64encode(packed + packed_checksum(packed)).decode("ascii").rstrip("=")
+
+        raw_json = ProfileCodec.to_json_text(payload).encode("utf-8")
+        compressed = ProfileCodec._compress(raw_json, payload.format_version, payload.bank_fingerprint)
         encoded = base64.urlsafe_b64encode(compressed).decode("ascii")
         return encoded.rstrip("=")
 
@@ -120,6 +269,21 @@ class ProfileCodec:
         payload = ProfileCodec.build_payload(state=state, bank_fingerprint=bank_fingerprint)
         return ProfileCodec.encode_payload(payload)
 
+    @staticmethod
+    def encode_many(payloads: Iterable[ProfilePayload]) -> Iterator[str]:
+        """Encode payloads lazily, one string per payload."""
+        for payload in payloads:
+            yield ProfileCodec.encode_payload(payload)
+
+    @staticmethod
+    def decode_many(encoded_payloads: Iterable[str]) -> Iterator[ProfilePayload | ProfileCodecError]:
+        """Decode strings lazily; a string that fails to decode yields its error instead of ending the stream."""
+        for encoded_payload in encoded_payloads:
+            try:
+                yield ProfileCodec.decode_string(encoded_payload)
+            except ProfileCodecError as exc:
+                yield exc
+
     @staticmethod
     def decode_string(encoded_payload: str) -> ProfilePayload:
         encoded_payload = encoded_payload.strip()
@@ -129,9 +293,80 @@ class ProfileCodec:
         padding = "=" * (-len(encoded_payload) % 4)
         try:
             compressed = base64.urlsafe_b64decode(encoded_payload + padding)
-            raw_json = zlib.decompress(compressed).decode("utf-8")
-            raw_payload = json.loads(raw_json)
+        except Exception as exc:  # noqa: BLE001
+            raise ProfileCodecError("Unable to decode profile string.") from exc
+        # zlib streams start with 0x78, so the first byte tells the formats apart.
+        if compressed[:1] == bytes([BINARY_VERSION]):
+            return ProfileCodec._decode_binary(compressed)
+
+        try:
+            raw_json = ProfileCodec._decompress(compressed).decode("utf-8")
         except Exception as exc:  # noqa: BLE001
             raise ProfileCodecError("Unable to decode profile string.") from exc
 
-        return ProfileCodec.from_json_dict(raw_payload)
+        payload = ProfileCodec.from_json_text(raw_json)
+        if compressed[:1] == bytes([ProfileCodec.DICTIONARY_MARKER]) and (
+            payload.format_version != ProfileCodec.DICTIONARY_FORMAT_VERSION
+        ):
+            raise ProfileCodecError(
+                f"Dictionary-compressed profile strings must hold a {ProfileCodec.DICTIONARY_FORMAT_VERSION} payload."
+            )
+        return payload
+
+    @staticmethod
+    def _compress(raw_json: bytes, format_version: str, bank_fingerprint: str) -> bytes:
+        if format_version != ProfileCodec.DICTIONARY_FORMAT_VERSION:
+            return zlib.compress(raw_json)
+        dictionaries = profile_dictionaries(bank_fingerprint)
+        try:
+            fingerprint_bytes = bytes.fromhex(bank_fingerprint)
+        except ValueError:
+            fingerprint_bytes = b""
+        if not dictionaries or len(fingerprint_bytes) != 8:
+            raise ProfileCodecError(f"No saved profile dictionary for question bank version '{bank_fingerprint}'.")
+        return bytes([ProfileCodec.DICTIONARY_MARKER]) + fingerprint_bytes + compress(raw_json, dictionaries[0])
+
+    @staticmethod
+    def _decompress(compressed: bytes) -> bytes:
+        if compressed[:1] == bytes([ProfileCodec.DICTIONARY_MARKER]):
+            return decompress(compressed[9:], profile_dictionaries(compressed[1:9].hex()))
+        return zlib.decompress(compressed)
+
+    @staticmethod
+    def _decode_binary(data: bytes) -> ProfilePayload:
+        view = memoryview(data)
+        packed, checksum = view[:-CHECKSUM_SIZE], bytes(view[-CHECKSUM_SIZE:])
+        if len(checksum) != CHECKSUM_SIZE or packed_checksum(packed) != checksum:
+            raise ProfileCodecError("Profile payload checksum mismatch.")
+        try:
+            fingerprint = read_fingerprint(packed)
+            created_at, state = get_profile_layout(ProfileCodec._registry_for(fingerprint)).unpack(packed)
+        except ProfilePackingError as exc:
+            raise ProfileCodecError(str(exc)) from exc
+        return ProfilePayload(
+            format_version=ProfileCodec.BINARY_FORMAT_VERSION,
+            bank_fingerprint=fingerprint,
+            state=state,
+            created_at=created_at,
+            checksum=checksum.hex(),
+            _canonical=bytes(packed),
+        )
+
+    @staticmethod
+    def _pack(payload: ProfilePayload) -> bytes:
+        if isinstance(payload._canonical, bytes):
+            return payload._canonical
+        layout = get_profile_layout(ProfileCodec._registry_for(payload.bank_fingerprint))
+        try:
+            return layout.pack(payload.state, payload.created_at)
+        except ProfilePackingError as exc:
+            raise ProfileCodecError(str(exc)) from exc
+
+    @staticmethod
+    def _registry_for(fingerprint: str) -> QuestionBankRegistry:
+        registry = find_registry(fingerprint)
+        if registry is None:
+            raise ProfileCodecError(
+                f"Profile {ProfileCodec.BINARY_FORMAT_VERSION} string refers to an unknown question bank version '{fingerprint}'."
+            )
+        return registry
@@ -0,0 +1,89 @@
+"""
+Memoized dependency graph over a flat state mapping.
+
+Every node declares the state keys it reads and the nodes it depends on. `evaluate`
+walks the nodes in insertion order and recomputes a node only when one of its state
+values or one of its dependencies changed since the previous evaluation; otherwise the
+previous output is reused. A recomputed node whose output is equal to the previous one
+does not invalidate its dependents. Outputs are shared between evaluations and must not be mutated.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping
+
+_MISSING = object()
+
+
+def _freeze(value: Any) -> Any:
+    # Lists in the state may be mutated in place by the caller, so the memo keeps a copy.
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@dataclass
+class _Node:
+    name: str
+    compute: Callable[..., Any]
+    keys: tuple[str, ...]
+    dependencies: tuple[str, ...]
+    signature: tuple | None = None
+    output: Any = None
+    version: int = 0
+
+
+class DependencyGraph:
+    def __init__(self) -> None:
+        self._nodes: dict[str, _Node] = {}
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    def add_node(
+        self,
+        name: str,
+        compute: Callable[..., Any],
+        *,
+        keys: tuple[str, ...] = (),
+        dependencies: tuple[str, ...] = (),
+    ) -> None:
+        """
+        Register `compute(state, *dependency_outputs)`. It may only read `keys` from the
+        state; dependencies must already be registered.
+        """
+        if name in self._nodes:
+            raise ValueError(f"Node '{name}' is already registered.")
+        unknown = [dependency for dependency in dependencies if dependency not in self._nodes]
+        if unknown:
+            raise ValueError(f"Node '{name}' depends on unregistered nodes: {', '.join(unknown)}.")
+        self._nodes[name] = _Node(name=name, compute=compute, keys=tuple(keys), dependencies=tuple(dependencies))
+
+    def evaluate(self, state: Mapping[str, Any]) -> dict[str, Any]:
+        """Output of every node for `state`."""
+        outputs: dict[str, Any] = {}
+        for node in self._nodes.values():
+            signature = (
+                tuple(_freeze(state.get(key, _MISSING)) for key in node.keys),
+                tuple(self._nodes[dependency].version for dependency in node.dependencies),
+            )
+            if node.version and signature == node.signature:
+                self.hits[node.name] += 1
+            else:
+                self.misses[node.name] += 1
+                output = node.compute(state, *(outputs[dependency] for dependency in node.dependencies))
+                node.signature = signature
+                # An equal output keeps the version, so dependents stay memoized.
+                if not node.version or output != node.output:
+                    node.output = output
+                    node.version += 1
+            outputs[node.name] = node.output
+        return outputs
+
+    def reset(self) -> None:
+        """Drop every memoized output and the counters."""
+        for node in self._nodes.values():
+            node.signature, node.output, node.version = None, None, 0
+        self.hits.clear()
+        self.misses.clear()
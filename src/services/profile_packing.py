@@ -0,0 +1,243 @@
+"""
+Binary layout of the 5.0 profile string.
+
+All integers are little-endian:
+
+    header    u8 version (5), 8 bytes bank fingerprint, i64 created_at (µs since epoch, UTC),
+              u32 settings word (input modes, ADHD/ASD flags and enums as bit fields)
+    psycho    5 bytes: OCEAN scores 0-100
+    facets    30 bytes: facet scores 0-20 in FACET_SPECS order
+    units     3 bytes: accelerator, brake, career centrality in hundredths
+    tags      u8 count, then one byte per erotic tag index
+    answers   one bit field per question slot, in bank and question order
+    checksum  first 8 bytes of sha256 over everything above
+
+Absent values are 0xFF in byte fields (0xFF count for tags) and 0 in bit fields, where
+a present choice is stored as its index + 1. Answers are only meaningful against the bank
+named by the fingerprint, so the layout is compiled per registry version.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, UTC
+import hashlib
+import struct
+from typing import Any, Mapping
+
+from src.data import EROS_TAGS_EXPLANATIONS
+from src.question_bank import QuestionBankRegistry
+from src.services.bigfive_facets import FACET_SPECS
+from src.services.sanitizer import ENUM_FIELDS, FLAG_KEYS, HIGH_LEVEL_KEYS, MODE_FIELDS, UNIT_KEYS
+
+BINARY_VERSION = 5
+CHECKSUM_SIZE = 8
+HEADER = struct.Struct("<B8sqI")
+_ABSENT = 0xFF
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_FACET_KEYS = tuple(spec.session_key for spec in FACET_SPECS)
+_TAGS = tuple(EROS_TAGS_EXPLANATIONS)
+_TAG_INDEX = {tag: index for index, tag in enumerate(_TAGS)}
+_LAYOUT_CACHE_SIZE = 16
+
+
+class ProfilePackingError(ValueError):
+    """Raised when a state cannot be represented in, or read from, the binary layout."""
+
+
+def _settings_layout() -> tuple[tuple[str, tuple[Any, ...], int, int], ...]:
+    """(key, choices, bit offset, bit width) of every field in the u32 settings word."""
+    fields: list[tuple[str, tuple[Any, ...]]] = list(MODE_FIELDS.items())
+    fields.extend((key, (False, True)) for key in FLAG_KEYS)
+    fields.extend((key, tuple(enum_class.__members__)) for key, enum_class in ENUM_FIELDS.items())
+
+    layout = []
+    offset = 0
+    for key, choices in fields:
+        width = len(choices).bit_length()
+        layout.append((key, choices, offset, width))
+        offset += width
+    if offset > 32:
+        raise RuntimeError("Profile settings no longer fit the 32-bit settings word.")
+    return tuple(layout)
+
+
+_SETTINGS = _settings_layout()
+# (key, scale, byte limit) of the byte-per-value fields, in layout order.
+_SCORE_FIELDS = (
+    tuple((key, 1.0, 100) for key in HIGH_LEVEL_KEYS)
+    + tuple((key, 1.0, 20) for key in _FACET_KEYS)
+    + tuple((key, 100.0, 100) for key in UNIT_KEYS)
+)
+_PACKED_KEYS = frozenset(field[0] for field in _SETTINGS + _SCORE_FIELDS) | {"eros_tags"}
+
+
+def encode_created_at(created_at: str) -> int:
+    try:
+        moment = datetime.fromisoformat(created_at)
+    except ValueError as exc:
+        raise ProfilePackingError(f"created_at '{created_at}' is not an ISO timestamp.") from exc
+    if moment.tzinfo is None:
+        raise ProfilePackingError("created_at must carry a timezone.")
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def decode_created_at(microseconds: int) -> str:
+    return (_EPOCH + timedelta(microseconds=microseconds)).isoformat()
+
+
+def _byte(value: Any, scale: float, limit: int, key: str) -> int:
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise ProfilePackingError(f"'{key}' is not a number.")
+    scaled = round(value * scale)
+    if not 0 <= scaled <= limit or scaled / scale != value:
+        raise ProfilePackingError(f"'{key}' = {value!r} does not fit the binary layout.")
+    return scaled
+
+
+class ProfileLayout:
+    """Question slots of one registry version; packs and unpacks sanitized states."""
+
+    def __init__(self, registry: QuestionBankRegistry) -> None:
+        self.fingerprint = registry.fingerprint
+        try:
+            self._fingerprint_bytes = bytes.fromhex(registry.fingerprint)
+        except ValueError:
+            self._fingerprint_bytes = b""
+        if len(self._fingerprint_bytes) != 8:
+            raise ProfilePackingError(f"Bank fingerprint '{registry.fingerprint}' is not 16 hex digits.")
+
+        slots: list[tuple[str, tuple[str, ...], dict[str, int], int, int]] = []
+        offset = 0
+        for bank in registry.banks.values():
+            for question, state_keys in zip(bank.questions, bank.state_keys()):
+                option_ids = tuple(option.id for option in question.options)
+                positions = {option_id: index + 1 for index, option_id in enumerate(option_ids)}
+                width = len(option_ids).bit_length()
+                for state_key in state_keys:
+                    slots.append((state_key, option_ids, positions, offset, width))
+                    offset += width
+        self._slots = tuple(slots)
+        self._slot_index = {slot[0]: slot for slot in slots}
+        self._answer_bytes = (offset + 7) // 8
+
+    def pack(self, state: Mapping[str, Any], created_at: str) -> bytes:
+        """Packed bytes without the trailing checksum."""
+        settings = 0
+        known = 0
+        for key, choices, offset, _ in _SETTINGS:
+            if key in state:
+                known += 1
+                value = state[key]
+                if type(value) is not type(choices[0]) or value not in choices:
+                    raise ProfilePackingError(f"'{key}' = {value!r} is not a packable choice.")
+                settings |= (choices.index(value) + 1) << offset
+
+        scores = bytearray([_ABSENT]) * len(_SCORE_FIELDS)
+        for position, (key, scale, limit) in enumerate(_SCORE_FIELDS):
+            if key in state:
+                known += 1
+                scores[position] = _byte(state[key], scale, limit, key)
+
+        tags = state.get("eros_tags")
+        if tags is None:
+            tag_bytes = bytes([_ABSENT])
+        else:
+            known += 1
+            if not isinstance(tags, list) or len(tags) >= _ABSENT or not all(isinstance(tag, str) and tag in _TAG_INDEX for tag in tags):
+                raise ProfilePackingError("'eros_tags' holds values outside the tag list.")
+            tag_bytes = bytes([len(tags), *(_TAG_INDEX[tag] for tag in tags)])
+
+        answers = 0
+        for key, value in state.items():
+            slot = self._slot_index.get(key)
+            if slot is None:
+                continue
+            known += 1
+            position = slot[2].get(value) if isinstance(value, str) else None
+            if position is None:
+                raise ProfilePackingError(f"'{key}' = {value!r} is not an option of this bank version.")
+            answers |= position << slot[3]
+
+        if known != len(state):
+            unknown = sorted(key for key in state if key not in self._slot_index and key not in _PACKED_KEYS)
+            raise ProfilePackingError(f"State keys outside the binary layout: {', '.join(unknown)}.")
+
+        return b"".join(
+            (
+                HEADER.pack(BINARY_VERSION, self._fingerprint_bytes, encode_created_at(created_at), settings),
+                scores,
+                tag_bytes,
+                answers.to_bytes(self._answer_bytes, "little"),
+            )
+        )
+
+    def unpack(self, data: bytes | memoryview) -> tuple[str, dict[str, Any]]:
+        """`(created_at, state)` from packed bytes (checksum already stripped)."""
+        view = memoryview(data)
+        try:
+            version, _, created_at, settings = HEADER.unpack_from(view)
+            cursor = HEADER.size
+            scores = view[cursor : cursor + len(_SCORE_FIELDS)]
+            cursor += len(_SCORE_FIELDS)
+            tag_count = view[cursor]
+            cursor += 1
+        except (struct.error, IndexError) as exc:
+            raise ProfilePackingError("Binary profile is truncated.") from exc
+        if version != BINARY_VERSION:
+            raise ProfilePackingError(f"Unsupported binary profile version {version}.")
+
+        state: dict[str, Any] = {}
+        for key, choices, offset, width in _SETTINGS:
+            code = (settings >> offset) & ((1 << width) - 1)
+            if code:
+                if code > len(choices):
+                    raise ProfilePackingError(f"Invalid packed value for '{key}'.")
+                state[key] = choices[code - 1]
+
+        for (key, scale, limit), value in zip(_SCORE_FIELDS, scores):
+            if value != _ABSENT:
+                if value > limit:
+                    raise ProfilePackingError(f"Invalid packed value for '{key}'.")
+                state[key] = value / scale
+
+        if tag_count != _ABSENT:
+            tag_indexes = view[cursor : cursor + tag_count]
+            cursor += tag_count
+            if len(tag_indexes) != tag_count or any(index >= len(_TAGS) for index in tag_indexes):
+                raise ProfilePackingError("Invalid packed erotic tags.")
+            state["eros_tags"] = [_TAGS[index] for index in tag_indexes]
+
+        if len(view) - cursor != self._answer_bytes:
+            raise ProfilePackingError("Binary profile answers do not match the bank version.")
+        answers = int.from_bytes(view[cursor:], "little")
+        for key, option_ids, _, offset, width in self._slots:
+            code = (answers >> offset) & ((1 << width) - 1)
+            if code:
+                if code > len(option_ids):
+                    raise ProfilePackingError(f"Invalid packed answer for '{key}'.")
+                state[key] = option_ids[code - 1]
+        return decode_created_at(created_at), state
+
+
+_layouts: dict[str, ProfileLayout] = {}
+
+
+def get_profile_layout(registry: QuestionBankRegistry) -> ProfileLayout:
+    layout = _layouts.get(registry.fingerprint)
+    if layout is None:
+        layout = ProfileLayout(registry)
+        if len(_layouts) >= _LAYOUT_CACHE_SIZE:
+            del _layouts[next(iter(_layouts))]
+        _layouts[registry.fingerprint] = layout
+    return layout
+
+
+def packed_checksum(packed: bytes) -> bytes:
+    return hashlib.sha256(packed).digest()[:CHECKSUM_SIZE]
+
+
+def read_fingerprint(data: bytes) -> str:
+    """Bank fingerprint from a packed profile, needed to pick the layout before unpacking."""
+    if len(data) < HEADER.size:
+        raise ProfilePackingError("Binary profile is truncated.")
+    return bytes(data[1:9]).hex()
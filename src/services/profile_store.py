@@ -0,0 +1,270 @@
+"""
+Local SQLite store of scored profiles, keyed by payload checksum.
+
+Each row holds the sanitized state, the bank fingerprint it was answered on and the
+vectors of the built profile (adjusted needs, provision, priority, eros, shadow and the
+facet averages `CompatibilityPool` uses), so matching, re-scoring and analytics can
+select rows with indexed range queries and load them straight into a pool instead of
+decoding and rebuilding every profile. Storing the same payload twice is a no-op.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, UTC
+import json
+from pathlib import Path
+import sqlite3
+from typing import Any, Iterable, Mapping, Sequence
+
+import numpy as np
+
+from src.enums import AttachmentStyle
+from src.profile import UserProfile
+from src.question_bank_history import get_question_bank_history
+from src.services.compatibility import CompatibilityComparator, CompatibilityPool
+from src.services.profile_builder import build_user_profile_from_state
+from src.services.profile_codec import ProfilePayload
+from src.services.sanitizer import StateSanitizer
+
+STORE_SCHEMA_VERSION = 1
+NEED_LABELS = CompatibilityComparator.NEED_LABELS
+# Vector columns in `CompatibilityPool` order.
+POOL_COLUMNS: dict[str, tuple[str, ...]] = {
+    "needs": tuple(f"need_{key}" for key in NEED_LABELS),
+    "provision": tuple(f"provision_{key}" for key in NEED_LABELS),
+    "priority": tuple(f"priority_{key}" for key in NEED_LABELS),
+    "eros": ("eros_accelerator", "eros_brake"),
+    "shadow": ("shadow_secure", "shadow_anxious", "shadow_avoidant", "shadow_disorganized"),
+    "facets": ("facet_openness", "facet_excitement_seeking", "facet_conscientiousness"),
+}
+_VECTOR_COLUMNS = tuple(column for columns in POOL_COLUMNS.values() for column in columns)
+_ROW_COLUMNS = ("checksum", "bank_fingerprint", "created_at", "stored_at", "mode", "attachment_style", "state") + _VECTOR_COLUMNS
+
+
+class ProfileStoreError(ValueError):
+    """Raised when a payload cannot be stored or a query is invalid."""
+
+
+@dataclass(frozen=True)
+class StoredProfile:
+    checksum: str
+    bank_fingerprint: str
+    created_at: str
+    mode: str
+    state: dict[str, Any]
+
+
+def _schema() -> str:
+    vectors = ",\n    ".join(f"{column} REAL NOT NULL" for column in _VECTOR_COLUMNS)
+    indexes = "\n".join(
+        f"CREATE INDEX IF NOT EXISTS profiles_{column} ON profiles ({column});" for column in POOL_COLUMNS["needs"]
+    )
+    return f"""
+CREATE TABLE IF NOT EXISTS profiles (
+    checksum TEXT PRIMARY KEY,
+    bank_fingerprint TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    stored_at TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    attachment_style TEXT NOT NULL,
+    state TEXT NOT NULL,
+    {vectors}
+);
+CREATE INDEX IF NOT EXISTS profiles_attachment_style ON profiles (attachment_style);
+CREATE INDEX IF NOT EXISTS profiles_bank_fingerprint ON profiles (bank_fingerprint);
+{indexes}
+"""
+
+
+def profile_vectors(user: UserProfile) -> dict[str, float]:
+    """Stored vector columns of one profile, the same values `CompatibilityPool.from_profiles` reads."""
+    pool = CompatibilityPool.from_profiles((user,))
+    return {
+        column: float(value)
+        for name, columns in POOL_COLUMNS.items()
+        for column, value in zip(columns, getattr(pool, name)[0])
+    }
+
+
+class ProfileStore:
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        self.path = path
+        self._connection = sqlite3.connect(str(path))
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, STORE_SCHEMA_VERSION):
+            self._connection.close()
+            raise ProfileStoreError(f"Profile store '{path}' uses unsupported schema version {version}.")
+        with self._connection:
+            self._connection.executescript(_schema())
+            self._connection.execute(f"PRAGMA user_version = {STORE_SCHEMA_VERSION}")
+
+    def __enter__(self) -> "ProfileStore":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def __contains__(self, checksum: object) -> bool:
+        return self._connection.execute("SELECT 1 FROM profiles WHERE checksum = ?", (checksum,)).fetchone() is not None
+
+    @staticmethod
+    def _row(payload: ProfilePayload, stored_at: str) -> tuple[Any, ...]:
+        registry = get_question_bank_history().resolve(payload.bank_fingerprint)
+        state, _ = StateSanitizer.sanitize(
+            payload.state,
+            incoming_bank_fingerprint=payload.bank_fingerprint,
+            registry=registry,
+        )
+        built = build_user_profile_from_state(state, registry)
+        if built.user is None:
+            raise ProfileStoreError(
+                f"Profile {payload.checksum} is incomplete: {', '.join(built.missing_inputs)}."
+            )
+        vectors = profile_vectors(built.user)
+        return (
+            payload.checksum,
+            registry.fingerprint,
+            payload.created_at,
+            stored_at,
+            built.mode,
+            built.user.shadow.attachment_style.name,
+            json.dumps(state, sort_keys=True, ensure_ascii=False, separators=(",", ":")),
+            *(vectors[column] for column in _VECTOR_COLUMNS),
+        )
+
+    def put_many(self, payloads: Iterable[ProfilePayload]) -> int:
+        """
+        Store verified payloads in one transaction; returns how many were new.
+        Payloads already in the store are not rebuilt.
+        """
+        stored_at = datetime.now(UTC).isoformat()
+        placeholders = ", ".join("?" for _ in _ROW_COLUMNS)
+        added = 0
+        with self._connection:
+            for payload in payloads:
+                if payload.checksum in self:
+                    continue
+                self._connection.execute(
+                    f"INSERT INTO profiles ({', '.join(_ROW_COLUMNS)}) VALUES ({placeholders})",
+                    self._row(payload, stored_at),
+                )
+                added += 1
+        return added
+
+    def put(self, payload: ProfilePayload) -> str:
+        self.put_many((payload,))
+        return payload.checksum
+
+    def get(self, checksum: str) -> StoredProfile | None:
+        row = self._connection.execute(
+            "SELECT checksum, bank_fingerprint, created_at, mode, state FROM profiles WHERE checksum = ?",
+            (checksum,),
+        ).fetchone()
+        if row is None:
+            return None
+        return StoredProfile(checksum=row[0], bank_fingerprint=row[1], created_at=row[2], mode=row[3], state=json.loads(row[4]))
+
+    def load_profile(self, checksum: str) -> UserProfile:
+        """Rebuild the full `UserProfile`, e.g. for a report; matching only needs `pool`."""
+        stored = self.get(checksum)
+        if stored is None:
+            raise KeyError(checksum)
+        registry = get_question_bank_history().resolve(stored.bank_fingerprint)
+        user = build_user_profile_from_state(stored.state, registry).user
+        if user is None:
+            raise ProfileStoreError(f"Stored profile {checksum} no longer builds with the current scoring.")
+        return user
+
+    def query(
+        self,
+        needs: Mapping[str, tuple[float | None, float | None]] | None = None,
+        attachment_style: AttachmentStyle | str | None = None,
+        bank_fingerprint: str | None = None,
+        limit: int | None = None,
+    ) -> list[str]:
+        """
+        Checksums of stored profiles matching every filter, in insertion order.
+
+        `needs` maps a need label to an inclusive `(low, high)` range on the adjusted need;
+        `None` leaves that side open.
+        """
+        clauses: list[str] = []
+        parameters: list[Any] = []
+        for label, (low, high) in (needs or {}).items():
+            if label not in NEED_LABELS:
+                raise ProfileStoreError(f"Unknown need '{label}'; expected one of {', '.join(NEED_LABELS)}.")
+            if low is not None:
+                clauses.append(f"need_{label} >= ?")
+                parameters.append(low)
+            if high is not None:
+                clauses.append(f"need_{label} <= ?")
+                parameters.append(high)
+        if attachment_style is not None:
+            if isinstance(attachment_style, str):
+                if attachment_style.upper() not in AttachmentStyle.__members__:
+                    raise ProfileStoreError(f"Unknown attachment style '{attachment_style}'.")
+                attachment_style = AttachmentStyle[attachment_style.upper()]
+            clauses.append("attachment_style = ?")
+            parameters.append(attachment_style.name)
+        if bank_fingerprint is not None:
+            clauses.append("bank_fingerprint = ?")
+            parameters.append(bank_fingerprint)
+
+        sql = "SELECT checksum FROM profiles"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [row[0] for row in self._connection.execute(sql, parameters)]
+
+    def pool(self, checksums: Sequence[str] | None = None) -> CompatibilityPool:
+        """`CompatibilityPool` of the given rows (in that order), or of the whole store, from stored vectors."""
+        select = f"SELECT checksum, {', '.join(_VECTOR_COLUMNS)} FROM profiles"
+        if checksums is None:
+            rows = self._connection.execute(select + " ORDER BY rowid").fetchall()
+        else:
+            by_checksum: dict[str, tuple[Any, ...]] = {}
+            unique = list(dict.fromkeys(checksums))
+            # Stay below SQLite's default limit on bound parameters.
+            for start in range(0, len(unique), 500):
+                chunk = unique[start : start + 500]
+                query = select + f" WHERE checksum IN ({', '.join('?' for _ in chunk)})"
+                by_checksum.update((row[0], row) for row in self._connection.execute(query, chunk))
+            missing = [checksum for checksum in unique if checksum not in by_checksum]
+            if missing:
+                raise KeyError(missing[0])
+            rows = [by_checksum[checksum] for checksum in checksums]
+
+        values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(_VECTOR_COLUMNS))
+        columns: dict[str, np.ndarray] = {}
+        start = 0
+        for name, names in POOL_COLUMNS.items():
+            columns[name] = values[:, start : start + len(names)]
+            start += len(names)
+        return CompatibilityPool(**columns)
+
+    def rescore(self, checksums: Iterable[str] | None = None) -> int:
+        """Rebuild the stored vectors from the stored states, e.g. after a scoring change."""
+        if checksums is None:
+            checksums = [row[0] for row in self._connection.execute("SELECT checksum FROM profiles")]
+        assignments = ", ".join(f"{column} = ?" for column in ("attachment_style",) + _VECTOR_COLUMNS)
+        updated = 0
+        with self._connection:
+            for checksum in checksums:
+                user = self.load_profile(checksum)
+                vectors = profile_vectors(user)
+                self._connection.execute(
+                    f"UPDATE profiles SET {assignments} WHERE checksum = ?",
+                    (user.shadow.attachment_style.name, *(vectors[column] for column in _VECTOR_COLUMNS), checksum),
+                )
+                updated += 1
+        return updated
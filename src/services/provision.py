@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from src.domain.psychometrics import PsychometricsComponent
 from src.domain.professional import ProfessionalComponent
 from src.enums import HollandCode
-from src.services.neurodivergence import NeurodivergenceService
+from src.services.neurodivergence import NeurodivergenceContext, NeurodivergenceService
 
 @dataclass
 class ProvisionProfile:
@@ -13,10 +13,14 @@ class ProvisionProfile:
 
 class ProvisionService:
     @staticmethod
-    def analyze(psycho: PsychometricsComponent, prof: ProfessionalComponent) -> ProvisionProfile:
+    def analyze(
+        psycho: PsychometricsComponent,
+        prof: ProfessionalComponent,
+        context: NeurodivergenceContext | None = None,
+    ) -> ProvisionProfile:
         return ProvisionProfile(
             safety_score=ProvisionService._calc_safety(psycho, prof),
-            resource_score=ProvisionService._calc_resource(psycho, prof),
+            resource_score=ProvisionService._calc_resource(psycho, prof, context),
             resonance_score=ProvisionService._calc_resonance(psycho, prof),
             expansion_score=ProvisionService._calc_expansion(psycho, prof)
         )
@@ -32,10 +36,14 @@ class ProvisionService:
         return min(base + bonus, 1.0)
 
     @staticmethod
-    def _calc_resource(p: PsychometricsComponent, prof: ProfessionalComponent) -> float:
+    def _calc_resource(
+        p: PsychometricsComponent,
+        prof: ProfessionalComponent,
+        context: NeurodivergenceContext | None = None,
+    ) -> float:
         # Resource = C: Competence + C: Order
         base = (p.conscientiousness.competence + p.conscientiousness.order) / 2
-        context = NeurodivergenceService.analyze(p)
+        context = context or NeurodivergenceService.analyze(p)
         base -= context.resource_provision_penalty
         
         bonus = 0.0
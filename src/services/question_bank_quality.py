@@ -5,12 +5,11 @@ from pathlib import Path
 from typing import Any
 import json
 import math
-import random
 import re
 
-from src.question_bank import QuestionBank, QuestionResponse, load_question_bank_from_path
+from src.question_bank import QuestionBank, load_question_bank_from_path
 from src.question_bank_blueprints import QuestionBankBlueprint, get_question_bank_blueprint
-from src.services.scoring import QuestionnaireScorer
+from src.services.score_distribution import ScoreDistributionEngine
 
 
 _WORD_RE = re.compile(r"[A-Za-zА-Яа-яІіЇїЄєҐґ0-9']+")
@@ -77,6 +76,13 @@ class QuestionBankQualityReport:
     errors: list[str] = field(default_factory=list)
     warnings: list[str] = field(default_factory=list)
     metrics: list[QualityMetric] = field(default_factory=list)
+    # Stable identity of each error (check name, plus the question for per-question checks),
+    # parallel to `errors`; messages embed metric values and change with every edit.
+    error_codes: list[str] = field(default_factory=list)
+
+    def add_error(self, code: str, message: str) -> None:
+        self.error_codes.append(code)
+        self.errors.append(message)
 
     def add_metric(self, name: str, value: Any) -> None:
         self.metrics.append(QualityMetric(name=name, value=value))
@@ -117,7 +123,7 @@ class QuestionBankQualityGate:
         report = QuestionBankQualityReport(module=bank.module, passed=True)
 
         if blueprint is None:
-            report.errors.append(f"No blueprint registered for module '{bank.module}'.")
+            report.add_error("missing_blueprint", f"No blueprint registered for module '{bank.module}'.")
             report.passed = False
             return report
 
@@ -163,11 +169,13 @@ class QuestionBankQualityGate:
         question_count = len(bank.questions)
         report.add_metric("question_count", question_count)
         if question_count < blueprint.min_question_count:
-            report.errors.append(
+            report.add_error(
+                "min_question_count",
                 f"Module '{bank.module}' needs at least {blueprint.min_question_count} questions; got {question_count}."
             )
         if expected_question_count is not None and question_count != expected_question_count:
-            report.errors.append(
+            report.add_error(
+                "expected_question_count",
                 f"Expected exactly {expected_question_count} questions for module '{bank.module}', got {question_count}."
             )
 
@@ -182,7 +190,8 @@ class QuestionBankQualityGate:
         ratio = described / len(bank.questions)
         report.add_metric("description_ratio", ratio)
         if strict_content_checks and ratio < blueprint.required_description_ratio:
-            report.errors.append(
+            report.add_error(
+                "description_ratio",
                 f"Descriptions are required for strict '{bank.module}' banks. Ratio {ratio:.2f} is below "
                 f"{blueprint.required_description_ratio:.2f}."
             )
@@ -196,21 +205,31 @@ class QuestionBankQualityGate:
         for question in bank.questions:
             option_count = len(question.options)
             if option_count < blueprint.min_options_per_question or option_count > blueprint.max_options_per_question:
-                report.errors.append(
+                report.add_error(
+                    f"option_count:{question.id}",
                     f"Question '{question.id}' must have between {blueprint.min_options_per_question} and "
                     f"{blueprint.max_options_per_question} options."
                 )
 
             if len(_tokenize(question.question)) < 3:
-                report.errors.append(f"Question '{question.id}' is too short to be behaviorally clear.")
+                report.add_error(
+                    f"question_too_short:{question.id}",
+                    f"Question '{question.id}' is too short to be behaviorally clear."
+                )
 
             option_texts = [option.text.strip().lower() for option in question.options]
             if len(option_texts) != len(set(option_texts)):
-                report.errors.append(f"Question '{question.id}' has duplicate option texts.")
+                report.add_error(
+                    f"duplicate_option_texts:{question.id}",
+                    f"Question '{question.id}' has duplicate option texts."
+                )
 
             vectors = {option.vector for option in question.options}
             if len(vectors) == 1:
-                report.errors.append(f"Question '{question.id}' has identical vectors for every option.")
+                report.add_error(
+                    f"identical_vectors:{question.id}",
+                    f"Question '{question.id}' has identical vectors for every option."
+                )
 
     @staticmethod
     def _check_user_facing_language(
@@ -271,28 +290,32 @@ class QuestionBankQualityGate:
         report.add_metric("suspicious_russian_hits", suspicious_russian_hits)
 
         if missing_cyrillic_fields:
-            report.errors.append(
+            report.add_error(
+                "missing_cyrillic",
                 "Strict bank must keep all user-facing fields in Ukrainian; missing Cyrillic in: "
                 + ", ".join(missing_cyrillic_fields[:8])
                 + ("..." if len(missing_cyrillic_fields) > 8 else "")
             )
 
         if latin_token_hits:
-            report.errors.append(
+            report.add_error(
+                "latin_user_facing_text",
                 "Strict bank contains non-Ukrainian Latin user-facing text: "
                 + "; ".join(latin_token_hits[:6])
                 + ("..." if len(latin_token_hits) > 6 else "")
             )
 
         if suspicious_russian_hits:
-            report.errors.append(
+            report.add_error(
+                "russian_user_facing_text",
                 "Strict bank contains suspicious non-Ukrainian / Russian user-facing text: "
                 + "; ".join(suspicious_russian_hits[:6])
                 + ("..." if len(suspicious_russian_hits) > 6 else "")
             )
 
         if ukrainian_marker_count < max(3, len(bank.questions)):
-            report.errors.append(
+            report.add_error(
+                "ukrainian_aggregate",
                 "Strict bank does not look sufficiently Ukrainian in aggregate; rewrite all user-facing content in natural Ukrainian."
             )
 
@@ -311,7 +334,8 @@ class QuestionBankQualityGate:
                     hits.append(f"{question.id}:{term}")
         report.add_metric("banned_term_hits", hits)
         if hits:
-            report.errors.append(
+            report.add_error(
+                "banned_terms",
                 f"Bank '{bank.module}' contains banned pseudo-scientific or moralizing terms: {', '.join(hits[:8])}."
             )
 
@@ -328,7 +352,8 @@ class QuestionBankQualityGate:
                 for value in option.vector:
                     max_magnitude_seen = max(max_magnitude_seen, abs(value))
                     if abs(value) > blueprint.max_vector_magnitude:
-                        report.errors.append(
+                        report.add_error(
+                            f"vector_range:{question.id}",
                             f"Question '{question.id}' has vector value {value} outside +/-{blueprint.max_vector_magnitude}."
                         )
                     if value < 0:
@@ -336,7 +361,10 @@ class QuestionBankQualityGate:
         report.add_metric("negative_weight_count", negative_count)
         report.add_metric("max_vector_magnitude", max_magnitude_seen)
         if blueprint.require_negative_weights and negative_count == 0:
-            report.errors.append(f"Module '{bank.module}' should include some negative weights to encode tradeoffs.")
+            report.add_error(
+                "negative_weights",
+                f"Module '{bank.module}' should include some negative weights to encode tradeoffs."
+            )
 
     @staticmethod
     def _check_tradeoffs(
@@ -349,7 +377,10 @@ class QuestionBankQualityGate:
             report.add_metric("tradeoff_question_count", priority_questions)
             report.add_metric("mixed_direction_question_count", 0)
             if priority_questions == 0:
-                report.errors.append("Needs bank must include explicit priority tradeoff questions.")
+                report.add_error(
+                    "needs_priority_tradeoffs",
+                    "Needs bank must include explicit priority tradeoff questions."
+                )
             return
 
         mixed_direction_questions = 0
@@ -376,12 +407,16 @@ class QuestionBankQualityGate:
 
         required_tradeoffs = max(1, math.ceil(len(bank.questions) * 0.6))
         if tradeoff_questions < required_tradeoffs:
-            report.errors.append(
+            report.add_error(
+                "tradeoff_count",
                 f"Bank '{bank.module}' does not contain enough real tradeoffs; got {tradeoff_questions}, "
                 f"need at least {required_tradeoffs}."
             )
         if blueprint.require_mixed_direction_vectors and mixed_direction_questions == 0:
-            report.errors.append(f"Module '{bank.module}' should include both positive and inhibiting/negative cues.")
+            report.add_error(
+                "mixed_direction",
+                f"Module '{bank.module}' should include both positive and inhibiting/negative cues."
+            )
 
     @staticmethod
     def _check_balance(
@@ -404,14 +439,23 @@ class QuestionBankQualityGate:
             report.add_metric("priority_dimension_counts", priority_counts)
 
             if any(count == 0 for count in absolute_counts.values()):
-                report.errors.append(f"Needs bank is missing absolute coverage: {absolute_counts}.")
+                report.add_error(
+                    "needs_absolute_coverage",
+                    f"Needs bank is missing absolute coverage: {absolute_counts}."
+                )
             if any(count == 0 for count in priority_counts.values()):
-                report.errors.append(f"Needs bank is missing priority coverage: {priority_counts}.")
+                report.add_error(
+                    "needs_priority_coverage",
+                    f"Needs bank is missing priority coverage: {priority_counts}."
+                )
 
             abs_min = min(absolute_counts.values())
             abs_max = max(absolute_counts.values())
             if abs_max > max(1, abs_min + 1):
-                report.errors.append(f"Needs absolute items are unbalanced across dimensions: {absolute_counts}.")
+                report.add_error(
+                    "needs_absolute_balance",
+                    f"Needs absolute items are unbalanced across dimensions: {absolute_counts}."
+                )
             return
 
         dominant_counts = {label: 0 for label in blueprint.vector_labels}
@@ -438,7 +482,8 @@ class QuestionBankQualityGate:
 
         if any(count == 0 for count in positive_counts.values()):
             missing = [label for label, count in positive_counts.items() if count == 0]
-            report.errors.append(
+            report.add_error(
+                "positive_coverage",
                 f"Module '{bank.module}' is unbalanced; no positive coverage for dimensions: {', '.join(missing)}."
             )
 
@@ -446,7 +491,8 @@ class QuestionBankQualityGate:
         min_dominant = min(skew_source.values())
         max_dominant = max(skew_source.values())
         if max_dominant > max(1, min_dominant * 3):
-            report.errors.append(
+            report.add_error(
+                "dimension_skew",
                 f"Module '{bank.module}' is overly skewed across dimensions: {skew_source}."
             )
 
@@ -466,7 +512,8 @@ class QuestionBankQualityGate:
         report.add_metric("coverage_clusters", matched_clusters)
         missing_clusters = [name for name, count in matched_clusters.items() if count == 0]
         if missing_clusters:
-            report.errors.append(
+            report.add_error(
+                "construct_coverage",
                 f"Module '{bank.module}' is missing coverage for core constructs: {', '.join(missing_clusters)}."
             )
 
@@ -524,56 +571,36 @@ class QuestionBankQualityGate:
         report.add_metric("needs_keyed_absolute_errors", keyed_absolute_errors)
         report.add_metric("needs_priority_structure_errors", priority_structure_errors)
         if keyed_absolute_errors:
-            report.errors.append(
+            report.add_error(
+                "needs_keyed_absolute",
                 "Needs absolute items must be single-dimension keyed with monotonic response anchors."
             )
         if priority_structure_errors:
-            report.errors.append(
+            report.add_error(
+                "needs_priority_structure",
                 "Needs priority items must expose one option per SRME dimension without duplicate or mixed keys."
             )
 
         if len(bank.questions) >= 24:
-            rng = random.Random(42)
-            samples: list[tuple[float, float, float, float]] = []
-            for _ in range(300):
-                responses: dict[str, QuestionResponse] = {}
-                for question in bank.questions:
-                    if question.family == "priority":
-                        options = list(question.option_ids())
-                        best_option_id, worst_option_id = rng.sample(options, 2)
-                        responses[question.id] = QuestionResponse.best_worst(best_option_id, worst_option_id)
-                    else:
-                        responses[question.id] = QuestionResponse.single_choice(rng.choice(list(question.option_ids())))
-                component = QuestionnaireScorer.build_needs_component(bank, responses)
-                samples.append(
-                    (
-                        component.raw_safety,
-                        component.raw_resource,
-                        component.raw_resonance,
-                        component.raw_expansion,
-                    )
-                )
-
-            dispersion_metrics: dict[str, float] = {}
-            spread_metrics: dict[str, float] = {}
-            for index, label in enumerate(bank.metadata.vector_labels):
-                values = sorted(sample[index] for sample in samples)
-                mean = sum(values) / len(values)
-                variance = sum((value - mean) ** 2 for value in values) / len(values)
-                lower = values[int(len(values) * 0.1)]
-                upper = values[int(len(values) * 0.9)]
-                dispersion_metrics[label] = math.sqrt(variance)
-                spread_metrics[label] = upper - lower
+            distributions = ScoreDistributionEngine.dimension_distributions(bank)
+            dispersion_metrics = {label: distribution.std for label, distribution in distributions.items()}
+            spread_metrics = {label: distribution.spread(0.1, 0.9) for label, distribution in distributions.items()}
 
             report.add_metric("needs_dispersion_std", dispersion_metrics)
             report.add_metric("needs_dispersion_p90_p10", spread_metrics)
+            report.add_metric(
+                "needs_score_distribution",
+                {label: distribution.summary() for label, distribution in distributions.items()},
+            )
             if any(value < 0.11 for value in dispersion_metrics.values()):
-                report.errors.append(
-                    f"Needs bank is still too midpoint-compressed under Monte Carlo sampling: {dispersion_metrics}."
+                report.add_error(
+                    "needs_dispersion",
+                    f"Needs bank is still too midpoint-compressed under uniformly random answers: {dispersion_metrics}."
                 )
             if any(value < 0.24 for value in spread_metrics.values()):
-                report.errors.append(
-                    f"Needs bank does not create enough score spread under Monte Carlo sampling: {spread_metrics}."
+                report.add_error(
+                    "needs_spread",
+                    f"Needs bank does not create enough score spread under uniformly random answers: {spread_metrics}."
                 )
 
     @staticmethod
@@ -583,7 +610,8 @@ class QuestionBankQualityGate:
         style_positive_counts = {label: 0 for label in bank.metadata.vector_labels}
         for question in bank.questions:
             if len(question.options) != label_count:
-                report.errors.append(
+                report.add_error(
+                    f"shadow_option_count:{question.id}",
                     f"Shadow question '{question.id}' must expose exactly one option per attachment style."
                 )
             for option in question.options:
@@ -596,9 +624,13 @@ class QuestionBankQualityGate:
 
         report.add_metric("shadow_style_positive_counts", style_positive_counts)
         if one_hot_errors:
-            report.errors.append("Shadow bank must use one-hot vectors so each option maps to one attachment style.")
+            report.add_error(
+                "shadow_one_hot",
+                "Shadow bank must use one-hot vectors so each option maps to one attachment style."
+            )
         if len(set(style_positive_counts.values())) > 1:
-            report.errors.append(
+            report.add_error(
+                "shadow_style_balance",
                 f"Shadow bank should represent each attachment style equally across options: {style_positive_counts}."
             )
 
@@ -619,6 +651,9 @@ class QuestionBankQualityGate:
 
         report.add_metric("eros_mixed_option_count", mixed_option_count)
         if mixed_option_count == 0:
-            report.errors.append("Eros bank should include at least one context-sensitive option with both accelerator and brake.")
+            report.add_error(
+                "eros_mixed_option",
+                "Eros bank should include at least one context-sensitive option with both accelerator and brake."
+            )
         if zero_brake_options == 0 or zero_accel_options == 0:
-            report.errors.append("Eros bank should include both activating and inhibiting options.")
+            report.add_error("eros_direction", "Eros bank should include both activating and inhibiting options.")
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+import hashlib
+import json
+import threading
+from typing import Any, Sequence
+
+from src.question_bank import (
+    QUESTION_BANK_DIR,
+    QUESTION_BANK_MODULES,
+    QuestionBank,
+    QuestionBankRegistry,
+    QuestionBankValidationError,
+    build_question_bank_registry,
+    load_question_bank_from_payload,
+    set_question_bank_registry_provider,
+)
+from src.question_bank_history import QuestionBankHistory, remember_registry, write_registry_snapshot
+from src.services.question_bank_quality import QuestionBankQualityGate
+
+
+@dataclass(frozen=True)
+class BankReloadRejection:
+    module: str
+    errors: tuple[str, ...]
+
+
+class QuestionBankRegistryManager:
+    """
+    Keeps the active `QuestionBankRegistry` in sync with the JSON files in `bank_dir`.
+
+    Registries are immutable snapshots: a reload builds a new registry and swaps the
+    reference, so callers that already hold a snapshot keep scoring against it.
+    A changed bank is only swapped in when it loads cleanly and the quality gate
+    reports no errors that the currently active version of that bank did not have.
+
+    Every activated registry is added to `history` (the process-wide history by
+    default), so profiles answered on a replaced version still resolve; with
+    `archive_dir` its raw banks are also written there as a registry snapshot.
+    """
+
+    def __init__(
+        self,
+        bank_dir: Path = QUESTION_BANK_DIR,
+        *,
+        modules: Sequence[str] = QUESTION_BANK_MODULES,
+        poll_interval: float = 2.0,
+        history: QuestionBankHistory | None = None,
+        archive_dir: Path | None = None,
+    ) -> None:
+        self.bank_dir = bank_dir
+        self.history = history
+        self.archive_dir = archive_dir
+        self.modules = tuple(modules)
+        self.poll_interval = poll_interval
+        self.rejections: deque[BankReloadRejection] = deque(maxlen=50)
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._stat_keys: dict[str, tuple[int, int]] = {}
+        self._active_digests: dict[str, str] = {}
+        self._active_payloads: dict[str, Any] = {}
+        banks: dict[str, QuestionBank] = {}
+        for module in self.modules:
+            (
+                self._stat_keys[module],
+                self._active_digests[module],
+                self._active_payloads[module],
+                banks[module],
+            ) = self._load_bank(module)
+        self._registry = self._publish(build_question_bank_registry(banks))
+
+    def current(self) -> QuestionBankRegistry:
+        return self._registry
+
+    def refresh(self) -> bool:
+        """Reload changed bank files. Returns True when a new registry was swapped in."""
+        with self._reload_lock:
+            current = self._registry
+            banks = dict(current.banks)
+            changed = False
+
+            for module in self.modules:
+                path = self._path(module)
+                try:
+                    stat = path.stat()
+                except OSError as exc:
+                    self._reject(module, (f"Cannot read bank file: {exc}",))
+                    continue
+                if (stat.st_mtime_ns, stat.st_size) == self._stat_keys[module]:
+                    continue
+
+                try:
+                    stat_key, digest, payload, bank = self._load_bank(module)
+                except (OSError, ValueError) as exc:
+                    self._stat_keys[module] = (stat.st_mtime_ns, stat.st_size)
+                    self._reject(module, (str(exc),))
+                    continue
+                # Remember the file state either way so a rejected edit is not re-evaluated on every poll.
+                self._stat_keys[module] = stat_key
+                if digest == self._active_digests[module]:
+                    continue
+
+                new_errors = self._new_quality_errors(current.get(module), bank)
+                if new_errors:
+                    self._reject(module, new_errors)
+                    continue
+                banks[module] = bank
+                self._active_digests[module] = digest
+                self._active_payloads[module] = payload
+                changed = True
+
+            if changed:
+                self._registry = self._publish(build_question_bank_registry(banks))
+            return changed
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="question-bank-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def install(self) -> None:
+        """Serve `get_question_bank_registry()` from this manager's current snapshot."""
+        set_question_bank_registry_provider(self.current)
+
+    def uninstall(self) -> None:
+        set_question_bank_registry_provider(None)
+
+    def _publish(self, registry: QuestionBankRegistry) -> QuestionBankRegistry:
+        # Older snapshots stay in the history so profiles answered on them can still be scored.
+        if self.archive_dir is not None:
+            write_registry_snapshot(self._active_payloads, self.archive_dir)
+        if self.history is not None:
+            return self.history.add(registry)
+        remember_registry(registry)
+        return registry
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            self.refresh()
+
+    def _path(self, module: str) -> Path:
+        return self.bank_dir / f"{module}.json"
+
+    def _load_bank(self, module: str) -> tuple[tuple[int, int], str, Any, QuestionBank]:
+        path = self._path(module)
+        stat = path.stat()
+        raw_bytes = path.read_bytes()
+        payload = json.loads(raw_bytes.decode("utf-8"))
+        bank = load_question_bank_from_payload(payload)
+        if bank.module != module:
+            raise QuestionBankValidationError(
+                f"Bank file '{path.name}' declares module '{bank.module}' instead of '{module}'."
+            )
+        return (stat.st_mtime_ns, stat.st_size), hashlib.sha256(raw_bytes).hexdigest(), payload, bank
+
+    @staticmethod
+    def _new_quality_errors(previous: QuestionBank, candidate: QuestionBank) -> tuple[str, ...]:
+        # Compared by check, not by message: a bank that already failed a check with other numbers is not worse.
+        previous_codes = set(QuestionBankQualityGate.evaluate(previous).error_codes)
+        report = QuestionBankQualityGate.evaluate(candidate)
+        return tuple(
+            error for code, error in zip(report.error_codes, report.errors) if code not in previous_codes
+        )
+
+    def _reject(self, module: str, errors: tuple[str, ...]) -> None:
+        self.rejections.append(BankReloadRejection(module=module, errors=errors))
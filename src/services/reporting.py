@@ -1,11 +1,9 @@
 from typing import Any
 
-from src.domain.shadow import ShadowComponent
 from src.enums import AttachmentStyle, RegulationMethod
 from src.profile import UserProfile
-from src.services.neurodivergence import NeurodivergenceService
-from src.services.provision import ProvisionService
-from src.services.shadow_analysis import analyze_shadow
+from src.services.derived_features import get_derived_features
+from src.services.shadow_analysis import ShadowSignal
 
 
 class ReportGenerator:
@@ -17,9 +15,7 @@ class ReportGenerator:
     }
 
     @staticmethod
-    def _shadow_warning(shadow: ShadowComponent) -> str:
-        signal = analyze_shadow(shadow)
-
+    def _shadow_warning(signal: ShadowSignal) -> str:
         if not signal.is_confident:
             return (
                 "Змішаний або слабко виражений патерн прив'язаності: "
@@ -35,22 +31,15 @@ class ReportGenerator:
 
     @staticmethod
     def generate_manual(user: UserProfile) -> dict[str, Any]:
-        context = NeurodivergenceService.analyze(user.psychometrics)
-        if user.provision is not None:
-            provision_map = {
-                "Safety Provider (Надійність)": user.provision.get("safety_provision", 0.0),
-                "Resource Provider (Підтримка)": user.provision.get("resource_provision", 0.0),
-                "Resonance Provider (Емпатія/Розуміння)": user.provision.get("resonance_provision", 0.0),
-                "Expansion Provider (Драйв/Натхнення)": user.provision.get("expansion_provision", 0.0),
-            }
-        else:
-            provision = ProvisionService.analyze(user.psychometrics, user.professional)
-            provision_map = {
-                "Safety Provider (Надійність)": provision.safety_score,
-                "Resource Provider (Підтримка)": provision.resource_score,
-                "Resonance Provider (Емпатія/Розуміння)": provision.resonance_score,
-                "Expansion Provider (Драйв/Натхнення)": provision.expansion_score,
-            }
+        derived = get_derived_features(user)
+        context = derived.neurodivergence
+        safety, resource, resonance, expansion = derived.provision
+        provision_map = {
+            "Safety Provider (Надійність)": safety,
+            "Resource Provider (Підтримка)": resource,
+            "Resonance Provider (Емпатія/Розуміння)": resonance,
+            "Expansion Provider (Драйв/Натхнення)": expansion,
+        }
         best_provision = max(provision_map.items(), key=lambda item: item[1])
 
         needs_map = {
@@ -73,7 +62,7 @@ class ReportGenerator:
             reverse=True,
         )
 
-        shadow_warning = ReportGenerator._shadow_warning(user.shadow)
+        shadow_warning = ReportGenerator._shadow_warning(derived.shadow)
         if user.shadow.regulation_method == RegulationMethod.AUTO_REGULATION:
             shadow_warning += " Потребує часу на самоті для відновлення."
 
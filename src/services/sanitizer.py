@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Mapping
+from functools import partial
+from typing import Any, Callable, Iterable, Mapping
 
 from src.data import EROS_TAGS_EXPLANATIONS
 from src.enums import (
@@ -11,7 +13,7 @@ from src.enums import (
     HollandCode,
     RegulationMethod,
 )
-from src.question_bank import get_question_bank_registry, question_state_key
+from src.question_bank import QuestionBankRegistry, get_question_bank_registry
 
 FACET_KEYS = {
     "facet_neur_anxiety",
@@ -46,165 +48,163 @@ FACET_KEYS = {
     "facet_cons_deliberation",
 }
 
+# Persistable non-question state keys, grouped by value type.
+MODE_FIELDS: dict[str, tuple[str, ...]] = {
+    "shadow_input_mode": ("quiz", "manual"),
+    "eros_input_mode": ("quiz", "manual"),
+    "psycho_input_mode": ("pdf", "manual"),
+    "questionnaire_mode": ("simple", "extended", "full"),
+}
+ENUM_FIELDS: dict[str, type[Enum]] = {
+    "shadow_manual_att": AttachmentStyle,
+    "shadow_manual_conf": ConflictResponse,
+    "shadow_manual_reg": RegulationMethod,
+    "eros_manual_ctx": ContextDependency,
+    "prof_primary": HollandCode,
+    "prof_secondary": HollandCode,
+    "prof_tertiary": HollandCode,
+}
+FLAG_KEYS = ("psycho_adhd", "psycho_asd")
+HIGH_LEVEL_KEYS = ("psycho_o", "psycho_c", "psycho_e", "psycho_a", "psycho_n")
+UNIT_KEYS = ("eros_manual_acc", "eros_manual_brk", "prof_centrality")
 
-class StateSanitizer:
-    @staticmethod
-    def get_current_bank_fingerprint() -> str:
-        return get_question_bank_registry().fingerprint
+# Removal messages are part of the UI, so the schema reproduces them verbatim.
+_BANK_MISMATCH_MESSAGE = (
+    "Профіль створений на іншій версії банку питань. Старі результати можуть бути несумісні, "
+    "тому для точної інтерпретації анкету варто пройти заново."
+)
+_SCHEMA_CACHE_SIZE = 16
+_NO_OPTIONS: frozenset[str] = frozenset()
 
-    @staticmethod
-    def extract_persistable_state(source_state: Mapping[str, Any]) -> dict[str, Any]:
-        clean_state, _ = StateSanitizer.sanitize(
-            incoming_state={
-                key: value
-                for key, value in source_state.items()
-                if not key.startswith("FormSubmitter")
-            },
-            incoming_bank_fingerprint=StateSanitizer.get_current_bank_fingerprint(),
-        )
-        return clean_state
+# Validator returns the sanitized value, or None when the value must be dropped. Question
+# answers are checked inline against their option ids instead (validator is None).
+Validator = Callable[[Any], Any]
+KeyRule = tuple[frozenset[str], Validator | None, str]
+
+
+@dataclass(frozen=True)
+class StateSchema:
+    """
+    Validators for every persistable state key of one registry version.
+
+    Compiled once per registry fingerprint: each key maps straight to its option ids or
+    validator and removal message, and the best/worst key pairs are listed up front.
+    """
+
+    fingerprint: str
+    rules: dict[str, KeyRule]
+    best_worst_pairs: tuple[tuple[str, str, str], ...]
+
+    @classmethod
+    def compile(cls, registry: QuestionBankRegistry) -> "StateSchema":
+        rules = _static_rules()
+        best_worst_pairs = []
+        for bank in registry.banks.values():
+            for question, state_keys in zip(bank.questions, bank.state_keys()):
+                option_ids = frozenset(option.id for option in question.options)
+                for state_key in state_keys:
+                    rules[state_key] = (option_ids, None, f"Видалено невалідну відповідь для '{state_key}'.")
+                if question.is_best_worst:
+                    best_key, worst_key = state_keys
+                    best_worst_pairs.append(
+                        (
+                            best_key,
+                            worst_key,
+                            f"Видалено некоректну пару best/worst для '{question.id}': не можна обрати той самий варіант двічі.",
+                        )
+                    )
+        return cls(fingerprint=registry.fingerprint, rules=rules, best_worst_pairs=tuple(best_worst_pairs))
 
-    @staticmethod
     def sanitize(
+        self,
         incoming_state: Mapping[str, Any],
         incoming_bank_fingerprint: str | None = None,
     ) -> tuple[dict[str, Any], list[str]]:
         clean_state: dict[str, Any] = {}
         removal_log: list[str] = []
-        registry = get_question_bank_registry()
-
-        if incoming_bank_fingerprint and incoming_bank_fingerprint != registry.fingerprint:
-            removal_log.append(
-                "Профіль створений на іншій версії банку питань. Старі результати можуть бути несумісні, "
-                "тому для точної інтерпретації анкету варто пройти заново."
-            )
-
-        valid_question_values: dict[str, set[str]] = {}
-        for bank in registry.banks.values():
-            for question in bank.questions:
-                option_ids = set(question.option_ids())
-                if question.is_best_worst:
-                    valid_question_values[question_state_key(bank.module, question.id, "best")] = option_ids
-                    valid_question_values[question_state_key(bank.module, question.id, "worst")] = option_ids
-                else:
-                    valid_question_values[question_state_key(bank.module, question.id)] = option_ids
+        if incoming_bank_fingerprint and incoming_bank_fingerprint != self.fingerprint:
+            removal_log.append(_BANK_MISMATCH_MESSAGE)
 
+        rules = self.rules
         for key, value in incoming_state.items():
-            if key in valid_question_values:
-                if isinstance(value, str) and value in valid_question_values[key]:
-                    clean_state[key] = value
-                else:
-                    removal_log.append(f"Видалено невалідну відповідь для '{key}'.")
+            rule = rules.get(key)
+            if rule is None:
+                removal_log.append(f"Видалено невідоме поле '{key}'.")
                 continue
-
-            if key in {"shadow_input_mode", "eros_input_mode", "psycho_input_mode", "questionnaire_mode"}:
-                if key == "psycho_input_mode":
-                    valid_modes = {"pdf", "manual"}
-                elif key == "questionnaire_mode":
-                    valid_modes = {"simple", "extended", "full"}
-                else:
-                    valid_modes = {"quiz", "manual"}
-                if value in valid_modes:
+            option_ids, validator, message = rule
+            if validator is None:
+                if isinstance(value, str) and value in option_ids:
                     clean_state[key] = value
                 else:
-                    removal_log.append(f"Видалено невалідний режим '{key}'.")
+                    removal_log.append(message)
                 continue
+            sanitized = validator(value)
+            if sanitized is None:
+                removal_log.append(message)
+            else:
+                clean_state[key] = sanitized
 
-            if key in {"psycho_o", "psycho_c", "psycho_e", "psycho_a", "psycho_n"}:
-                sanitized = StateSanitizer._sanitize_number(value, 0.0, 100.0)
-                if sanitized is not None:
-                    clean_state[key] = sanitized
-                else:
-                    removal_log.append(f"Видалено невалідне числове поле '{key}'.")
-                continue
+        for best_key, worst_key, message in self.best_worst_pairs:
+            if best_key in clean_state and clean_state[best_key] == clean_state.get(worst_key):
+                del clean_state[best_key]
+                clean_state.pop(worst_key, None)
+                removal_log.append(message)
 
-            if key in {"psycho_adhd", "psycho_asd"}:
-                if isinstance(value, bool):
-                    clean_state[key] = value
-                else:
-                    removal_log.append(f"Видалено невалідний прапорець '{key}'.")
-                continue
-
-            if key in FACET_KEYS:
-                sanitized = StateSanitizer._sanitize_number(value, 0.0, 20.0)
-                if sanitized is not None:
-                    clean_state[key] = sanitized
-                else:
-                    removal_log.append(f"Видалено невалідний facet '{key}'.")
-                continue
-
-            if key == "shadow_manual_att":
-                sanitized = StateSanitizer._sanitize_enum_token(value, AttachmentStyle)
-                if sanitized is not None:
-                    clean_state[key] = sanitized
-                else:
-                    removal_log.append(f"Видалено невалідний enum '{key}'.")
-                continue
+        return clean_state, removal_log
 
-            if key == "shadow_manual_conf":
-                sanitized = StateSanitizer._sanitize_enum_token(value, ConflictResponse)
-                if sanitized is not None:
-                    clean_state[key] = sanitized
-                else:
-                    removal_log.append(f"Видалено невалідний enum '{key}'.")
-                continue
 
-            if key == "shadow_manual_reg":
-                sanitized = StateSanitizer._sanitize_enum_token(value, RegulationMethod)
-                if sanitized is not None:
-                    clean_state[key] = sanitized
-                else:
-                    removal_log.append(f"Видалено невалідний enum '{key}'.")
-                continue
+_schemas: dict[str, StateSchema] = {}
 
-            if key == "eros_manual_ctx":
-                sanitized = StateSanitizer._sanitize_enum_token(value, ContextDependency)
-                if sanitized is not None:
-                    clean_state[key] = sanitized
-                else:
-                    removal_log.append(f"Видалено невалідний enum '{key}'.")
-                continue
 
-            if key in {"eros_manual_acc", "eros_manual_brk", "prof_centrality"}:
-                sanitized = StateSanitizer._sanitize_number(value, 0.0, 1.0)
-                if sanitized is not None:
-                    clean_state[key] = sanitized
-                else:
-                    removal_log.append(f"Видалено невалідне числове поле '{key}'.")
-                continue
+def get_state_schema(registry: QuestionBankRegistry) -> StateSchema:
+    schema = _schemas.get(registry.fingerprint)
+    if schema is None:
+        schema = StateSchema.compile(registry)
+        if len(_schemas) >= _SCHEMA_CACHE_SIZE:
+            del _schemas[next(iter(_schemas))]
+        _schemas[registry.fingerprint] = schema
+    return schema
 
-            if key == "eros_tags":
-                sanitized_tags = StateSanitizer._sanitize_tag_list(value)
-                if sanitized_tags is not None:
-                    clean_state[key] = sanitized_tags
-                else:
-                    removal_log.append("Видалено невалідні erotic tags.")
-                continue
 
-            if key in {"prof_primary", "prof_secondary", "prof_tertiary"}:
-                sanitized = StateSanitizer._sanitize_enum_token(value, HollandCode)
-                if sanitized is not None:
-                    clean_state[key] = sanitized
-                else:
-                    removal_log.append(f"Видалено невалідний enum '{key}'.")
-                continue
+class StateSanitizer:
+    @staticmethod
+    def get_current_bank_fingerprint() -> str:
+        return get_question_bank_registry().fingerprint
 
-            removal_log.append(f"Видалено невідоме поле '{key}'.")
+    @staticmethod
+    def extract_persistable_state(
+        source_state: Mapping[str, Any],
+        registry: QuestionBankRegistry | None = None,
+    ) -> dict[str, Any]:
+        registry = registry or get_question_bank_registry()
+        clean_state, _ = StateSanitizer.sanitize(
+            incoming_state={
+                key: value
+                for key, value in source_state.items()
+                if not key.startswith("FormSubmitter")
+            },
+            incoming_bank_fingerprint=registry.fingerprint,
+            registry=registry,
+        )
+        return clean_state
 
-        for bank in registry.banks.values():
-            for question in bank.questions:
-                if not question.is_best_worst:
-                    continue
-                best_key = question_state_key(bank.module, question.id, "best")
-                worst_key = question_state_key(bank.module, question.id, "worst")
-                if clean_state.get(best_key) == clean_state.get(worst_key) and best_key in clean_state:
-                    clean_state.pop(best_key, None)
-                    clean_state.pop(worst_key, None)
-                    removal_log.append(
-                        f"Видалено некоректну пару best/worst для '{question.id}': не можна обрати той самий варіант двічі."
-                    )
+    @staticmethod
+    def sanitize(
+        incoming_state: Mapping[str, Any],
+        incoming_bank_fingerprint: str | None = None,
+        registry: QuestionBankRegistry | None = None,
+    ) -> tuple[dict[str, Any], list[str]]:
+        schema = get_state_schema(registry or get_question_bank_registry())
+        return schema.sanitize(incoming_state, incoming_bank_fingerprint)
 
-        return clean_state, removal_log
+    @staticmethod
+    def sanitize_many(
+        incoming: Iterable[tuple[Mapping[str, Any], str | None]],
+        registry: QuestionBankRegistry | None = None,
+    ) -> list[tuple[dict[str, Any], list[str]]]:
+        """`sanitize` for many `(state, bank fingerprint)` pairs answered on the same registry."""
+        schema = get_state_schema(registry or get_question_bank_registry())
+        return [schema.sanitize(state, fingerprint) for state, fingerprint in incoming]
 
     @staticmethod
     def _sanitize_number(value: Any, min_value: float, max_value: float) -> float | None:
@@ -215,19 +215,6 @@ class StateSanitizer:
             return None
         return numeric
 
-    @staticmethod
-    def _sanitize_enum_token(value: Any, enum_class: type[Enum]) -> str | None:
-        if isinstance(value, enum_class):
-            return value.name
-        if not isinstance(value, str):
-            return None
-        if value in enum_class.__members__:
-            return value
-        for member in enum_class:
-            if member.value == value:
-                return member.name
-        return None
-
     @staticmethod
     def _sanitize_tag_list(value: Any) -> list[str] | None:
         if not isinstance(value, list):
@@ -244,3 +231,49 @@ class StateSanitizer:
                 seen_tags.add(tag)
                 valid_tags.append(tag)
         return valid_tags
+
+
+def _choice_validator(choices: frozenset[str]) -> Validator:
+    return lambda value: value if isinstance(value, str) and value in choices else None
+
+
+def _enum_validator(enum_class: type[Enum]) -> Validator:
+    """Accepts a member, its name or its value and returns the member name."""
+    tokens: dict[Any, str] = {member.value: member.name for member in enum_class}
+    tokens.update((member, member.name) for member in enum_class)
+    tokens.update((name, name) for name in enum_class.__members__)
+    return lambda value: tokens.get(value) if isinstance(value, (str, enum_class)) else None
+
+
+def _flag_or_none(value: Any) -> bool | None:
+    return value if isinstance(value, bool) else None
+
+
+def _static_rules() -> dict[str, KeyRule]:
+    rules: dict[str, KeyRule] = {}
+    for key, modes in MODE_FIELDS.items():
+        rules[key] = (_NO_OPTIONS, _choice_validator(frozenset(modes)), f"Видалено невалідний режим '{key}'.")
+    for key in HIGH_LEVEL_KEYS:
+        rules[key] = (
+            _NO_OPTIONS,
+            partial(StateSanitizer._sanitize_number, min_value=0.0, max_value=100.0),
+            f"Видалено невалідне числове поле '{key}'.",
+        )
+    for key in FLAG_KEYS:
+        rules[key] = (_NO_OPTIONS, _flag_or_none, f"Видалено невалідний прапорець '{key}'.")
+    for key in sorted(FACET_KEYS):
+        rules[key] = (
+            _NO_OPTIONS,
+            partial(StateSanitizer._sanitize_number, min_value=0.0, max_value=20.0),
+            f"Видалено невалідний facet '{key}'.",
+        )
+    for key, enum_class in ENUM_FIELDS.items():
+        rules[key] = (_NO_OPTIONS, _enum_validator(enum_class), f"Видалено невалідний enum '{key}'.")
+    for key in UNIT_KEYS:
+        rules[key] = (
+            _NO_OPTIONS,
+            partial(StateSanitizer._sanitize_number, min_value=0.0, max_value=1.0),
+            f"Видалено невалідне числове поле '{key}'.",
+        )
+    rules["eros_tags"] = (_NO_OPTIONS, StateSanitizer._sanitize_tag_list, "Видалено невалідні erotic tags.")
+    return rules
@@ -0,0 +1,187 @@
+"""
+Exact score distributions of a question bank under uniformly random answers.
+
+Questions are answered independently, so the distribution of a dimension total is the
+convolution of the per-question distributions of that dimension's values: each option
+of a single-choice question with equal probability, and each ordered pair of distinct
+options of a best/worst question with equal probability. The resulting distributions
+map through the same normalization as `QuestionnaireScorer`, which gives exact means,
+quantiles and floor / ceiling mass instead of Monte Carlo estimates.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+import math
+from typing import Callable, Iterable, Mapping
+
+from src.question_bank import QuestionBank, QuestionItem
+
+# Totals closer than this are one atom; it absorbs float summation noise.
+_VALUE_DIGITS = 9
+_PROBABILITY_TOLERANCE = 1e-12
+
+
+@dataclass(frozen=True)
+class ScoreDistribution:
+    """Discrete distribution: ascending `values` with their `probabilities`."""
+
+    values: tuple[float, ...]
+    probabilities: tuple[float, ...]
+
+    @classmethod
+    def from_masses(cls, masses: Mapping[float, float]) -> "ScoreDistribution":
+        merged: defaultdict[float, float] = defaultdict(float)
+        for value, probability in masses.items():
+            merged[round(value, _VALUE_DIGITS)] += probability
+        values = tuple(sorted(merged))
+        return cls(values=values, probabilities=tuple(merged[value] for value in values))
+
+    @classmethod
+    def point(cls, value: float) -> "ScoreDistribution":
+        return cls(values=(value,), probabilities=(1.0,))
+
+    @classmethod
+    def uniform(cls, values: Iterable[float]) -> "ScoreDistribution":
+        values = list(values)
+        masses: defaultdict[float, float] = defaultdict(float)
+        for value in values:
+            masses[value] += 1.0 / len(values)
+        return cls.from_masses(masses)
+
+    def __add__(self, other: "ScoreDistribution") -> "ScoreDistribution":
+        """Distribution of the sum of two independent scores (discrete convolution)."""
+        masses: defaultdict[float, float] = defaultdict(float)
+        for value, probability in zip(self.values, self.probabilities):
+            for other_value, other_probability in zip(other.values, other.probabilities):
+                masses[round(value + other_value, _VALUE_DIGITS)] += probability * other_probability
+        return ScoreDistribution.from_masses(masses)
+
+    def map(self, transform: Callable[[float], float]) -> "ScoreDistribution":
+        masses: defaultdict[float, float] = defaultdict(float)
+        for value, probability in zip(self.values, self.probabilities):
+            masses[transform(value)] += probability
+        return ScoreDistribution.from_masses(masses)
+
+    @property
+    def mean(self) -> float:
+        return sum(value * probability for value, probability in zip(self.values, self.probabilities))
+
+    @property
+    def std(self) -> float:
+        mean = self.mean
+        variance = sum((value - mean) ** 2 * probability for value, probability in zip(self.values, self.probabilities))
+        return math.sqrt(variance)
+
+    @property
+    def floor_mass(self) -> float:
+        """Probability of the lowest attainable score."""
+        return self.probabilities[0]
+
+    @property
+    def ceiling_mass(self) -> float:
+        """Probability of the highest attainable score."""
+        return self.probabilities[-1]
+
+    def quantile(self, q: float) -> float:
+        """Smallest value whose cumulative probability reaches `q`."""
+        cumulative = 0.0
+        for value, probability in zip(self.values, self.probabilities):
+            cumulative += probability
+            if cumulative >= q - _PROBABILITY_TOLERANCE:
+                return value
+        return self.values[-1]
+
+    def spread(self, lower: float = 0.1, upper: float = 0.9) -> float:
+        return self.quantile(upper) - self.quantile(lower)
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "mean": self.mean,
+            "std": self.std,
+            "p10": self.quantile(0.1),
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "floor_mass": self.floor_mass,
+            "ceiling_mass": self.ceiling_mass,
+        }
+
+
+def _total(parts: Iterable[ScoreDistribution]) -> ScoreDistribution:
+    total = ScoreDistribution.point(0.0)
+    for part in parts:
+        # Questions that never touch the dimension add nothing.
+        if part.values != (0.0,):
+            total = total + part
+    return total
+
+
+class ScoreDistributionEngine:
+    @staticmethod
+    def single_choice(question: QuestionItem, dimension: int) -> ScoreDistribution:
+        return ScoreDistribution.uniform(option.vector[dimension] for option in question.options)
+
+    @staticmethod
+    def best_worst(option_dimensions: tuple[int, ...], dimension: int) -> ScoreDistribution:
+        """Priority points of one best/worst question: +1 for a best pick on `dimension`, -1 for a worst pick."""
+        points = [
+            float(best == dimension) - float(worst == dimension)
+            for best_position, best in enumerate(option_dimensions)
+            for worst_position, worst in enumerate(option_dimensions)
+            if best_position != worst_position
+        ]
+        return ScoreDistribution.uniform(points)
+
+    @staticmethod
+    def dimension_distributions(bank: QuestionBank) -> dict[str, ScoreDistribution]:
+        """
+        Distribution of every dimension score under uniformly random answers: the
+        normalized `QuestionnaireScorer.score` values, or for needs banks with
+        absolute / priority families the `raw_*` values of `build_needs_component`.
+        """
+        labels = bank.metadata.vector_labels
+        if bank.module == "needs" and any(question.family is not None for question in bank.questions):
+            return ScoreDistributionEngine._needs_raw_distributions(bank)
+
+        best_worst = [question.id for question in bank.questions if question.is_best_worst]
+        if best_worst:
+            raise ValueError(
+                f"Module '{bank.module}' scores single-choice questions only; best/worst questions: {', '.join(best_worst)}"
+            )
+        minimums, maximums = bank.min_vector(), bank.max_vector()
+        distributions: dict[str, ScoreDistribution] = {}
+        for index, label in enumerate(labels):
+            total = _total(ScoreDistributionEngine.single_choice(question, index) for question in bank.questions)
+            low, high = minimums[index], maximums[index]
+            if high == low:
+                distributions[label] = ScoreDistribution.point(0.5)
+            else:
+                distributions[label] = total.map(lambda value: min(max((value - low) / (high - low), 0.0), 1.0))
+        return distributions
+
+    @staticmethod
+    def priority_distributions(bank: QuestionBank) -> dict[str, ScoreDistribution]:
+        """Distribution of the `priority_*` points of a needs bank's best/worst questions."""
+        dominant_dimensions = bank.compiled.dominant_dimensions
+        priority_positions = [position for position, question in enumerate(bank.questions) if question.family == "priority"]
+        return {
+            label: _total(
+                ScoreDistributionEngine.best_worst(dominant_dimensions[position], index) for position in priority_positions
+            )
+            for index, label in enumerate(bank.metadata.vector_labels)
+        }
+
+    @staticmethod
+    def _needs_raw_distributions(bank: QuestionBank) -> dict[str, ScoreDistribution]:
+        distributions: dict[str, ScoreDistribution] = {}
+        for index, label in enumerate(bank.metadata.vector_labels):
+            questions = [
+                question for question in bank.questions if question.family == "absolute" and question.dimension == label
+            ]
+            if not questions:
+                distributions[label] = ScoreDistribution.point(0.5)
+                continue
+            total = _total(ScoreDistributionEngine.single_choice(question, index) for question in questions)
+            distributions[label] = total.map(lambda value: value / len(questions))
+        return distributions
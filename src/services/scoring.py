@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Mapping
+from typing import Mapping, Sequence
+
+import numpy as np
 
 from src.domain.eros import ErosComponent
 from src.domain.needs import RelationalNeedsComponent
@@ -17,6 +19,25 @@ class VectorScore:
     normalized: tuple[float, ...]
 
 
+@dataclass(frozen=True)
+class BatchVectorScore:
+    raw_totals: np.ndarray
+    min_totals: tuple[float, ...]
+    max_totals: tuple[float, ...]
+    normalized: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.raw_totals.shape[0])
+
+    def row(self, index: int) -> VectorScore:
+        return VectorScore(
+            raw_totals=tuple(self.raw_totals[index].tolist()),
+            min_totals=self.min_totals,
+            max_totals=self.max_totals,
+            normalized=tuple(self.normalized[index].tolist()),
+        )
+
+
 def _normalize_score(raw_value: float, min_value: float, max_value: float) -> float:
     if max_value == min_value:
         return 0.5
@@ -42,9 +63,11 @@ def _coerce_best_worst_response(question: QuestionItem, response: str | Question
     return response.best_option_id, response.worst_option_id
 
 
-def _dominant_dimension(question: QuestionItem, option_id: str) -> int:
-    option = question.get_option(option_id)
-    return max(range(len(option.vector)), key=lambda index: option.vector[index])
+def _option_vector_table(bank: QuestionBank) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    compiled = bank.compiled
+    vectors = np.frombuffer(compiled.vectors, dtype=np.float64).reshape(-1, compiled.vector_size)
+    offsets = np.array(compiled.offsets, dtype=np.int64)
+    return vectors, offsets[:-1], offsets[1:] - offsets[:-1]
 
 
 class QuestionnaireScorer:
@@ -56,13 +79,17 @@ class QuestionnaireScorer:
                 f"Incomplete responses for module '{bank.module}'. Missing question ids: {', '.join(missing)}"
             )
 
-        totals = [0.0] * bank.vector_size
-        for question in bank.questions:
-            selected_option = question.get_option(
+        compiled = bank.compiled
+        vectors = compiled.vectors
+        vector_size = compiled.vector_size
+        totals = [0.0] * vector_size
+        for question, offset in zip(bank.questions, compiled.offsets):
+            row = offset + question.option_position(
                 _coerce_single_choice_response(question, responses[question.id])
             )
-            for index, value in enumerate(selected_option.vector):
-                totals[index] += value
+            start = row * vector_size
+            for index in range(vector_size):
+                totals[index] += vectors[start + index]
 
         minimums = bank.min_vector()
         maximums = bank.max_vector()
@@ -77,6 +104,79 @@ class QuestionnaireScorer:
             normalized=normalized,
         )
 
+    @staticmethod
+    def build_response_matrix(
+        bank: QuestionBank,
+        responses_batch: Sequence[Mapping[str, str | QuestionResponse]],
+    ) -> np.ndarray:
+        """Encode per-respondent option ids as a respondents x questions option-index matrix.
+
+        Unanswered questions are encoded as -1 so `score_batch` can report them.
+        """
+        matrix = np.full((len(responses_batch), len(bank.questions)), -1, dtype=np.int32)
+        for column, question in enumerate(bank.questions):
+            for row, responses in enumerate(responses_batch):
+                if question.id in responses:
+                    option_id = _coerce_single_choice_response(question, responses[question.id])
+                    matrix[row, column] = question.option_position(option_id)
+        return matrix
+
+    @staticmethod
+    def score_batch(bank: QuestionBank, response_matrix: np.ndarray | Sequence[Sequence[int]]) -> BatchVectorScore:
+        """Score many respondents at once from a respondents x questions option-index matrix.
+
+        Produces the same floats as calling `score` once per respondent.
+        """
+        best_worst = [question.id for question in bank.questions if question.is_best_worst]
+        if best_worst:
+            raise ValueError(
+                f"Batch scoring supports single-choice questions only; module '{bank.module}' has best/worst "
+                f"questions: {', '.join(best_worst)}"
+            )
+
+        matrix = np.asarray(response_matrix)
+        if matrix.ndim != 2 or matrix.shape[1] != len(bank.questions):
+            raise ValueError(
+                f"Response matrix for module '{bank.module}' must have shape (respondents, {len(bank.questions)})."
+            )
+        if matrix.size and not np.issubdtype(matrix.dtype, np.integer):
+            raise ValueError("Response matrix must contain integer option indexes.")
+
+        vectors, offsets, option_counts = _option_vector_table(bank)
+        matrix = matrix.astype(np.int64, copy=False)
+        missing_columns = np.flatnonzero((matrix < 0).any(axis=0))
+        if missing_columns.size:
+            missing = [bank.questions[column].id for column in missing_columns]
+            raise ValueError(
+                f"Incomplete responses for module '{bank.module}'. Missing question ids: {', '.join(missing)}"
+            )
+        invalid_columns = np.flatnonzero((matrix >= option_counts).any(axis=0))
+        if invalid_columns.size:
+            invalid = [bank.questions[column].id for column in invalid_columns]
+            raise ValueError(f"Option index out of range for module '{bank.module}' questions: {', '.join(invalid)}")
+
+        # Gather every selected option vector, then add question by question so the
+        # summation order (and therefore every float) matches the per-respondent path.
+        gathered = vectors[matrix + offsets]
+        totals = np.zeros((matrix.shape[0], bank.vector_size), dtype=np.float64)
+        for column in range(matrix.shape[1]):
+            totals += gathered[:, column, :]
+
+        minimums = bank.min_vector()
+        maximums = bank.max_vector()
+        min_array = np.array(minimums, dtype=np.float64)
+        span = np.array(maximums, dtype=np.float64) - min_array
+        flat_span = span == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            normalized = np.clip((totals - min_array) / np.where(flat_span, 1.0, span), 0.0, 1.0)
+        normalized[:, flat_span] = 0.5
+        return BatchVectorScore(
+            raw_totals=totals,
+            min_totals=minimums,
+            max_totals=maximums,
+            normalized=normalized,
+        )
+
     @staticmethod
     def build_needs_component(
         bank: QuestionBank,
@@ -96,7 +196,8 @@ class QuestionnaireScorer:
         absolute_counts = [0] * bank.vector_size
         priority_points = [0.0] * bank.vector_size
 
-        for question in bank.questions:
+        dominant_dimensions = bank.compiled.dominant_dimensions
+        for position, question in enumerate(bank.questions):
             response = responses[question.id]
             if question.family == "absolute":
                 option_id = _coerce_single_choice_response(question, response)
@@ -107,8 +208,9 @@ class QuestionnaireScorer:
 
             if question.family == "priority":
                 best_option_id, worst_option_id = _coerce_best_worst_response(question, response)
-                priority_points[_dominant_dimension(question, best_option_id)] += 1.0
-                priority_points[_dominant_dimension(question, worst_option_id)] -= 1.0
+                option_dimensions = dominant_dimensions[position]
+                priority_points[option_dimensions[question.option_position(best_option_id)]] += 1.0
+                priority_points[option_dimensions[question.option_position(worst_option_id)]] -= 1.0
                 continue
 
             raise ValueError(f"Unsupported needs question family for '{question.id}'.")
@@ -174,3 +276,63 @@ class QuestionnaireScorer:
             "context_dependency": score.normalized[2],
             "need_vs_priority": score.normalized[3],
         }
+
+    @staticmethod
+    def build_eros_components_batch(
+        bank: QuestionBank,
+        response_matrix: np.ndarray | Sequence[Sequence[int]],
+        erotic_tags: Sequence[list[str] | None] | None = None,
+    ) -> list[ErosComponent]:
+        score = QuestionnaireScorer.score_batch(bank, response_matrix)
+        components: list[ErosComponent] = []
+        for index, (accel_score, brake_score, *_) in enumerate(score.normalized.tolist()):
+            tags = erotic_tags[index] if erotic_tags is not None else None
+            component = ErosComponent(erotic_tags=list(tags or []))
+            component.calculate_from_quiz(accel_score, brake_score)
+            components.append(component)
+        return components
+
+    @staticmethod
+    def build_shadow_components_batch(
+        bank: QuestionBank,
+        response_matrix: np.ndarray | Sequence[Sequence[int]],
+    ) -> list[ShadowComponent]:
+        score = QuestionnaireScorer.score_batch(bank, response_matrix)
+        components: list[ShadowComponent] = []
+        for normalized in score.normalized.tolist():
+            component = ShadowComponent()
+            component.calculate_from_quiz(tuple(normalized))
+            components.append(component)
+        return components
+
+    @staticmethod
+    def build_provision_scores_batch(
+        bank: QuestionBank,
+        response_matrix: np.ndarray | Sequence[Sequence[int]],
+    ) -> list[dict[str, float]]:
+        score = QuestionnaireScorer.score_batch(bank, response_matrix)
+        return [
+            {
+                "safety_provision": normalized[0],
+                "resource_provision": normalized[1],
+                "resonance_provision": normalized[2],
+                "expansion_provision": normalized[3],
+            }
+            for normalized in score.normalized.tolist()
+        ]
+
+    @staticmethod
+    def build_calibration_scores_batch(
+        bank: QuestionBank,
+        response_matrix: np.ndarray | Sequence[Sequence[int]],
+    ) -> list[dict[str, float]]:
+        score = QuestionnaireScorer.score_batch(bank, response_matrix)
+        return [
+            {
+                "stress_stability": normalized[0],
+                "ideal_vs_real": normalized[1],
+                "context_dependency": normalized[2],
+                "need_vs_priority": normalized[3],
+            }
+            for normalized in score.normalized.tolist()
+        ]
@@ -9,10 +9,16 @@ import streamlit as st
 
 from src.profile import UserProfile
 from src.question_bank import get_question_bank_registry
+from src.question_bank_history import get_question_bank_history
 from src.services.adjustment import NeedsAdjustmentService
 from src.services.compatibility import CompatibilityComparator
 from src.services.profile_codec import ProfileCodec, ProfileCodecError
-from src.services.profile_builder import QUESTIONNAIRE_MODE_KEY, build_user_profile_from_state, normalize_questionnaire_mode
+from src.services.profile_builder import (
+    QUESTIONNAIRE_MODE_KEY,
+    IncrementalProfileBuilder,
+    build_user_profile_from_state,
+    normalize_questionnaire_mode,
+)
 from src.services.reporting import ReportGenerator
 from src.services.sanitizer import StateSanitizer
 from src.ui import (
@@ -26,6 +32,7 @@ from src.ui import (
 )
 
 CURRENT_VERSION = "4.0"
+PROFILE_BUILDER_KEY = "_profile_builder"
 
 NEED_COLORS = {
     "Safety": "#2f80ed",
@@ -291,16 +298,13 @@ def render_profile_import_tab() -> None:
                 st.error(f"Не вдалося завантажити JSON payload: {exc}")
 
 
-def render_profile_export_tab(bank_fingerprint: str) -> None:
+def render_profile_export_tab() -> None:
     current_state = StateSanitizer.extract_persistable_state(st.session_state)
     if not current_state:
         st.caption("Після введення даних тут з'явиться рядок профілю для збереження або порівняння.")
         return
 
-    payload = ProfileCodec.build_payload(
-        state=current_state,
-        bank_fingerprint=bank_fingerprint,
-    )
+    payload = ProfileCodec.build_compact_payload(current_state, get_question_bank_registry())
     encoded_payload = ProfileCodec.encode_payload(payload)
     st.text_area(
         "Поточний рядок профілю",
@@ -323,6 +327,15 @@ def render_profile_export_tab(bank_fingerprint: str) -> None:
     )
 
 
+def _session_profile_builder(registry) -> IncrementalProfileBuilder:
+    """Per-session builder, so a resubmit only rescores the parts of the questionnaire that changed."""
+    builder = st.session_state.get(PROFILE_BUILDER_KEY)
+    if not isinstance(builder, IncrementalProfileBuilder) or builder.registry.fingerprint != registry.fingerprint:
+        builder = IncrementalProfileBuilder(registry)
+        st.session_state[PROFILE_BUILDER_KEY] = builder
+    return builder
+
+
 def _render_missing_inputs(section_name: str, missing_items: list[str]) -> None:
     if not missing_items:
         return
@@ -367,14 +380,16 @@ def render_partner_comparison_tab(bank_fingerprint: str) -> None:
         st.error(f"Не вдалося декодувати профіль партнера: {exc}")
         return
 
-    current_state = StateSanitizer.extract_persistable_state(st.session_state)
+    partner_registry = get_question_bank_history().resolve(partner_payload.bank_fingerprint, default=registry)
+    current_state = StateSanitizer.extract_persistable_state(st.session_state, registry)
     partner_state, partner_removals = StateSanitizer.sanitize(
         partner_payload.state,
         incoming_bank_fingerprint=partner_payload.bank_fingerprint,
+        registry=partner_registry,
     )
 
     current_profile = build_user_profile_from_state(current_state, registry, name="Ваш профіль")
-    partner_profile = build_user_profile_from_state(partner_state, registry, name="Профіль партнера")
+    partner_profile = build_user_profile_from_state(partner_state, partner_registry, name="Профіль партнера")
 
     if not current_profile.is_complete:
         st.error("Порівняння недоступне: ваш поточний профіль ще не повністю заповнений.")
@@ -431,7 +446,7 @@ def render_profile_workspace(bank_fingerprint: str) -> None:
         with import_tab:
             render_profile_import_tab()
         with export_tab:
-            render_profile_export_tab(bank_fingerprint)
+            render_profile_export_tab()
         with compare_tab:
             render_partner_comparison_tab(bank_fingerprint)
 
@@ -684,8 +699,8 @@ def main() -> None:
             _render_missing_inputs("Calibration", calibration_missing)
         return
 
-    current_state = StateSanitizer.extract_persistable_state(st.session_state)
-    built = build_user_profile_from_state(current_state, registry, name="User")
+    current_state = StateSanitizer.extract_persistable_state(st.session_state, registry)
+    built = _session_profile_builder(registry).build(current_state)
     if not built.is_complete or built.user is None:
         st.error("Розрахунок заблоковано: анкету заповнено не повністю.")
         return
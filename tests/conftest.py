@@ -1,4 +1,5 @@
 import json
+from random import Random
 import sys
 from pathlib import Path
 
@@ -7,8 +8,67 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from src.domain.eros import ErosComponent
+from src.domain.needs import RelationalNeedsComponent
+from src.domain.professional import ProfessionalComponent
+from src.domain.psychometrics import PsychometricsComponent
+from src.domain.shadow import ShadowComponent
+from src.enums import HollandCode
+from src.profile import UserProfile
+from src.question_bank import get_question_bank_registry, question_state_key
+
 
 def write_json(tmp_path: Path, filename: str, payload: dict) -> Path:
     path = tmp_path / filename
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
     return path
+
+
+def random_profile(rng: Random, index: int) -> UserProfile:
+    """Profile with random needs, provision, eros, shadow and facets for comparison tests."""
+    shadow = ShadowComponent()
+    shadow.calculate_from_quiz(tuple(rng.random() for _ in range(4)))
+    keys = ("safety", "resource", "resonance", "expansion")
+    return UserProfile(
+        name=f"P{index}",
+        psychometrics=PsychometricsComponent.from_high_level_scores(*(rng.random() for _ in range(5))),
+        shadow=shadow,
+        eros=ErosComponent(accelerator=rng.random(), brake=rng.random()),
+        needs=RelationalNeedsComponent(
+            **{f"adjusted_{key}": rng.random() for key in keys},
+            **{f"priority_{key}": rng.random() for key in keys},
+        ),
+        professional=ProfessionalComponent(primary_type=rng.choice(list(HollandCode))),
+        provision=None if index % 2 else {f"{key}_provision": rng.random() for key in keys},
+    )
+
+
+def complete_state(mode: str, option_index: int = 0) -> dict[str, object]:
+    """Questionnaire state answering every active question of `mode` with the same option index."""
+    registry = get_question_bank_registry()
+    state: dict[str, object] = {
+        "questionnaire_mode": mode,
+        "psycho_o": 70,
+        "psycho_c": 70,
+        "psycho_e": 55,
+        "psycho_a": 65,
+        "psycho_n": 35,
+        "psycho_adhd": False,
+        "psycho_asd": False,
+        "prof_primary": HollandCode.SOCIAL.name,
+        "prof_secondary": HollandCode.INVESTIGATIVE.name,
+        "prof_tertiary": HollandCode.ARTISTIC.name,
+        "prof_centrality": 0.45,
+    }
+    for module in ("needs", "shadow", "eros"):
+        bank = registry.get(module).for_mode(mode)
+        for question in bank.questions:
+            if question.is_best_worst:
+                best_idx = option_index % len(question.options)
+                worst_idx = (option_index + 1) % len(question.options)
+                state[question_state_key(module, question.id, "best")] = question.options[best_idx].id
+                state[question_state_key(module, question.id, "worst")] = question.options[worst_idx].id
+            else:
+                option = question.options[min(option_index, len(question.options) - 1)]
+                state[question_state_key(module, question.id)] = option.id
+    return state
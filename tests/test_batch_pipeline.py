@@ -0,0 +1,71 @@
+import io
+import json
+
+from src.batch_pipeline import main, run_pipeline
+from src.question_bank import get_question_bank_registry
+from src.services.profile_builder import build_user_profile_from_state
+from src.services.profile_codec import ProfileCodec
+from src.services.reporting import ReportGenerator
+from conftest import complete_state
+
+
+def _payload_line(state: dict[str, object]) -> str:
+    payload = ProfileCodec.build_payload(state, get_question_bank_registry().fingerprint, created_at="2024-01-01T00:00:00+00:00")
+    return json.dumps(ProfileCodec.to_json_dict(payload), ensure_ascii=False)
+
+
+def _lines() -> list[str]:
+    tampered = json.loads(_payload_line(complete_state("simple")))
+    tampered["state"]["psycho_o"] = 10
+    incomplete = complete_state("extended")
+    incomplete.pop(next(key for key in incomplete if key.startswith("shadow_q")))
+    return [
+        _payload_line(complete_state("simple")),
+        "not json",
+        json.dumps(tampered),
+        "",
+        _payload_line(incomplete),
+        _payload_line(complete_state("extended", option_index=2)),
+    ]
+
+
+def test_run_pipeline_scores_valid_payloads_and_rejects_the_rest() -> None:
+    output, rejects = io.StringIO(), io.StringIO()
+
+    stats = run_pipeline(_lines(), output, rejects, workers=1, batch_size=2)
+
+    assert (stats.accepted, stats.rejected) == (2, 3)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record["line"] for record in records] == [1, 6]
+    expected = build_user_profile_from_state(complete_state("simple"), get_question_bank_registry())
+    assert records[0]["manual"] == json.loads(json.dumps(ReportGenerator.generate_manual(expected.user)))
+
+    rejected = {record["line"]: record for record in map(json.loads, rejects.getvalue().splitlines())}
+    assert sorted(rejected) == [2, 3, 5]
+    assert "checksum" in rejected[3]["error"]
+    assert rejected[5]["missing_inputs"]
+
+
+def test_batch_pipeline_cli_matches_in_process_run_on_a_process_pool(tmp_path) -> None:
+    input_path = tmp_path / "profiles.ndjson"
+    input_path.write_text("\n".join(_lines() * 3) + "\n", encoding="utf-8")
+    expected_output, expected_rejects = io.StringIO(), io.StringIO()
+    run_pipeline(_lines() * 3, expected_output, expected_rejects, workers=1)
+
+    exit_code = main(
+        [
+            str(input_path),
+            "--output",
+            str(tmp_path / "manuals.ndjson"),
+            "--rejects",
+            str(tmp_path / "rejects.ndjson"),
+            "--workers",
+            "2",
+            "--batch-size",
+            "2",
+        ]
+    )
+
+    assert exit_code == 0
+    assert (tmp_path / "manuals.ndjson").read_text(encoding="utf-8") == expected_output.getvalue()
+    assert (tmp_path / "rejects.ndjson").read_text(encoding="utf-8") == expected_rejects.getvalue()
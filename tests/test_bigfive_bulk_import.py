@@ -0,0 +1,106 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from src.bigfive_bulk_import import CACHE_FORMAT_VERSION, FacetCache, main, run_bulk_import
+from src.services.bigfive_pdf_parser import BigFivePdfParser
+from src.services.bigfive_state import bigfive_state_fragment
+from test_bigfive_pdf_parser import _sample_bigfive_text
+
+
+@pytest.fixture(autouse=True)
+def text_pdf_reader(monkeypatch) -> None:
+    # Each "PDF" is its UTF-8 text on one page; worker processes inherit the patch on fork.
+    class FakePage:
+        def __init__(self, text: str) -> None:
+            self.text = text
+
+        def extract_text(self) -> str:
+            return self.text
+
+    class FakeReader:
+        def __init__(self, stream) -> None:
+            data = stream.getvalue()
+            if not data.startswith(b"%PDF"):
+                raise ValueError("EOF marker not found")
+            self.pages = [FakePage(data[4:].decode("utf-8"))]
+
+    monkeypatch.setattr("pypdf.PdfReader", FakeReader)
+
+
+def _archive(path) -> None:
+    text = _sample_bigfive_text()
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("b/second.pdf", b"%PDF" + text.replace("Бали: 1 (", "Бали: 7 (", 1).encode("utf-8"))
+        archive.writestr("a.pdf", b"%PDF" + text.encode("utf-8"))
+        archive.writestr("c-copy-of-a.PDF", b"%PDF" + text.encode("utf-8"))
+        archive.writestr("d-broken.pdf", b"not a pdf")
+        archive.writestr("e-incomplete.pdf", b"%PDF" + "Тривога\nБали: 17 (high)".encode("utf-8"))
+        archive.writestr("notes.txt", b"ignored")
+
+
+def test_run_bulk_import_writes_fragments_in_name_order_and_parses_duplicates_once(tmp_path) -> None:
+    source = tmp_path / "results.zip"
+    _archive(source)
+    output, errors = io.StringIO(), io.StringIO()
+
+    stats = run_bulk_import(source, output, errors, workers=1, max_pending=2)
+
+    assert (stats.imported, stats.failed, stats.parsed, stats.cached) == (3, 2, 2, 1)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record["file"] for record in records] == ["a.pdf", "b/second.pdf", "c-copy-of-a.PDF"]
+    expected = bigfive_state_fragment(BigFivePdfParser.parse_text(_sample_bigfive_text()))
+    assert records[0]["state"] == expected
+    assert (records[0]["pages_read"], records[0]["page_count"]) == (1, 1)
+    assert records[1]["state"]["facet_neur_anxiety"] == 7
+    assert records[2]["state"] == expected and records[2]["cached"] is True
+    assert records[2]["sha256"] == records[0]["sha256"]
+
+    failures = [json.loads(line) for line in errors.getvalue().splitlines()]
+    assert [failure["file"] for failure in failures] == ["d-broken.pdf", "e-incomplete.pdf"]
+    assert "Не вдалося прочитати PDF" in failures[0]["error"]
+    assert "Не знайдено фасет" in failures[1]["error"]
+
+
+def test_process_pool_matches_in_process_import_and_cache_dir_is_reused(tmp_path) -> None:
+    source = tmp_path / "results.zip"
+    _archive(source)
+    in_process, in_process_errors = io.StringIO(), io.StringIO()
+    run_bulk_import(source, in_process, in_process_errors, workers=1)
+
+    cache_dir = tmp_path / "cache"
+    pooled, pooled_errors = io.StringIO(), io.StringIO()
+    stats = run_bulk_import(source, pooled, pooled_errors, cache=FacetCache(cache_dir), workers=2, max_pending=1)
+
+    assert pooled.getvalue() == in_process.getvalue()
+    assert pooled_errors.getvalue() == in_process_errors.getvalue()
+    assert stats.parsed == 2 and len(list(cache_dir.glob("*.json"))) == 2
+
+    output, errors = tmp_path / "fragments.ndjson", tmp_path / "errors.ndjson"
+    assert main([str(source), "--output", str(output), "--errors", str(errors), "--cache-dir", str(cache_dir), "--workers", "1"]) == 0
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [record.get("cached") for record in records] == [True, True, True]
+    assert len(errors.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_malformed_cache_entries_are_misses(tmp_path) -> None:
+    cache = FacetCache(tmp_path)
+    raw_scores = BigFivePdfParser.parse_text(_sample_bigfive_text()).raw_scores
+    bodies = {
+        "missing": {"format_version": CACHE_FORMAT_VERSION},
+        "list": {"format_version": CACHE_FORMAT_VERSION, "raw_scores": [1, 2]},
+        "text": {"format_version": CACHE_FORMAT_VERSION, "raw_scores": {**raw_scores, "facet_neur_anxiety": "17"}},
+        "partial": {"format_version": CACHE_FORMAT_VERSION, "raw_scores": {"facet_neur_anxiety": 17}},
+        "out-of-range": {"format_version": CACHE_FORMAT_VERSION, "raw_scores": {**raw_scores, "facet_neur_anxiety": 99}},
+        "extra": {"format_version": CACHE_FORMAT_VERSION, "raw_scores": {**raw_scores, "anxiety": 17}},
+        "array": [CACHE_FORMAT_VERSION],
+    }
+    for digest, body in bodies.items():
+        (tmp_path / f"{digest}.json").write_text(json.dumps(body), encoding="utf-8")
+        assert cache.get(digest) is None
+
+    cache.put("missing", raw_scores)
+    assert FacetCache(tmp_path).get("missing") == raw_scores
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".json"] * len(bodies)
@@ -40,3 +40,44 @@ def test_parse_text_builds_high_level_scores_from_facet_averages() -> None:
 def test_parse_text_rejects_incomplete_pdf_text() -> None:
     with pytest.raises(BigFivePdfParseError, match="Не знайдено фасет"):
         BigFivePdfParser.parse_text("Тривога\nБали: 17 (high)")
+
+
+def test_parse_text_matches_labels_case_insensitively_and_enforces_the_score_window() -> None:
+    text = _sample_bigfive_text().replace("Тривога", "ТРИВОГА").replace("Сором'язливість", "Сором ’ язливість")
+    parsed = BigFivePdfParser.parse_text(text)
+
+    assert parsed.raw_scores["facet_neur_anxiety"] == 1
+    assert parsed.raw_scores["facet_neur_self_consciousness"] == 4
+
+    with pytest.raises(BigFivePdfParseError, match="Не знайдено бал для фасета 'Злість'"):
+        BigFivePdfParser.parse_text(_sample_bigfive_text().replace("Злість", "Злість " + "x" * 2500))
+    with pytest.raises(BigFivePdfParseError, match="поза шкалою"):
+        BigFivePdfParser.parse_text(_sample_bigfive_text().replace("Бали: 1 (", "Бали: 21 (", 1))
+
+
+def test_parse_pdf_stream_stops_after_the_page_with_the_last_facet(monkeypatch) -> None:
+    text = _sample_bigfive_text()
+    middle = text.index("Пригодницькість")
+    pages = [text[:middle], text[middle:], "Додаток " * 500, "Додаток " * 500]
+    extracted: list[int] = []
+
+    class FakePage:
+        def __init__(self, index: int) -> None:
+            self.index = index
+
+        def extract_text(self) -> str:
+            extracted.append(self.index)
+            return pages[self.index]
+
+    class FakeReader:
+        def __init__(self, _stream) -> None:
+            self.pages = [FakePage(index) for index in range(len(pages))]
+
+    monkeypatch.setattr("pypdf.PdfReader", FakeReader)
+
+    streamed = BigFivePdfParser.parse_pdf_stream(b"%PDF")
+
+    assert streamed.facets == BigFivePdfParser.parse_text("\n".join(pages))
+    assert (streamed.page_count, streamed.pages_read) == (4, 2)
+    assert extracted == [0, 1]
+    assert [timing.characters for timing in streamed.page_timings] == [len(pages[0]), len(pages[1])]
@@ -0,0 +1,60 @@
+from random import Random
+
+import numpy as np
+
+from src.services.compatibility import CompatibilityComparator, CompatibilityPool
+from src.services.compatibility_index import CompatibilityIndex
+from conftest import random_profile
+
+
+def _random_pool(seed: int, size: int) -> CompatibilityPool:
+    rng = np.random.default_rng(seed)
+    shadow = rng.random((size, 4))
+    # Give part of the pool a clear attachment style so tension penalties vary.
+    shadow[: size // 2, rng.integers(0, 4)] += 0.6
+    return CompatibilityPool(
+        needs=rng.random((size, 4)),
+        provision=rng.random((size, 4)),
+        priority=rng.random((size, 4)),
+        eros=rng.random((size, 2)),
+        shadow=shadow,
+        facets=rng.random((size, 3)),
+    )
+
+
+def _exhaustive_top(index: CompatibilityIndex, pool: CompatibilityPool, keys: list[str], query, count: int) -> list[str]:
+    live = [position for position, key in enumerate(keys) if key in index]
+    ranking = CompatibilityComparator.compare_many(query, pool.take(np.array(live)))
+    return [keys[live[int(position)]] for position in ranking.top(count)]
+
+
+def test_index_top_k_matches_exhaustive_scoring_through_updates(tmp_path) -> None:
+    pool = _random_pool(1, 3000)
+    keys = [f"user-{row}" for row in range(len(pool))]
+    index = CompatibilityIndex(leaf_size=32, batch_rows=256)
+    index.insert_pool(keys, pool)
+    index.rebuild()
+
+    rng = Random(11)
+    queries = [random_profile(rng, position) for position in range(4)]
+    for query in queries:
+        assert [key for key, _ in index.top(query, 20)] == _exhaustive_top(index, pool, keys, query, 20)
+
+    for key in keys[::7]:
+        index.delete(key)
+    extra = _random_pool(2, 200)
+    extra_keys = [f"new-{row}" for row in range(len(extra))]
+    index.insert_pool(extra_keys, extra)
+    columns = ("needs", "provision", "priority", "eros", "shadow", "facets")
+    combined = CompatibilityPool(
+        **{name: np.concatenate((getattr(pool, name), getattr(extra, name))) for name in columns}
+    )
+    combined_keys = keys + extra_keys
+    for query in queries:
+        assert [key for key, _ in index.top(query, 20)] == _exhaustive_top(index, combined, combined_keys, query, 20)
+
+    path = tmp_path / "partners.npz"
+    index.save(path)
+    restored = CompatibilityIndex.load(path)
+    assert restored.keys() == index.keys()
+    assert restored.top(queries[0], 20) == index.top(queries[0], 20)
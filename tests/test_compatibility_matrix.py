@@ -0,0 +1,60 @@
+import numpy as np
+
+from src.services.compatibility import CompatibilityComparator, CompatibilityPool
+from src.services.compatibility_matrix import AllPairsCompatibilityJob
+
+
+def _pool(size: int) -> CompatibilityPool:
+    rng = np.random.default_rng(4)
+    return CompatibilityPool(
+        needs=rng.random((size, 4)),
+        provision=rng.random((size, 4)),
+        priority=rng.random((size, 4)),
+        eros=rng.random((size, 2)),
+        shadow=rng.random((size, 4)),
+        facets=rng.random((size, 3)),
+    )
+
+
+def test_all_pairs_job_resumes_and_matches_pairwise_scores(tmp_path) -> None:
+    pool = _pool(45)
+    job = AllPairsCompatibilityJob(pool, tmp_path / "cohort", block_size=16, workers=2)
+
+    partial = job.run(max_blocks=2)
+    assert (partial.completed_blocks, partial.total_blocks) == (2, 6)
+
+    resumed = AllPairsCompatibilityJob(pool, tmp_path / "cohort", block_size=16, workers=2).run()
+    assert resumed.is_complete
+
+    expected = CompatibilityComparator.compare_pools(pool, pool)
+    upper = np.triu(np.ones((45, 45), dtype=bool), k=1)
+    scores = job.scores()
+    assert scores.dtype == np.float32
+    assert np.array_equal(scores[upper], expected.scores[upper].astype(np.float32))
+    assert np.isnan(scores[~upper]).all()
+
+    for kind in ("tensions", "strengths", "notes"):
+        flags = job.flags(kind)
+        assert flags.dtype == np.uint32
+        assert np.array_equal(flags[upper], getattr(expected, kind)[upper])
+        assert not flags[~upper].any()
+
+
+def test_all_pairs_job_keeps_pairs_that_only_have_notes(tmp_path) -> None:
+    # Close enough for no tension, apart enough for no strength, different priorities and no clear attachment.
+    pool = CompatibilityPool(
+        needs=np.array([[0.4] * 4, [0.6] * 4]),
+        provision=np.array([[0.4] * 4, [0.6] * 4]),
+        priority=np.eye(4)[:2],
+        eros=np.array([[0.3, 0.3], [0.6, 0.6]]),
+        shadow=np.full((2, 4), 0.25),
+        facets=np.full((2, 3), 0.5),
+    )
+    expected = CompatibilityComparator.compare_pools(pool, pool)
+    assert (expected.tensions[0, 1], expected.strengths[0, 1]) == (0, 0) and expected.notes[0, 1] != 0
+
+    job = AllPairsCompatibilityJob(pool, tmp_path / "cohort", block_size=2, workers=1)
+    job.run()
+
+    assert job.flags("notes")[0, 1] == expected.notes[0, 1]
+    assert (job.flags("tensions")[0, 1], job.flags("strengths")[0, 1]) == (0, 0)
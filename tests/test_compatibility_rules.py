@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from src.domain.eros import ErosComponent
+from src.domain.needs import RelationalNeedsComponent
+from src.domain.professional import ProfessionalComponent
+from src.domain.psychometrics import PsychometricsComponent
+from src.domain.shadow import ShadowComponent
+from src.profile import UserProfile
+from src.services.compatibility import CompatibilityComparator, CompatibilityPool
+from src.services.compatibility_rules import (
+    COMPATIBILITY_RULES_PATH,
+    CompatibilityRuleError,
+    get_compatibility_rules,
+    load_compatibility_rules_from_payload,
+)
+
+
+def _rules_payload() -> dict:
+    return json.loads(COMPATIBILITY_RULES_PATH.read_text(encoding="utf-8"))
+
+
+def _profile_with_safety(value: float) -> UserProfile:
+    return UserProfile(
+        name="Safety",
+        psychometrics=PsychometricsComponent.from_high_level_scores(50, 50, 50, 50, 50),
+        shadow=ShadowComponent(),
+        eros=ErosComponent(),
+        needs=RelationalNeedsComponent(
+            adjusted_safety=value,
+            adjusted_resource=0.5,
+            adjusted_resonance=0.5,
+            adjusted_expansion=0.5,
+        ),
+        professional=ProfessionalComponent(),
+    )
+
+
+def test_rule_table_thresholds_can_be_tuned_without_code_changes() -> None:
+    first, second = _profile_with_safety(0.5), _profile_with_safety(0.75)
+    default_report = CompatibilityComparator.compare(first, second)
+
+    payload = _rules_payload()
+    payload["rules"][0]["rules"][0]["when"]["value"] = 0.2
+    tuned = load_compatibility_rules_from_payload(payload)
+    tuned_report = CompatibilityComparator.compare(first, second, rules=tuned)
+
+    assert all(item.title != "Різний рівень потреби: Безпека" for item in default_report.tensions)
+    gap_item = next(item for item in tuned_report.tensions if item.title == "Різний рівень потреби: Безпека")
+    assert "25 пунктів" in gap_item.detail
+    assert tuned_report.score < default_report.score
+
+
+def test_single_pair_and_array_evaluation_share_the_rules() -> None:
+    rules = get_compatibility_rules()
+    first, second = _profile_with_safety(0.1), _profile_with_safety(0.9)
+    report = CompatibilityComparator.compare(first, second)
+
+    pairs = CompatibilityComparator.compare_pools(
+        CompatibilityPool.from_profiles((first,)), CompatibilityPool.from_profiles((second,))
+    )
+
+    assert pairs.scores[0, 0] == report.score
+    assert "need_gap_safety" in rules.flag_names("tension", int(pairs.tensions[0, 0]))
+    assert len(rules.flag_names("tension", int(pairs.tensions[0, 0]))) == len(report.tensions)
+    assert int(pairs.tensions[0, 0]) & rules.flag_bit("need_gap_safety")
+    assert not int(pairs.notes[0, 0]) & rules.flag_bit("priority_mismatch")
+
+
+def test_rule_table_rejects_unknown_features() -> None:
+    payload = _rules_payload()
+    payload["rules"][1]["when"] = {"self": "needs.unknown", "op": ">=", "value": 0.5}
+
+    with pytest.raises(CompatibilityRuleError, match="unknown feature"):
+        load_compatibility_rules_from_payload(payload)
+
+
+def test_rule_table_rejects_malformed_escalations() -> None:
+    for escalation in ({}, {"severity": "high"}, "high", None):
+        payload = _rules_payload()
+        payload["rules"][1]["escalate"] = escalation
+
+        with pytest.raises(CompatibilityRuleError, match=f"Rule '{payload['rules'][1]['id']}' escalation"):
+            load_compatibility_rules_from_payload(payload)
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from pathlib import Path
+
+CORE_MODULES = (
+    "src.question_bank",
+    "src.services.scoring",
+    "src.services.adjustment",
+    "src.services.compatibility",
+    "src.services.profile_codec",
+    "src.services.profile_builder",
+)
+# Loaded on first use only: the UI, the PDF parser and their dependencies.
+DEFERRED_MODULES = ("streamlit", "pypdf", "src.ui", "src.services.bigfive_pdf_parser", "src.services.bigfive_state")
+# Cumulative `-X importtime` cost of the core; numpy is most of it.
+CORE_IMPORT_BUDGET_MS = 500
+
+
+def _import_times(modules: tuple[str, ...]) -> dict[str, tuple[int, int]]:
+    """`-X importtime` of a fresh interpreter: module -> (nesting depth, cumulative microseconds)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = ((len(name) - len(name.lstrip()) - 1) // 2, int(cumulative))
+    return times
+
+
+def test_core_modules_import_without_ui_or_pdf_dependencies_within_budget() -> None:
+    times = _import_times(CORE_MODULES)
+
+    assert [module for module in DEFERRED_MODULES if module in times] == []
+    total_us = sum(cumulative for name, (depth, cumulative) in times.items() if depth == 0 and name.startswith("src"))
+    assert total_us / 1000 < CORE_IMPORT_BUDGET_MS
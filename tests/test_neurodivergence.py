@@ -1,9 +1,12 @@
+from random import Random
+
+import numpy as np
 import pytest
 from src.domain.needs import RelationalNeedsComponent
 from src.domain.professional import ProfessionalComponent
-from src.domain.psychometrics import PsychometricsComponent
+from src.domain.psychometrics import FACET_INDEX, PsychometricsComponent
 from src.enums import HollandCode
-from src.services.adjustment import NeedsAdjustmentService
+from src.services.adjustment import CONFIDENCE_LABELS, NeedsAdjustmentService, confidence_codes, confidence_from_alignment
 from src.services.neurodivergence import NeurodivergenceService
 from src.services.provision import ProvisionService
 
@@ -69,3 +72,82 @@ def test_adjustment_keeps_higher_raw_answer_when_context_floor_is_lower() -> Non
 
     assert adjusted.adjusted_resource == pytest.approx(0.774333, abs=1e-5)
     assert adjusted.adjusted_expansion == pytest.approx(0.7605, abs=1e-5)
+
+
+def test_batch_adjustment_matches_per_profile_adjustment() -> None:
+    rng = Random(13)
+    psychos, raws, calibrations = [], [], []
+    for index in range(200):
+        psycho = PsychometricsComponent(has_adhd=index % 2 == 0, has_asd=index % 3 == 0)
+        for domain, facet in FACET_INDEX:
+            setattr(getattr(psycho, domain), facet, rng.random())
+        psychos.append(psycho)
+        raws.append(
+            RelationalNeedsComponent(
+                raw_safety=rng.uniform(-0.1, 1.1),
+                raw_resource=rng.random(),
+                raw_resonance=rng.random(),
+                raw_expansion=rng.random(),
+                priority_safety=rng.uniform(-2, 2),
+                priority_resource=rng.uniform(-2, 2),
+                priority_resonance=rng.uniform(-2, 2),
+                priority_expansion=rng.uniform(-2, 2),
+            )
+        )
+        calibrations.append(rng.random())
+
+    batch = NeedsAdjustmentService.adjust_needs_batch(
+        np.array([psycho.facet_values() for psycho in psychos]),
+        np.array([psycho.has_adhd for psycho in psychos]),
+        np.array([psycho.has_asd for psycho in psychos]),
+        np.array([(raw.raw_safety, raw.raw_resource, raw.raw_resonance, raw.raw_expansion) for raw in raws]),
+        priorities=np.array(
+            [(raw.priority_safety, raw.priority_resource, raw.priority_resonance, raw.priority_expansion) for raw in raws]
+        ),
+        need_vs_priority=np.array(calibrations),
+    )
+
+    for row, (psycho, raw, calibration) in enumerate(zip(psychos, raws, calibrations)):
+        adjusted = NeedsAdjustmentService.adjust_needs(raw, psycho, calibration_scores={"need_vs_priority": calibration})
+        assert batch.adjusted[row] == pytest.approx(
+            [adjusted.adjusted_safety, adjusted.adjusted_resource, adjusted.adjusted_resonance, adjusted.adjusted_expansion]
+        )
+        assert batch.confidence[row].tolist() == [
+            adjusted.confidence_safety,
+            adjusted.confidence_resource,
+            adjusted.confidence_resonance,
+            adjusted.confidence_expansion,
+        ]
+
+
+def test_batch_targets_and_confidence_equal_the_scalar_paths_at_the_thresholds() -> None:
+    rng = Random(29)
+    psychos = []
+    for index in range(64):
+        psycho = PsychometricsComponent(has_adhd=index % 2 == 0, has_asd=index % 4 < 2)
+        for domain, facet in FACET_INDEX:
+            # Extremes push the condition offsets past the clamp; the rest are arbitrary.
+            setattr(getattr(psycho, domain), facet, rng.choice((0.0, 0.25, 0.40, 1.0, rng.random())))
+        psychos.append(psycho)
+
+    targets = NeurodivergenceService.targets_batch(
+        np.array([psycho.facet_values() for psycho in psychos]),
+        np.array([psycho.has_adhd for psycho in psychos]),
+        np.array([psycho.has_asd for psycho in psychos]),
+    )
+    for row, psycho in enumerate(psychos):
+        context = NeurodivergenceService.analyze(psycho)
+        assert targets[row].tolist() == [
+            context.safety_target,
+            context.resource_target,
+            context.resonance_target,
+            context.expansion_signal,
+        ]
+
+    disagreements = np.array([0.0, np.nextafter(0.25, 0.0), 0.25, 0.3, np.nextafter(0.40, 0.0), 0.40, 1.0])
+    assert CONFIDENCE_LABELS[confidence_codes(disagreements)].tolist() == [
+        confidence_from_alignment(float(disagreement), 0.0, {}) for disagreement in disagreements
+    ]
+    assert CONFIDENCE_LABELS[confidence_codes(disagreements)].tolist() == [
+        "High", "High", "Medium", "Medium", "Medium", "Mixed", "Mixed"
+    ]
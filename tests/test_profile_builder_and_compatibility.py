@@ -1,50 +1,27 @@
+from random import Random
+
 from src.domain.eros import ErosComponent
-from src.domain.needs import RelationalNeedsComponent
+from src.domain.needs import NEED_KEYS, RelationalNeedsComponent
 from src.domain.professional import ProfessionalComponent
 from src.domain.psychometrics import PsychometricsComponent
 from src.domain.shadow import ShadowComponent
-from src.enums import HollandCode
 from src.profile import UserProfile
-from src.question_bank import get_question_bank_registry, question_state_key
-from src.services.compatibility import CompatibilityComparator
-from src.services.profile_builder import build_user_profile_from_state, normalize_questionnaire_mode
-
-
-def _complete_state(mode: str, option_index: int = 0) -> dict[str, object]:
-    registry = get_question_bank_registry()
-    state: dict[str, object] = {
-        "questionnaire_mode": mode,
-        "psycho_o": 70,
-        "psycho_c": 70,
-        "psycho_e": 55,
-        "psycho_a": 65,
-        "psycho_n": 35,
-        "psycho_adhd": False,
-        "psycho_asd": False,
-        "prof_primary": HollandCode.SOCIAL.name,
-        "prof_secondary": HollandCode.INVESTIGATIVE.name,
-        "prof_tertiary": HollandCode.ARTISTIC.name,
-        "prof_centrality": 0.45,
-    }
-    for module in ("needs", "shadow", "eros"):
-        bank = registry.get(module).for_mode(mode)
-        for question in bank.questions:
-            if question.is_best_worst:
-                best_idx = option_index % len(question.options)
-                worst_idx = (option_index + 1) % len(question.options)
-                state[question_state_key(module, question.id, "best")] = question.options[best_idx].id
-                state[question_state_key(module, question.id, "worst")] = question.options[worst_idx].id
-            else:
-                option = question.options[min(option_index, len(question.options) - 1)]
-                state[question_state_key(module, question.id)] = option.id
-    return state
+from src.question_bank import get_question_bank_registry
+from src.services.compatibility import CompatibilityComparator, CompatibilityPool
+from src.services.derived_features import get_derived_features, invalidate_derived_features
+from src.services.profile_builder import (
+    IncrementalProfileBuilder,
+    build_user_profile_from_state,
+    normalize_questionnaire_mode,
+)
+from conftest import complete_state, random_profile
 
 
 def test_profile_builder_uses_questionnaire_mode_to_require_active_subset() -> None:
     registry = get_question_bank_registry()
 
-    simple_profile = build_user_profile_from_state(_complete_state("simple"), registry)
-    extended_profile = build_user_profile_from_state(_complete_state("extended"), registry)
+    simple_profile = build_user_profile_from_state(complete_state("simple"), registry)
+    extended_profile = build_user_profile_from_state(complete_state("extended"), registry)
 
     assert simple_profile.is_complete
     assert simple_profile.mode == "simple"
@@ -59,8 +36,8 @@ def test_normalize_questionnaire_mode_defaults_to_full() -> None:
 
 def test_compatibility_comparator_reports_strengths_and_tensions() -> None:
     registry = get_question_bank_registry()
-    first = build_user_profile_from_state(_complete_state("simple", option_index=0), registry, name="A")
-    second = build_user_profile_from_state(_complete_state("simple", option_index=2), registry, name="B")
+    first = build_user_profile_from_state(complete_state("simple", option_index=0), registry, name="A")
+    second = build_user_profile_from_state(complete_state("simple", option_index=2), registry, name="B")
 
     report = CompatibilityComparator.compare(first.user, second.user)
 
@@ -111,3 +88,77 @@ def test_compatibility_comparator_still_detects_clear_anxious_avoidant_loop() ->
     report = CompatibilityComparator.compare(_neutral_profile(first_shadow), _neutral_profile(second_shadow))
 
     assert any(item.title == "Тривожно-уникаюча петля" for item in report.tensions)
+
+
+def test_compare_many_matches_pairwise_comparison() -> None:
+    rng = Random(7)
+    profiles = [random_profile(rng, index) for index in range(300)]
+    pool = CompatibilityPool.from_profiles(profiles)
+
+    ranking = CompatibilityComparator.compare_many(profiles[0], pool)
+
+    for index, candidate in enumerate(profiles):
+        report = CompatibilityComparator.compare(profiles[0], candidate)
+        assert ranking.scores[index] == report.score
+        assert len(report.tensions) == min(8, int(ranking.tensions[index]).bit_count())
+        assert len(report.strengths) == min(8, int(ranking.strengths[index]).bit_count())
+
+    top = ranking.top(5)
+    assert list(ranking.scores[top]) == sorted(ranking.scores, reverse=True)[:5]
+    assert ranking.top_reports(1)[0][1] == CompatibilityComparator.compare(profiles[0], profiles[int(top[0])])
+
+
+def test_derived_features_are_cached_until_a_component_changes() -> None:
+    user = random_profile(Random(11), 0)
+
+    derived = get_derived_features(user)
+    assert get_derived_features(user) is derived
+    assert derived.needs == (
+        user.needs.adjusted_safety,
+        user.needs.adjusted_resource,
+        user.needs.adjusted_resonance,
+        user.needs.adjusted_expansion,
+    )
+
+    user.needs.adjusted_safety = 1.0 - user.needs.adjusted_safety
+    refreshed = get_derived_features(user)
+    assert refreshed is not derived
+    assert refreshed.needs[0] == user.needs.adjusted_safety
+
+    user.psychometrics.openness.ideas = 1.0 - user.psychometrics.openness.ideas
+    assert get_derived_features(user).domain_averages.openness == user.psychometrics.openness.average
+
+    user.provision = {f"{key}_provision": 0.25 for key in NEED_KEYS}
+    assert get_derived_features(user).provision == (0.25,) * len(NEED_KEYS)
+    user.provision["safety_provision"] = 0.75
+    invalidate_derived_features(user)
+    assert get_derived_features(user).provision[0] == 0.75
+
+
+def test_incremental_profile_builder_matches_full_rebuilds_over_an_edit_history() -> None:
+    registry = get_question_bank_registry()
+    builder = IncrementalProfileBuilder(registry)
+    rng = Random(11)
+    state = complete_state("extended")
+    editable = [key for key in complete_state("full", option_index=1) if key != "questionnaire_mode"]
+    choices = {key: [complete_state(mode, index).get(key) for mode in ("full", "extended") for index in range(3)] for key in editable}
+    choices["questionnaire_mode"] = ["simple", "extended", "full"]
+    choices["eros_tags"] = [[], ["tag"]]
+
+    for _ in range(60):
+        key = rng.choice(sorted(choices))
+        state[key] = rng.choice(choices[key])
+        assert builder.build(dict(state)) == build_user_profile_from_state(state, registry)
+
+    builder.graph.hits.clear()
+    builder.graph.misses.clear()
+    state = complete_state("extended")
+    first = builder.build(state)
+    eros_key = next(key for key in state if key.startswith("eros_q"))
+    state[eros_key] = complete_state("extended", option_index=2)[eros_key]
+    second = builder.build(state)
+
+    assert second == build_user_profile_from_state(state, registry)
+    assert second.user.needs is first.user.needs and second.user.shadow is first.user.shadow
+    assert builder.graph.misses["needs"] <= 1 and builder.graph.hits["needs"] >= 1
+    assert builder.graph.misses["eros"] >= 1
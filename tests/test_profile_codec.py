@@ -1,6 +1,28 @@
+import base64
+import json
+import zlib
+
 import pytest
 
+from src.profile_dictionary import (
+    build_registry_dictionary,
+    compress,
+    decompress,
+    profile_dictionaries,
+    save_dictionary,
+    train_dictionary,
+)
+from src.question_bank import (
+    QUESTION_BANK_DIR,
+    build_question_bank_registry,
+    get_question_bank_registry,
+    load_question_bank_from_payload,
+    set_question_bank_registry_provider,
+)
+from src.question_bank_history import reset_question_bank_history, save_registry_snapshot
 from src.services.profile_codec import ProfileCodec, ProfileCodecError
+from src.services.sanitizer import StateSanitizer
+from conftest import complete_state
 
 
 def test_profile_payload_roundtrip() -> None:
@@ -19,3 +41,154 @@ def test_profile_payload_checksum_is_verified() -> None:
 
     with pytest.raises(ProfileCodecError):
         ProfileCodec.from_json_dict(raw_payload)
+
+
+def _sanitized_state() -> dict[str, object]:
+    state = complete_state("full", option_index=1)
+    state.update(facet_open_ideas=14, prof_centrality=0.29, psycho_adhd=True, eros_tags=[])
+    return StateSanitizer.extract_persistable_state(state)
+
+
+def test_binary_profile_string_roundtrips_and_is_much_shorter() -> None:
+    registry = get_question_bank_registry()
+    state = _sanitized_state()
+    payload = ProfileCodec.build_binary_payload(state, registry, created_at="2024-05-01T10:30:00.123456+00:00")
+
+    encoded = ProfileCodec.encode_payload(payload)
+    legacy = ProfileCodec.encode_payload(ProfileCodec.build_payload(state, registry.fingerprint))
+
+    assert payload.format_version == "5.0"
+    assert payload.state == state
+    assert ProfileCodec.decode_string(encoded) == payload
+    assert ProfileCodec.decode_string(legacy).state == state
+    assert ProfileCodec.from_json_dict(ProfileCodec.to_json_dict(payload)) == payload
+    assert len(encoded) < len(legacy)
+
+
+def test_binary_profile_string_detects_tampering_and_falls_back_when_unpackable() -> None:
+    registry = get_question_bank_registry()
+    encoded = ProfileCodec.encode_payload(ProfileCodec.build_binary_payload(_sanitized_state(), registry))
+    tampered = encoded[:30] + ("A" if encoded[30] != "A" else "B") + encoded[31:]
+
+    with pytest.raises(ProfileCodecError):
+        ProfileCodec.decode_string(tampered)
+
+    unpackable = dict(_sanitized_state(), facet_open_ideas=12.5)
+    assert ProfileCodec.build_compact_payload(unpackable, registry).format_version == "4.1"
+
+
+def test_json_profile_string_uses_the_bank_dictionary_and_old_strings_still_decode() -> None:
+    registry = get_question_bank_registry()
+    payload = ProfileCodec.build_payload(
+        complete_state("extended"), registry.fingerprint, format_version=ProfileCodec.DICTIONARY_FORMAT_VERSION
+    )
+    legacy = ProfileCodec.build_payload(payload.state, registry.fingerprint, payload.created_at)
+    raw_json = json.dumps(ProfileCodec.to_json_dict(legacy), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    plain = base64.urlsafe_b64encode(zlib.compress(raw_json.encode("utf-8"))).decode("ascii").rstrip("=")
+
+    encoded = ProfileCodec.encode_payload(payload)
+
+    assert len(encoded) * 2 < len(plain)
+    assert ProfileCodec.decode_string(encoded) == payload
+    # 4.0 strings stay plain zlib, exactly as the codec before dictionaries wrote them.
+    assert ProfileCodec.encode_payload(legacy) == plain
+    assert ProfileCodec.decode_string(plain) == legacy
+
+    data = bytearray(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+    data[11] ^= 0xFF  # dictionary id in the zlib header
+    with pytest.raises(ProfileCodecError):
+        ProfileCodec.decode_string(base64.urlsafe_b64encode(bytes(data)).decode("ascii"))
+
+
+def test_trained_profile_dictionary_beats_the_generated_one(tmp_path) -> None:
+    registry = get_question_bank_registry()
+    states = [complete_state(mode, option_index) for mode in ("simple", "extended") for option_index in range(3)] * 2
+    samples = [
+        json.dumps(ProfileCodec.to_json_dict(ProfileCodec.build_payload(state, registry.fingerprint)), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        for state in states
+    ]
+
+    trained = train_dictionary(registry, states)
+    generated = build_registry_dictionary(registry)
+
+    assert sum(len(compress(sample, trained)) for sample in samples) < sum(len(compress(sample, generated)) for sample in samples)
+    assert all(decompress(compress(sample, trained), (generated, trained)) == sample for sample in samples)
+
+
+def test_newest_saved_dictionary_is_chosen_from_the_manifest(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("src.profile_dictionary.PROFILE_DICTIONARY_DIR", tmp_path)
+    registry = get_question_bank_registry()
+    generated = build_registry_dictionary(registry)
+    trained = train_dictionary(registry, [complete_state("extended")])
+    try:
+        save_dictionary(registry.fingerprint, trained, tmp_path)
+        save_dictionary(registry.fingerprint, generated, tmp_path)
+        assert profile_dictionaries(registry.fingerprint) == (generated, trained)
+
+        save_dictionary(registry.fingerprint, trained, tmp_path)
+        assert profile_dictionaries(registry.fingerprint) == (trained, generated)
+        assert sorted(path.suffix for path in tmp_path.iterdir()) == [".json", ".zdict", ".zdict"]
+    finally:
+        profile_dictionaries.cache_clear()
+
+
+def test_current_bank_version_dictionary_is_committed() -> None:
+    # Exports never write dictionaries; run `python -m src.profile_dictionary` and commit its output.
+    assert profile_dictionaries(get_question_bank_registry().fingerprint)
+
+
+def test_json_text_roundtrip_and_batch_codec() -> None:
+    registry = get_question_bank_registry()
+    payloads = [ProfileCodec.build_payload(complete_state(mode), registry.fingerprint) for mode in ("simple", "extended")]
+    text = ProfileCodec.to_json_text(payloads[0])
+
+    assert text == json.dumps(ProfileCodec.to_json_dict(payloads[0]), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    assert ProfileCodec.from_json_text(text) == payloads[0]
+    assert ProfileCodec.from_json_text(json.dumps(ProfileCodec.to_json_dict(payloads[0]), indent=2)) == payloads[0]
+    with pytest.raises(ProfileCodecError, match="checksum"):
+        ProfileCodec.from_json_text(text.replace('"simple"', '"extended"', 1))
+
+    encoded = list(ProfileCodec.encode_many(payloads))
+    decoded = list(ProfileCodec.decode_many([encoded[0], "not a profile", encoded[1]]))
+
+    assert decoded[0] == payloads[0] and decoded[2] == payloads[1]
+    assert isinstance(decoded[1], ProfileCodecError)
+
+
+def test_compact_profile_strings_still_decode_after_the_bank_changes(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("src.question_bank_history.QUESTION_BANK_HISTORY_DIR", tmp_path / "history")
+    monkeypatch.setattr("src.profile_dictionary.PROFILE_DICTIONARY_DIR", tmp_path / "dictionaries")
+    profile_dictionaries.cache_clear()
+    reset_question_bank_history()
+    registry = get_question_bank_registry()
+    # Without committed artifacts an export writes nothing and falls back to plain 4.0.
+    assert ProfileCodec.build_compact_payload(_sanitized_state(), registry).format_version == "4.0"
+    assert not (tmp_path / "history").exists() and not (tmp_path / "dictionaries").exists()
+
+    save_registry_snapshot(tmp_path / "history")
+    save_dictionary(registry.fingerprint, build_registry_dictionary(registry), tmp_path / "dictionaries")
+    payload = ProfileCodec.build_compact_payload(_sanitized_state(), registry)
+    encoded = ProfileCodec.encode_payload(payload)
+    exported = ProfileCodec.to_json_dict(payload)
+    json_payload = ProfileCodec.build_compact_payload(dict(_sanitized_state(), facet_open_ideas=12.5), registry)
+    json_encoded = ProfileCodec.encode_payload(json_payload)
+
+    assert (payload.format_version, json_payload.format_version) == ("5.0", "4.1")
+
+    raw_needs = json.loads((QUESTION_BANK_DIR / "needs.json").read_text(encoding="utf-8"))
+    raw_needs["questions"][0]["question"] += " Уточнено."
+    edited = build_question_bank_registry({**registry.banks, "needs": load_question_bank_from_payload(raw_needs)})
+    set_question_bank_registry_provider(lambda: edited)
+    # As in a fresh process: only the files on disk know the old version.
+    reset_question_bank_history()
+    profile_dictionaries.cache_clear()
+    try:
+        assert ProfileCodec.decode_string(encoded) == payload
+        assert ProfileCodec.from_json_dict(exported) == payload
+        assert ProfileCodec.decode_string(json_encoded) == json_payload
+        # The edited banks have no committed snapshot or dictionary, so they get plain 4.0.
+        assert ProfileCodec.build_compact_payload(_sanitized_state(), edited).format_version == "4.0"
+    finally:
+        set_question_bank_registry_provider(None)
+        reset_question_bank_history()
+        profile_dictionaries.cache_clear()
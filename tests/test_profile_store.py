@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from src.question_bank import get_question_bank_registry
+from src.services.compatibility import CompatibilityComparator, CompatibilityPool
+from src.services.profile_codec import ProfileCodec
+from src.services.profile_store import ProfileStore, ProfileStoreError
+from conftest import complete_state
+
+
+def _payloads():
+    fingerprint = get_question_bank_registry().fingerprint
+    return [
+        ProfileCodec.build_payload(complete_state(mode, option_index), fingerprint, created_at="2024-01-01T00:00:00+00:00")
+        for mode in ("simple", "extended")
+        for option_index in range(3)
+    ]
+
+
+def test_profile_store_is_content_addressed_and_serves_pools(tmp_path) -> None:
+    payloads = _payloads()
+    path = tmp_path / "profiles.sqlite"
+    with ProfileStore(path) as store:
+        assert store.put_many(payloads) == len(payloads)
+        assert store.put_many(payloads[:2]) == 0
+
+    with ProfileStore(path) as store:
+        assert len(store) == len(payloads)
+        checksums = [payload.checksum for payload in payloads]
+        profiles = [store.load_profile(checksum) for checksum in checksums]
+        stored_pool = store.pool(checksums[::-1])
+        expected_pool = CompatibilityPool.from_profiles(profiles[::-1])
+        for name in ("needs", "provision", "priority", "eros", "shadow", "facets"):
+            np.testing.assert_allclose(getattr(stored_pool, name), getattr(expected_pool, name))
+
+        np.testing.assert_allclose(
+            CompatibilityComparator.compare_many(profiles[0], store.pool()).scores,
+            CompatibilityComparator.compare_many(profiles[0], CompatibilityPool.from_profiles(profiles)).scores,
+        )
+
+        safety = expected_pool.needs[:, 0]
+        low = float(np.median(safety))
+        assert set(store.query(needs={"safety": (low, None)})) == {
+            profile_checksum for profile_checksum, value in zip(checksums[::-1], safety) if value >= low
+        }
+        style = profiles[0].shadow.attachment_style
+        assert set(store.query(attachment_style=style.name.lower())) == {
+            checksum for checksum, profile in zip(checksums, profiles) if profile.shadow.attachment_style is style
+        }
+        assert store.rescore() == len(payloads)
+        with pytest.raises(ProfileStoreError):
+            store.query(needs={"money": (0.0, 1.0)})
+
+
+def test_profile_store_rejects_incomplete_profiles() -> None:
+    state = complete_state("extended")
+    state.pop(next(key for key in state if key.startswith("shadow_q")))
+    payload = ProfileCodec.build_payload(state, get_question_bank_registry().fingerprint)
+
+    with ProfileStore() as store, pytest.raises(ProfileStoreError, match="incomplete"):
+        store.put(payload)
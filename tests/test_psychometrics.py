@@ -0,0 +1,58 @@
+from random import Random
+
+import pytest
+
+from src.domain.psychometrics import FACET_INDEX, CompactPsychometrics, PsychometricsComponent
+from src.domain.needs import RelationalNeedsComponent
+from src.domain.professional import ProfessionalComponent
+from src.services.adjustment import NeedsAdjustmentService
+from src.services.bigfive_pdf_parser import FACET_SPECS
+from src.services.neurodivergence import NeurodivergenceService
+from src.services.provision import ProvisionService
+
+
+def _random_psychometrics(rng: Random) -> PsychometricsComponent:
+    psycho = PsychometricsComponent(has_adhd=True)
+    for domain, facet in FACET_INDEX:
+        setattr(getattr(psycho, domain), facet, rng.random())
+    return psycho
+
+
+def test_compact_psychometrics_keeps_the_attribute_api() -> None:
+    psycho = _random_psychometrics(Random(3))
+    compact = CompactPsychometrics.from_component(psycho)
+
+    assert compact.facet_values() == psycho.facet_values()
+    assert [compact.facet(spec.index) for spec in FACET_SPECS] == [
+        getattr(getattr(psycho, spec.domain), spec.attr_name) for spec in FACET_SPECS
+    ]
+    for domain in ("neuroticism", "extraversion", "openness", "agreeableness", "conscientiousness"):
+        assert getattr(compact, domain).average == pytest.approx(getattr(psycho, domain).average)
+    assert compact.neurodivergence_label == "ADHD"
+    assert compact.to_component() == psycho
+
+    professional = ProfessionalComponent()
+    assert vars(ProvisionService.analyze(compact, professional)) == pytest.approx(
+        vars(ProvisionService.analyze(psycho, professional))
+    )
+    assert NeurodivergenceService.analyze(compact).label == NeurodivergenceService.analyze(psycho).label
+    adjusted = NeedsAdjustmentService.adjust_needs(RelationalNeedsComponent(), compact)
+    assert adjusted.adjusted_safety == pytest.approx(
+        NeedsAdjustmentService.adjust_needs(RelationalNeedsComponent(), psycho).adjusted_safety
+    )
+
+
+def test_compact_psychometrics_refreshes_cached_average_on_write() -> None:
+    compact = CompactPsychometrics.from_high_level_scores(50, 50, 50, 50, 50)
+
+    compact.openness.ideas = 1.0
+    assert compact.openness.ideas == 1.0
+    assert compact.openness.average == pytest.approx(3.5 / 6)
+
+    compact.set_facet(FACET_INDEX[("neuroticism", "anxiety")], 0.0)
+    assert compact.neuroticism.average == pytest.approx(2.5 / 6)
+
+    with pytest.raises(AttributeError):
+        compact.openness.curiosity = 1.0
+    with pytest.raises(ValueError):
+        CompactPsychometrics([0.5] * 29)
@@ -109,3 +109,48 @@ def test_loader_allows_authoring_metadata_for_non_needs_modules(tmp_path) -> Non
     assert bank.module == "provision"
     assert bank.questions[0].family == "provision_capacity"
     assert bank.questions[0].dimension == "safety_provision"
+
+
+def test_loaded_bank_is_compiled_for_constant_time_lookup(tmp_path) -> None:
+    payload = _build_bank_payload()
+    payload["questions"].append(
+        {
+            "id": "q2",
+            "question": "Question 2",
+            "description": "",
+            "options": [
+                {"id": "opt_a", "text": "Option A", "vector": [-1.0, 0.5]},
+                {"id": "opt_b", "text": "Option B", "vector": [2.0, 0.0]},
+                {"id": "opt_c", "text": "Option C", "vector": [0.0, 3.0]},
+            ],
+        }
+    )
+    bank = load_question_bank_from_path(write_json(tmp_path, "compiled.json", payload))
+    compiled = bank.compiled
+
+    assert bank.get_question("q2") is bank.questions[1]
+    assert bank.questions[1].get_option("opt_c").text == "Option C"
+    assert bank.questions[1].has_option("opt_b")
+    assert not bank.questions[1].has_option("opt_1")
+    assert compiled.offsets == (0, 2, 5)
+    assert compiled.dominant_dimensions == ((0, 1), (1, 0, 1))
+    assert list(compiled.vectors[4 * 2 : 5 * 2]) == [0.0, 3.0]
+    assert bank.min_vector() == (-1.0, 0.0)
+    assert bank.max_vector() == (3.0, 4.0)
+    with pytest.raises(KeyError):
+        bank.get_question("missing")
+
+
+def test_mode_views_are_built_once_with_their_own_bounds() -> None:
+    needs = get_question_bank_registry().get("needs")
+    simple = needs.for_mode("simple")
+
+    assert needs.for_mode("simple") is simple
+    assert needs.for_mode("extended") is needs
+    assert simple.for_mode("simple") is simple
+    assert all(question.mode == "simple" for question in simple.questions)
+    assert simple.compiled.option_count < needs.compiled.option_count
+    assert len(simple.state_keys()) == len(simple.questions)
+    assert simple.state_keys()[0] == (f"scenario_{simple.questions[0].id}",)
+    with pytest.raises(QuestionBankValidationError):
+        needs.for_mode("unknown")
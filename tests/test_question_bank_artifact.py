@@ -0,0 +1,56 @@
+import shutil
+
+from src.question_bank import (
+    QUESTION_BANK_DIR,
+    QUESTION_BANK_MODULES,
+    build_question_bank_registry,
+    load_question_bank_from_path,
+)
+from src.question_bank_artifact import build_registry_artifact, load_registry_artifact
+
+
+def _copy_sources(tmp_path):
+    source_dir = tmp_path / "banks"
+    source_dir.mkdir()
+    for module in QUESTION_BANK_MODULES:
+        shutil.copy(QUESTION_BANK_DIR / f"{module}.json", source_dir / f"{module}.json")
+    return source_dir
+
+
+def test_artifact_roundtrip_matches_json_registry(tmp_path) -> None:
+    source_dir = _copy_sources(tmp_path)
+    artifact_path = tmp_path / "registry.bin"
+
+    built = build_registry_artifact(artifact_path, source_dir=source_dir)
+    loaded = load_registry_artifact(artifact_path, source_dir=source_dir)
+    from_json = build_question_bank_registry(
+        {module: load_question_bank_from_path(source_dir / f"{module}.json") for module in QUESTION_BANK_MODULES}
+    )
+
+    assert loaded is not None
+    assert loaded.fingerprint == built.fingerprint == from_json.fingerprint
+    for module in QUESTION_BANK_MODULES:
+        assert loaded.get(module) == from_json.get(module)
+        assert loaded.get(module).compiled == from_json.get(module).compiled
+
+
+def test_artifact_is_ignored_when_a_source_bank_changes(tmp_path) -> None:
+    source_dir = _copy_sources(tmp_path)
+    artifact_path = tmp_path / "registry.bin"
+    build_registry_artifact(artifact_path, source_dir=source_dir)
+
+    eros_path = source_dir / "eros.json"
+    eros_path.write_text(eros_path.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+
+    assert load_registry_artifact(artifact_path, source_dir=source_dir) is None
+
+
+def test_missing_or_corrupt_artifact_falls_back(tmp_path) -> None:
+    source_dir = _copy_sources(tmp_path)
+    artifact_path = tmp_path / "registry.bin"
+
+    assert load_registry_artifact(artifact_path, source_dir=source_dir) is None
+
+    build_registry_artifact(artifact_path, source_dir=source_dir)
+    artifact_path.write_bytes(artifact_path.read_bytes()[:100])
+    assert load_registry_artifact(artifact_path, source_dir=source_dir) is None
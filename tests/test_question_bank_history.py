@@ -0,0 +1,83 @@
+import json
+import shutil
+
+from src.question_bank import QUESTION_BANK_DIR, QUESTION_BANK_MODULES, get_question_bank_registry, question_state_key
+from src.question_bank_history import (
+    QUESTION_BANK_HISTORY_DIR,
+    QuestionBankHistory,
+    load_question_bank_history,
+    load_registry_snapshot,
+    save_registry_snapshot,
+)
+from src.services.sanitizer import StateSanitizer
+
+
+def _copy_sources(tmp_path):
+    source_dir = tmp_path / "banks"
+    source_dir.mkdir()
+    for module in QUESTION_BANK_MODULES:
+        shutil.copy(QUESTION_BANK_DIR / f"{module}.json", source_dir / f"{module}.json")
+    return source_dir
+
+
+def _release_new_shadow_question(source_dir) -> str:
+    shadow_path = source_dir / "shadow.json"
+    payload = json.loads(shadow_path.read_text(encoding="utf-8"))
+    retired = payload["questions"][0]
+    payload["questions"][0] = {**retired, "id": retired["id"] + "_v2"}
+    shadow_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    return retired["id"]
+
+
+def test_history_keeps_old_versions_and_shares_unchanged_questions(tmp_path) -> None:
+    source_dir = _copy_sources(tmp_path)
+    history_dir = tmp_path / "history"
+    old_snapshot = save_registry_snapshot(history_dir, source_dir=source_dir)
+    _release_new_shadow_question(source_dir)
+    new_snapshot = save_registry_snapshot(history_dir, source_dir=source_dir)
+
+    history = QuestionBankHistory([load_registry_snapshot(old_snapshot), load_registry_snapshot(new_snapshot)])
+    old_registry = history.get(old_snapshot.stem)
+    new_registry = history.get(new_snapshot.stem)
+
+    assert len(history) == 2
+    assert sorted(path.name for path in history_dir.iterdir()) == sorted([old_snapshot.name, new_snapshot.name])
+    assert old_registry is not None and new_registry is not None
+    assert old_registry.get("needs") is new_registry.get("needs")
+    assert old_registry.get("shadow") is not new_registry.get("shadow")
+    assert old_registry.get("shadow").questions[1] is new_registry.get("shadow").questions[1]
+    assert history.resolve("unknown-fingerprint", default=new_registry) is new_registry
+
+
+def test_old_profile_is_sanitized_against_its_own_bank_version(tmp_path) -> None:
+    source_dir = _copy_sources(tmp_path)
+    history_dir = tmp_path / "history"
+    old_snapshot = save_registry_snapshot(history_dir, source_dir=source_dir)
+    retired_question_id = _release_new_shadow_question(source_dir)
+    new_registry = load_registry_snapshot(save_registry_snapshot(history_dir, source_dir=source_dir))
+
+    history = load_question_bank_history(history_dir, current=get_question_bank_registry())
+    old_registry = history.resolve(old_snapshot.stem, default=new_registry)
+    answer_key = question_state_key("shadow", retired_question_id)
+    state = {answer_key: old_registry.get("shadow").questions[0].options[0].id}
+
+    clean_state, removal_log = StateSanitizer.sanitize(
+        state,
+        incoming_bank_fingerprint=old_snapshot.stem,
+        registry=old_registry,
+    )
+    assert clean_state == state
+    assert not removal_log
+
+    _, stale_log = StateSanitizer.sanitize(state, incoming_bank_fingerprint=old_snapshot.stem, registry=new_registry)
+    assert any("іншій версії банку" in item for item in stale_log)
+
+
+def test_current_bank_version_snapshot_is_committed() -> None:
+    # Exports never write into the package; a missing snapshot means `python -m src.question_bank_history`
+    # was not run (and committed) for the current banks.
+    registry = get_question_bank_registry()
+    snapshot = QUESTION_BANK_HISTORY_DIR / f"{registry.fingerprint}.json"
+
+    assert snapshot.is_file()
+    assert load_registry_snapshot(snapshot).fingerprint == registry.fingerprint
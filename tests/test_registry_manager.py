@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+
+from src.question_bank import QUESTION_BANK_DIR, QUESTION_BANK_MODULES, get_question_bank_registry
+from src.question_bank_history import find_registry, load_question_bank_history
+from src.services.question_bank_quality import QuestionBankQualityGate
+from src.services.registry_manager import QuestionBankRegistryManager
+
+
+def _copy_sources(tmp_path):
+    for module in QUESTION_BANK_MODULES:
+        shutil.copy(QUESTION_BANK_DIR / f"{module}.json", tmp_path / f"{module}.json")
+    return tmp_path
+
+
+def _rewrite(path, payload: dict) -> None:
+    previous_mtime = path.stat().st_mtime_ns
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.utime(path, ns=(previous_mtime + 1_000_000, previous_mtime + 1_000_000))
+
+
+def test_refresh_swaps_in_edited_bank_and_keeps_old_snapshot(tmp_path) -> None:
+    manager = QuestionBankRegistryManager(_copy_sources(tmp_path))
+    snapshot = manager.current()
+    assert not manager.refresh()
+
+    shadow_path = tmp_path / "shadow.json"
+    payload = json.loads(shadow_path.read_text(encoding="utf-8"))
+    payload["metadata"]["version"] = payload["metadata"]["version"] + "-hotfix"
+    _rewrite(shadow_path, payload)
+
+    assert manager.refresh()
+    reloaded = manager.current()
+    assert reloaded.fingerprint != snapshot.fingerprint
+    assert reloaded.get("shadow").metadata.version.endswith("-hotfix")
+    assert reloaded.get("needs") is snapshot.get("needs")
+    assert not snapshot.get("shadow").metadata.version.endswith("-hotfix")
+
+
+def test_refresh_rejects_invalid_or_lower_quality_banks(tmp_path) -> None:
+    manager = QuestionBankRegistryManager(_copy_sources(tmp_path))
+    snapshot = manager.current()
+
+    needs_path = tmp_path / "needs.json"
+    payload = json.loads(needs_path.read_text(encoding="utf-8"))
+    payload["questions"] = payload["questions"][:4]
+    _rewrite(needs_path, payload)
+    assert not manager.refresh()
+    assert manager.current() is snapshot
+    assert manager.rejections[-1].module == "needs"
+
+    (tmp_path / "eros.json").write_text("{broken", encoding="utf-8")
+    assert not manager.refresh()
+    assert manager.current() is snapshot
+    assert manager.rejections[-1].module == "eros"
+
+
+def test_installed_manager_serves_global_registry(tmp_path) -> None:
+    manager = QuestionBankRegistryManager(_copy_sources(tmp_path))
+    manager.install()
+    try:
+        assert get_question_bank_registry() is manager.current()
+    finally:
+        manager.uninstall()
+    assert get_question_bank_registry() is not manager.current()
+
+
+def test_refresh_accepts_edit_that_fails_an_already_failing_check_with_other_numbers(tmp_path) -> None:
+    manager = QuestionBankRegistryManager(_copy_sources(tmp_path))
+    previous_errors = QuestionBankQualityGate.evaluate(manager.current().get("provision")).errors
+
+    provision_path = tmp_path / "provision.json"
+    payload = json.loads(provision_path.read_text(encoding="utf-8"))
+    extra = {**payload["questions"][0], "id": payload["questions"][0]["id"] + "_copy"}
+    payload["questions"].append(extra)
+    _rewrite(provision_path, payload)
+
+    # Still too few tradeoffs, but the message now quotes a different count.
+    assert manager.refresh()
+    edited_errors = QuestionBankQualityGate.evaluate(manager.current().get("provision")).errors
+    assert edited_errors and set(edited_errors).isdisjoint(previous_errors)
+
+
+def test_replaced_registries_stay_resolvable_and_are_archived(tmp_path) -> None:
+    (tmp_path / "banks").mkdir()
+    sources = _copy_sources(tmp_path / "banks")
+    shadow_path = sources / "shadow.json"
+    payload = json.loads(shadow_path.read_text(encoding="utf-8"))
+    payload["metadata"]["version"] = payload["metadata"]["version"] + "-draft"
+    _rewrite(shadow_path, payload)
+    archive_dir = tmp_path / "history"
+    manager = QuestionBankRegistryManager(sources, archive_dir=archive_dir)
+    original = manager.current()
+
+    payload["metadata"]["version"] = payload["metadata"]["version"] + "-hotfix"
+    _rewrite(shadow_path, payload)
+    manager.install()
+    try:
+        assert manager.refresh()
+        # The process-wide history picks up every activated registry, not just the one current at first use.
+        assert find_registry(original.fingerprint).fingerprint == original.fingerprint
+        assert find_registry(manager.current().fingerprint) is manager.current()
+    finally:
+        manager.uninstall()
+
+    archived = load_question_bank_history(archive_dir, current=get_question_bank_registry())
+    assert {original.fingerprint, manager.current().fingerprint} <= set(archived.fingerprints())
@@ -1,6 +1,6 @@
 from src.enums import HollandCode
-from src.question_bank import load_question_bank, question_state_key
-from src.services.sanitizer import StateSanitizer
+from src.question_bank import get_question_bank_registry, load_question_bank, question_state_key
+from src.services.sanitizer import StateSanitizer, get_state_schema
 
 
 def test_sanitizer_revalidates_state_against_current_bank() -> None:
@@ -66,3 +66,18 @@ def test_sanitizer_validates_best_worst_pairs() -> None:
     assert any("не можна обрати той самий варіант двічі" in item for item in removal_log_dup)
     assert best_key not in clean_state_dup
     assert worst_key not in clean_state_dup
+
+
+def test_state_schema_is_compiled_once_and_batch_matches_single_sanitize() -> None:
+    registry = get_question_bank_registry()
+    assert get_state_schema(registry) is get_state_schema(registry)
+
+    states = [
+        ({"psycho_o": 40, "questionnaire_mode": ["full"], "unknown_field": 1}, None),
+        ({"prof_primary": HollandCode.SOCIAL, "eros_tags": "bad"}, "old-bank-fingerprint"),
+    ]
+    results = StateSanitizer.sanitize_many(states, registry)
+
+    assert results == [StateSanitizer.sanitize(state, fingerprint, registry) for state, fingerprint in states]
+    assert results[0][0] == {"psycho_o": 40.0}
+    assert results[1][0] == {"prof_primary": HollandCode.SOCIAL.name}
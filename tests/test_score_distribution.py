@@ -0,0 +1,99 @@
+from collections import Counter
+import copy
+import itertools
+from pathlib import Path
+
+import pytest
+
+from conftest import write_json
+from src.question_bank import QuestionResponse, get_question_bank_registry, load_question_bank_from_path
+from src.services.score_distribution import ScoreDistribution, ScoreDistributionEngine
+from src.services.scoring import QuestionnaireScorer
+from test_question_bank_quality import _valid_strict_needs_bank
+
+
+def _needs_bank(tmp_path: Path):
+    payload = _valid_strict_needs_bank()
+    safety = payload["questions"][0]
+    for suffix in ("02", "03"):
+        extra = copy.deepcopy(safety)
+        extra["id"] = f"safety_{suffix}"
+        payload["questions"].append(extra)
+    return load_question_bank_from_path(write_json(tmp_path, "needs.json", payload))
+
+
+def _enumerated(answer_sets: list[list[QuestionResponse]], questions, bank, fixed, fields: tuple[str, ...]) -> list[Counter]:
+    counts = [Counter() for _ in fields]
+    for answers in itertools.product(*answer_sets):
+        responses = dict(fixed)
+        responses.update({question.id: answer for question, answer in zip(questions, answers)})
+        component = QuestionnaireScorer.build_needs_component(bank, responses)
+        for count, name in zip(counts, fields):
+            count[round(getattr(component, name), 9)] += 1
+    return counts
+
+
+def _assert_matches(distribution: ScoreDistribution, count: Counter) -> None:
+    total = sum(count.values())
+    assert distribution.values == tuple(sorted(count))
+    assert distribution.probabilities == pytest.approx(tuple(count[value] / total for value in sorted(count)))
+
+
+def test_needs_distributions_match_full_enumeration_of_answers(tmp_path: Path) -> None:
+    bank = _needs_bank(tmp_path)
+    absolute = [question for question in bank.questions if question.family == "absolute"]
+    priority = [question for question in bank.questions if question.family == "priority"]
+    single = {
+        question.id: [QuestionResponse.single_choice(option_id) for option_id in question.option_ids()] for question in absolute
+    }
+    pairs = {
+        question.id: [QuestionResponse.best_worst(best, worst) for best, worst in itertools.permutations(question.option_ids(), 2)]
+        for question in priority
+    }
+    labels = bank.metadata.vector_labels
+
+    raw_counts = _enumerated(
+        [single[question.id] for question in absolute],
+        absolute,
+        bank,
+        {question.id: pairs[question.id][0] for question in priority},
+        tuple(f"raw_{label}" for label in labels),
+    )
+    for label, count in zip(labels, raw_counts):
+        _assert_matches(ScoreDistributionEngine.dimension_distributions(bank)[label], count)
+
+    priority_counts = _enumerated(
+        [pairs[question.id] for question in priority],
+        priority,
+        bank,
+        {question.id: single[question.id][0] for question in absolute},
+        tuple(f"priority_{label}" for label in labels),
+    )
+    for label, count in zip(labels, priority_counts):
+        _assert_matches(ScoreDistributionEngine.priority_distributions(bank)[label], count)
+
+
+def test_score_distribution_quantiles_and_boundary_mass() -> None:
+    coin = ScoreDistribution.uniform((0.0, 1.0))
+    total = coin + coin + coin
+
+    assert total.values == (0.0, 1.0, 2.0, 3.0)
+    assert total.probabilities == (0.125, 0.375, 0.375, 0.125)
+    assert (total.floor_mass, total.ceiling_mass) == (0.125, 0.125)
+    assert (total.quantile(0.1), total.quantile(0.5), total.quantile(0.9)) == (0.0, 1.0, 3.0)
+    assert total.spread() == 3.0
+    assert total.mean == pytest.approx(1.5)
+    assert total.std == pytest.approx(0.75**0.5)
+
+
+def test_single_choice_bank_distribution_is_the_normalized_total() -> None:
+    bank = get_question_bank_registry().get("shadow")
+    minimums, maximums = bank.min_vector(), bank.max_vector()
+
+    for index, distribution in enumerate(ScoreDistributionEngine.dimension_distributions(bank).values()):
+        expected_total = sum(
+            sum(option.vector[index] for option in question.options) / len(question.options) for question in bank.questions
+        )
+        assert sum(distribution.probabilities) == pytest.approx(1.0)
+        assert distribution.mean == pytest.approx((expected_total - minimums[index]) / (maximums[index] - minimums[index]))
+        assert 0.0 <= distribution.values[0] and distribution.values[-1] <= 1.0
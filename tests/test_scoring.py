@@ -1,5 +1,9 @@
+from random import Random
+
+import pytest
+
 from src.domain.psychometrics import PsychometricsComponent
-from src.question_bank import load_question_bank_from_path
+from src.question_bank import get_question_bank_registry, load_question_bank_from_path
 from src.services.adjustment import NeedsAdjustmentService
 from src.services.scoring import QuestionnaireScorer
 from conftest import write_json
@@ -67,3 +71,44 @@ def test_adjustment_does_not_saturate_from_bank_size(tmp_path) -> None:
 
     assert adjusted.adjusted_safety < 1.0
     assert 0.0 <= adjusted.adjusted_safety <= 1.0
+
+
+def test_score_batch_matches_per_respondent_scoring() -> None:
+    registry = get_question_bank_registry()
+    rng = Random(7)
+
+    for module in ("shadow", "eros", "provision", "calibration"):
+        bank = registry.get(module)
+        responses_batch = [
+            {question.id: rng.choice(question.options).id for question in bank.questions}
+            for _ in range(25)
+        ]
+        matrix = QuestionnaireScorer.build_response_matrix(bank, responses_batch)
+        batch = QuestionnaireScorer.score_batch(bank, matrix)
+
+        assert len(batch) == len(responses_batch)
+        for index, responses in enumerate(responses_batch):
+            assert batch.row(index) == QuestionnaireScorer.score(bank, responses)
+
+    shadow_bank = registry.get("shadow")
+    shadow_responses = [{question.id: question.options[1].id for question in shadow_bank.questions}]
+    shadow_matrix = QuestionnaireScorer.build_response_matrix(shadow_bank, shadow_responses)
+    assert QuestionnaireScorer.build_shadow_components_batch(shadow_bank, shadow_matrix) == [
+        QuestionnaireScorer.build_shadow_component(shadow_bank, shadow_responses[0])
+    ]
+
+    calibration_bank = registry.get("calibration")
+    calibration_responses = [{question.id: question.options[2].id for question in calibration_bank.questions}]
+    calibration_matrix = QuestionnaireScorer.build_response_matrix(calibration_bank, calibration_responses)
+    assert QuestionnaireScorer.build_calibration_scores_batch(calibration_bank, calibration_matrix) == [
+        QuestionnaireScorer.build_calibration_scores(calibration_bank, calibration_responses[0])
+    ]
+
+
+def test_score_batch_rejects_missing_and_out_of_range_answers(tmp_path) -> None:
+    bank = load_question_bank_from_path(write_json(tmp_path, "needs.json", _build_needs_bank(2)))
+
+    with pytest.raises(ValueError, match="Missing question ids: q2"):
+        QuestionnaireScorer.score_batch(bank, [[0, -1]])
+    with pytest.raises(ValueError, match="out of range"):
+        QuestionnaireScorer.score_batch(bank, [[0, 2]])